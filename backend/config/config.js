@@ -8,7 +8,7 @@ module.exports = {
   // File Upload Configuration
   upload: {
     maxFileSize: 50 * 1024 * 1024, // 50MB
-    allowedTypes: ['.txt', '.csv', '.pdf', '.json'],
+    allowedTypes: ['.txt', '.csv', '.pdf', '.json', '.jsonl', '.ndjson', '.parquet'],
     uploadDir: 'uploads/'
   },
   
@@ -30,7 +30,14 @@ module.exports = {
   pythonApi: {
     url: process.env.PYTHON_API_URL || 'http://localhost:8000',
     timeout: parseInt(process.env.PYTHON_API_TIMEOUT) || 300000, // 5 minutes
-    retries: parseInt(process.env.PYTHON_API_RETRIES) || 3
+    retries: parseInt(process.env.PYTHON_API_RETRIES) || 3,
+    streaming: process.env.PYTHON_API_STREAMING === 'true', // Use /process-stream for non-CSV uploads
+    asyncJobs: process.env.PYTHON_API_ASYNC_JOBS === 'true', // Submit-and-return; Python reports progress in MongoDB
+    sharedUploads: process.env.PYTHON_API_SHARED_UPLOADS === 'true', // Python reads uploads/ directly via /process-file
+    responseFormat: process.env.PYTHON_API_RESPONSE_FORMAT || 'rows', // 'columnar' = per-field arrays from /process-content
+    responseFields: process.env.PYTHON_API_RESPONSE_FIELDS ? process.env.PYTHON_API_RESPONSE_FIELDS.split(',') : null,
+    responseEncoding: process.env.PYTHON_API_RESPONSE_ENCODING || 'json', // json (gzip-negotiated) | gzip | msgpack
+    memoryBudgetMb: parseFloat(process.env.PYTHON_API_MEMORY_BUDGET_MB) || 0 // >0: sync jobs spill results to disk on the Python side
   },
 
   // Processing Configuration
@@ -1,6 +1,49 @@
 const { logger } = require('../utils/logger');
 const ProcessingJob = require('../models/ProcessingJob');
 
+/**
+ * Sum the per-job analytics summaries written by the Python engine
+ */
+const combineAnalytics = (summaries) => {
+  const combined = {
+    jobs: summaries.length,
+    lines: 0,
+    errorLines: 0,
+    lowConfidenceLines: 0,
+    confidenceHistogram: null,
+    confidenceByLabel: {}
+  };
+  const labelTotals = {};
+
+  summaries.forEach(summary => {
+    combined.lines += summary.lines || 0;
+    combined.errorLines += summary.errorLines || 0;
+    combined.lowConfidenceLines += summary.lowConfidenceLines || 0;
+
+    const histogram = summary.confidenceHistogram;
+    if (histogram) {
+      if (!combined.confidenceHistogram) {
+        combined.confidenceHistogram = { bins: histogram.bins, counts: histogram.counts.map(() => 0) };
+      }
+      histogram.counts.forEach((count, i) => { combined.confidenceHistogram.counts[i] += count; });
+    }
+
+    // Weight each job's per-label mean by the lines it had with that label
+    Object.entries(summary.confidenceByLabel || {}).forEach(([label, mean]) => {
+      const weight = summary.labelCounts?.[label] || 0;
+      if (mean === null || mean === undefined || weight === 0) return;
+      labelTotals[label] = labelTotals[label] || { sum: 0, weight: 0 };
+      labelTotals[label].sum += mean * weight;
+      labelTotals[label].weight += weight;
+    });
+  });
+
+  Object.entries(labelTotals).forEach(([label, { sum, weight }]) => {
+    combined.confidenceByLabel[label] = parseFloat((sum / weight).toFixed(3));
+  });
+  return combined;
+};
+
 /**
  * Get dashboard statistics - WITH MONGODB
  */
@@ -40,7 +83,8 @@ const getStats = async (req, res) => {
       todayStats,
       weekStats,
       monthStats,
-      sentimentAggregation
+      sentimentAggregation,
+      recentAnalytics
     ] = await Promise.all([
       // Total jobs - USE ObjectId
       ProcessingJob.countDocuments({ userId: userIdObj }),
@@ -98,7 +142,14 @@ const getStats = async (req, res) => {
           totalNeutral: { $sum: { $ifNull: ['$sentimentDistribution.neutral', 0] } },
           totalNegative: { $sum: { $ifNull: ['$sentimentDistribution.negative', 0] } }
         } }
-      ])
+      ]),
+
+      // Precomputed per-job analytics of the same 20 jobs (small summaries, no result lines)
+      ProcessingJob.find({ userId: userIdObj, status: 'completed', analytics: { $exists: true } })
+        .sort({ completedAt: -1 })
+        .limit(20)
+        .select('analytics')
+        .lean()
     ]);
     
     //console.log('Results:');
@@ -130,7 +181,7 @@ const getStats = async (req, res) => {
       userId: userIdObj, 
       status: 'completed',
       averageSentiment: { $exists: true, $ne: null }
-    });
+    }).select('averageSentiment').lean();
     
     const avgSentimentOverall = allJobs.length > 0 
       ? allJobs.reduce((sum, job) => sum + job.averageSentiment, 0) / allJobs.length
@@ -144,7 +195,8 @@ const getStats = async (req, res) => {
       successRate,
       storageUsed: 0,
       sentimentDistribution,
-      averageSentiment: parseFloat(avgSentimentOverall.toFixed(2))
+      averageSentiment: parseFloat(avgSentimentOverall.toFixed(2)),
+      analytics: combineAnalytics(recentAnalytics.map(job => job.analytics))
     };
     
     // Add quick stats
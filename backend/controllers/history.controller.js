@@ -1,5 +1,8 @@
 const { logger } = require('../utils/logger');
 const ProcessingJob = require('../models/ProcessingJob');
+const ResultChunk = require('../models/ResultChunk');
+const ResultPosting = require('../models/ResultPosting');
+const PythonIntegrationService = require('../services/python-integration.service');
 
 // Helper to build query
 const buildSearchQuery = (userId, searchTerm) => {
@@ -104,7 +107,7 @@ const getHistoryById = async (req, res) => {
     const job = await ProcessingJob.findOne({
       _id: id,
       userId
-    }).select('filename originalFilename status totalLines averageSentiment processingTimeMs createdAt startedAt completedAt failedAt errorMessage fileSize results sentimentDistribution');
+    }).select('filename originalFilename status totalLines averageSentiment processingTimeMs createdAt startedAt completedAt failedAt errorMessage fileSize results resultChunks sentimentDistribution topKeywords topNgrams analytics modelVersion');
 
     if (!job) {
       return res.status(404).json({
@@ -113,17 +116,40 @@ const getHistoryById = async (req, res) => {
       });
     }
 
-    // Calculate detailed results
+    // Calculate detailed results (streamed, so chunked jobs never load every line at once)
     let detailedResults = null;
-    if (job.results && job.results.length > 0) {
-      // Get top keywords from all results
-      const allKeywords = job.results.flatMap(result => result.keywords || []);
-      const keywordCounts = {};
-      allKeywords.forEach(keyword => {
-        if (keyword && keyword.trim()) {
-          keywordCounts[keyword] = (keywordCounts[keyword] || 0) + 1;
+    if (job.analytics || (job.topKeywords && job.topKeywords.length > 0)) {
+      // Aggregated by the Python engine while it processed; only the first line is needed
+      const [firstResult] = await ResultChunk.readLines(job, 1, 1);
+
+      detailedResults = {
+        sentimentBreakdown: job.sentimentDistribution || { positive: 0, neutral: 0, negative: 0 },
+        topKeywords: (job.topKeywords || []).slice(0, 5).map(keyword => keyword.term),
+        topNgrams: (job.topNgrams || []).slice(0, 5).map(ngram => ngram.term),
+        analytics: job.analytics || null,
+        patternsFound: firstResult?.patternsFound || [],
+        processingStats: {
+          parallelWorkers: firstResult?.metadata?.processId ? 'Python ML Workers' : 'Simulation',
+          totalResults: job.resultChunks?.storedLines ?? job.totalLines ?? 0,
+          processingTime: job.processingTimeMs ? `${(job.processingTimeMs / 1000).toFixed(2)}s` : 'N/A'
         }
-      });
+      };
+    } else if (job.resultChunks?.collection || (job.results && job.results.length > 0)) {
+      const keywordCounts = {};
+      const patterns = new Set();
+      let totalResults = 0;
+      let firstResult = null;
+
+      for await (const result of ResultChunk.eachLine(job)) {
+        firstResult = firstResult || result;
+        totalResults++;
+        (result.keywords || []).forEach(keyword => {
+          if (keyword && keyword.trim()) {
+            keywordCounts[keyword] = (keywordCounts[keyword] || 0) + 1;
+          }
+        });
+        (result.patternsFound || []).forEach(pattern => patterns.add(pattern));
+      }
 
       // Get top 5 keywords
       const topKeywords = Object.entries(keywordCounts)
@@ -131,16 +157,13 @@ const getHistoryById = async (req, res) => {
         .slice(0, 5)
         .map(entry => entry[0]);
 
-      // Get patterns found
-      const allPatterns = [...new Set(job.results.flatMap(result => result.patternsFound || []))];
-
       detailedResults = {
         sentimentBreakdown: job.sentimentDistribution || { positive: 0, neutral: 0, negative: 0 },
         topKeywords,
-        patternsFound: allPatterns,
+        patternsFound: [...patterns],
         processingStats: {
-          parallelWorkers: job.results[0]?.metadata?.processId ? 'Python ML Workers' : 'Simulation',
-          totalResults: job.results.length,
+          parallelWorkers: firstResult?.metadata?.processId ? 'Python ML Workers' : 'Simulation',
+          totalResults,
           processingTime: job.processingTimeMs ? `${(job.processingTimeMs / 1000).toFixed(2)}s` : 'N/A'
         }
       };
@@ -157,6 +180,7 @@ const getHistoryById = async (req, res) => {
         linesProcessed: job.totalLines || 0,
         sentimentScore: job.averageSentiment,
         processingTime: job.processingTimeMs ? (job.processingTimeMs / 1000).toFixed(2) : null,
+        modelVersion: job.modelVersion || null,
         fileSize: job.fileSize ? `${(job.fileSize / (1024 * 1024)).toFixed(1)} MB` : 'N/A',
         error: job.errorMessage,
         detailedResults
@@ -203,6 +227,9 @@ const deleteHistory = async (req, res) => {
       });
     }
 
+    await ResultChunk.deleteMany({ jobId: id });
+    await ResultPosting.deleteMany({ jobId: id });
+
     logger.info(`History record deleted: ${id}`);
 
     res.json({
@@ -240,7 +267,7 @@ const exportHistory = async (req, res) => {
     const job = await ProcessingJob.findOne({
       _id: id,
       userId
-    }).select('filename originalFilename status totalLines averageSentiment processingTimeMs createdAt completedAt fileSize results');
+    }).select('filename originalFilename status totalLines averageSentiment processingTimeMs createdAt completedAt fileSize results resultChunks');
 
     if (!job) {
       return res.status(404).json({
@@ -249,18 +276,23 @@ const exportHistory = async (req, res) => {
       });
     }
 
-    // Generate CSV content
-    let csvData = 'Line Number,Original Text,Sentiment Score,Sentiment Label,Keywords\n';
+    // Set proper headers for file download
+    res.setHeader('Content-Type', 'text/csv');
+    res.setHeader('Content-Disposition', `attachment; filename="export_${job.originalFilename.replace(/\.[^/.]+$/, "")}_${Date.now()}.csv"`);
+    res.setHeader('Cache-Control', 'no-cache');
+
+    // Stream CSV rows as they are read instead of building one big string
+    res.write('Line Number,Original Text,Sentiment Score,Sentiment Label,Keywords\n');
 
-    if (job.results && job.results.length > 0) {
-      job.results.forEach(result => {
-        const line = `"${result.lineNumber}","${(result.originalText || '').replace(/"/g, '""')}","${result.sentimentScore !== undefined && result.sentimentScore !== null ? result.sentimentScore : ''}","${result.sentimentLabel || ''}","${(result.keywords || []).join(', ')}"\n`;
-        csvData += line;
-      });
+    for await (const result of ResultChunk.eachLine(job)) {
+      const line = `"${result.lineNumber}","${(result.originalText || '').replace(/"/g, '""')}","${result.sentimentScore !== undefined && result.sentimentScore !== null ? result.sentimentScore : ''}","${result.sentimentLabel || ''}","${(result.keywords || []).join(', ')}"\n`;
+      if (!res.write(line)) {
+        await new Promise(resolve => res.once('drain', resolve));
+      }
     }
 
     // Add summary at the end
-    csvData += `\n\nSUMMARY\n`;
+    let csvData = `\n\nSUMMARY\n`;
     csvData += `Filename,${job.originalFilename}\n`;
     csvData += `Status,${job.status}\n`;
     csvData += `Total Lines,${job.totalLines || 0}\n`;
@@ -268,14 +300,12 @@ const exportHistory = async (req, res) => {
     csvData += `Processing Time,${job.processingTimeMs ? (job.processingTimeMs / 1000).toFixed(2) + 's' : 'N/A'}\n`;
     csvData += `Processed At,${job.completedAt || job.createdAt}\n`;
 
-    // Set proper headers for file download
-    res.setHeader('Content-Type', 'text/csv');
-    res.setHeader('Content-Disposition', `attachment; filename="export_${job.originalFilename.replace(/\.[^/.]+$/, "")}_${Date.now()}.csv"`);
-    res.setHeader('Cache-Control', 'no-cache');
-
-    res.send(csvData);
+    res.end(csvData);
   } catch (error) {
     logger.error('Export history error:', error);
+    if (res.headersSent) {
+      return res.end();
+    }
     res.status(500).json({
       success: false,
       message: 'Failed to export history'
@@ -366,10 +396,55 @@ const searchHistory = async (req, res) => {
 };
 
 // EXPORT ALL FUNCTIONS
+/**
+ * Search result lines across the user's jobs, e.g. negative lines mentioning "battery" in the last 30 days:
+ * GET /api/history/search/lines?q=battery&label=negative&days=30
+ */
+const searchLines = async (req, res) => {
+  try {
+    const { userId } = req.user;
+    const { q, match, label, minConfidence, days, startDate, endDate, jobId, page = 1, limit = 20 } = req.query;
+
+    if (!q || !q.trim()) {
+      return res.status(400).json({
+        success: false,
+        message: 'Search query (q) is required'
+      });
+    }
+
+    const result = await PythonIntegrationService.searchLines({
+      q, match, label, minConfidence, days, jobId, page, limit,
+      userId: userId.toString(),
+      since: startDate ? new Date(startDate).toISOString() : undefined,
+      until: endDate ? new Date(endDate).toISOString() : undefined
+    });
+
+    if (!result.success) {
+      return res.status(result.status === 400 ? 400 : 502).json({
+        success: false,
+        message: result.error
+      });
+    }
+
+    const { results, terms, pagination, tookMs } = result.data;
+    res.json({
+      success: true,
+      data: { results, terms, query: q, pagination, tookMs }
+    });
+  } catch (error) {
+    logger.error('Line search error:', error);
+    res.status(500).json({
+      success: false,
+      message: 'Failed to search result lines'
+    });
+  }
+};
+
 module.exports = {
   getHistory,
   getHistoryById,
   deleteHistory,
   exportHistory,
-  searchHistory
+  searchHistory,
+  searchLines
 };
\ No newline at end of file
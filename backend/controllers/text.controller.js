@@ -4,6 +4,7 @@ const { logger } = require('../utils/logger');
 const emailService = require('../services/email.service');
 const config = require('../config/config');
 const ProcessingJob = require('../models/ProcessingJob');
+const ResultChunk = require('../models/ResultChunk');
 const PythonIntegrationService = require('../services/python-integration.service');
 // Remove or comment out the Map:
 // const processingJobs = new Map();
@@ -25,12 +26,31 @@ const processJobInBackground = async (jobId, filePath, userId, userEmail) => {
     // Option 1: Use Python API
     if (config.processing.usePythonApi) {
       try {
-        const pythonResult = await PythonIntegrationService.processFileWithPython(
-          filePath,
-          jobId,
-          userId,
-          process.env.MONGO_URI
-        );
+        // Parquet is binary: Python must read it from disk (shared uploads) or from a stream, never JSON
+        const isBinaryInput = path.extname(filePath).toLowerCase() === '.parquet';
+        const { sharedUploads } = config.pythonApi;
+
+        if (config.pythonApi.asyncJobs && (sharedUploads || !isBinaryInput)) {
+          // Python queues the job and writes progress/results to MongoDB itself
+          const queued = await PythonIntegrationService.submitFileJobToPython(filePath, jobId, userId);
+          if (!queued.success) {
+            throw new Error(`Python API failed: ${queued.error}`);
+          }
+          logger.info(`Job ${jobId} queued in Python (status: ${queued.data.job?.status})`);
+          await fs.unlink(filePath).catch(() => {});
+          return;
+        }
+
+        // The stream endpoint parses CSV/JSONL/Parquet itself, reading only the text column
+        const useStream = !sharedUploads && (config.pythonApi.streaming || isBinaryInput);
+        const pythonResult = useStream
+          ? await PythonIntegrationService.processFileStreamWithPython(filePath, jobId, userId)
+          : await PythonIntegrationService.processFileWithPython(
+            filePath,
+            jobId,
+            userId,
+            process.env.MONGO_URI
+          );
         
         if (pythonResult.success) {
           logger.info(`Python processing completed for job ${jobId}`);
@@ -404,12 +424,14 @@ const getResults = async (req, res) => {
   try {
     const { jobId } = req.params;
     const { userId } = req.user;
+    const start = Math.max(1, parseInt(req.query.start) || 1);
+    const limit = Math.min(Math.max(1, parseInt(req.query.limit) || 1000), 5000);
     
     // Find job with results in MongoDB
     const job = await ProcessingJob.findOne({
       _id: jobId,
       userId
-    }).select('filename originalFilename status results totalLines processingTimeMs averageSentiment sentimentDistribution createdAt completedAt');
+    }).select('filename originalFilename status results resultChunks totalLines processingTimeMs averageSentiment sentimentDistribution createdAt completedAt');
     
     if (!job) {
       return res.status(404).json({
@@ -431,7 +453,8 @@ const getResults = async (req, res) => {
         jobId: job._id,
         filename: job.originalFilename,
         status: job.status,
-        results: job.results,
+        results: await ResultChunk.readLines(job, start, limit),
+        pagination: { start, limit, total: job.totalLines || 0 },
         statistics: {
           totalLines: job.totalLines,
           processingTimeMs: job.processingTimeMs,
@@ -482,6 +505,9 @@ const cancelJob = async (req, res) => {
         message: 'Job not found or cannot be cancelled'
       });
     }
+
+    // Stop an async Python job early; it also sees the 'cancelled' status on its next write
+    PythonIntegrationService.cancelPythonJob(jobId);
     
     res.json({
       success: true,
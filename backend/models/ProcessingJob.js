@@ -54,14 +54,31 @@ const ProcessingJobSchema = new mongoose.Schema({
   totalLines: Number,
   processingTimeMs: Number,
   workersUsed: Number,
+  processingMode: mongoose.Schema.Types.Mixed, // { mode, workers, chunkSize, estimatedMs, reason }
+  modelVersion: String, // Registry version the job was scored with (pinned at job start)
   averageSentiment: Number,
   sentimentDistribution: {
     positive: Number,
     neutral: Number,
     negative: Number
   },
+  // Summed TF-IDF keyword weights over the job, computed by the Python engine: [{ term, weight }]
+  topKeywords: [mongoose.Schema.Types.Mixed],
+  topNgrams: [mongoose.Schema.Types.Mixed],
+  // Single-pass aggregates from the Python engine (model/job_analytics.py): confidence histogram,
+  // per-label confidence, sentiment by line position, keywords per label, low-confidence/error counts
+  analytics: mongoose.Schema.Types.Mixed,
   
-  // Results (embedded documents)
+  // Chunk index for results stored in the processingresults collection
+  resultChunks: {
+    collection: String,
+    chunkSize: Number,
+    maxChunkBytes: Number,
+    chunkCount: Number,
+    storedLines: Number
+  },
+
+  // Results (embedded documents, older jobs only)
   results: [{
     lineNumber: Number,
     originalText: String,
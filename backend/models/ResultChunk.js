@@ -0,0 +1,58 @@
+const mongoose = require('mongoose');
+
+// Result lines written by the Python engine in fixed-size chunks
+// (see model/result_store.py). Job documents only keep `resultChunks`.
+const ResultChunkSchema = new mongoose.Schema({
+  jobId: {
+    type: mongoose.Schema.Types.ObjectId,
+    ref: 'ProcessingJob',
+    required: true
+  },
+  chunkIndex: Number,
+  startLine: Number,
+  endLine: Number,
+  lines: [mongoose.Schema.Types.Mixed],
+  createdAt: Date
+}, {
+  collection: 'processingresults'
+});
+
+ResultChunkSchema.index({ jobId: 1, startLine: 1 }, { unique: true });
+
+/**
+ * Lines [start, start + limit) of a job, falling back to embedded results for older jobs
+ */
+ResultChunkSchema.statics.readLines = async function (job, start = 1, limit = 1000) {
+  const end = start + limit - 1;
+
+  if (!job.resultChunks?.collection) {
+    return (job.results || []).slice(start - 1, end);
+  }
+
+  const chunks = await this.find({
+    jobId: job._id,
+    startLine: { $lte: end },
+    endLine: { $gte: start }
+  }).select('lines').sort({ startLine: 1 }).lean();
+
+  return chunks
+    .flatMap(chunk => chunk.lines)
+    .filter(line => line.lineNumber >= start && line.lineNumber <= end);
+};
+
+/**
+ * Iterate over every result line of a job without loading them all at once
+ */
+ResultChunkSchema.statics.eachLine = async function* (job) {
+  if (!job.resultChunks?.collection) {
+    yield* (job.results || []);
+    return;
+  }
+
+  const cursor = this.find({ jobId: job._id }).select('lines').sort({ startLine: 1 }).lean().cursor();
+  for await (const chunk of cursor) {
+    yield* chunk.lines;
+  }
+};
+
+module.exports = mongoose.model('ResultChunk', ResultChunkSchema);
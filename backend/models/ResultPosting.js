@@ -0,0 +1,24 @@
+const mongoose = require('mongoose');
+
+// Line postings written by the Python engine alongside result chunks (see model/postings.py):
+// one document per (term, result chunk) with the matching line numbers, label codes and confidences.
+// Queried through the Python /search/lines endpoint; Node only needs it to clean up deleted jobs.
+const ResultPostingSchema = new mongoose.Schema({
+  term: { type: String, required: true },
+  jobId: {
+    type: mongoose.Schema.Types.ObjectId,
+    ref: 'ProcessingJob',
+    required: true
+  },
+  startLine: Number,
+  lines: [Number],
+  labels: [Number],
+  confidences: [Number]
+}, {
+  collection: 'resultpostings'
+});
+
+ResultPostingSchema.index({ term: 1, jobId: 1, startLine: 1 });
+ResultPostingSchema.index({ jobId: 1 });
+
+module.exports = mongoose.model('ResultPosting', ResultPostingSchema);
@@ -7,6 +7,11 @@ const historyController = require('../controllers/history.controller');
 // @access  Private
 router.get('/search', historyController.searchHistory);
 
+// @route   GET /api/history/search/lines
+// @desc    Search result lines across jobs (terms, label, confidence, date range)
+// @access  Private
+router.get('/search/lines', historyController.searchLines);
+
 // @route   GET /api/history/export/:id
 // @desc    Export history as CSV
 // @access  Private
@@ -1,14 +1,109 @@
 // services/python-integration.service.js
 const fs = require('fs').promises;  // Add at top
+const { createReadStream } = require('fs');
+const readline = require('readline');
 const path = require('path');
 const axios = require('axios');
 const { logger } = require('../utils/logger');
 const config = require('../config/config');
 
+let msgpack = null;
+try {
+  msgpack = require('@msgpack/msgpack'); // Optional: only for PYTHON_API_RESPONSE_ENCODING=msgpack
+} catch (error) {
+  msgpack = null;
+}
+
+/**
+ * Rebuild the row shape ({ lineNumber, originalText, ..., metadata }) from
+ * a columnar /process-content result (see model/response_format.py)
+ */
+const decodeColumnar = (columnar) => {
+  const { columns, constants = {}, labels = [], fields = [] } = columnar;
+  const has = (field) => fields.includes(field);
+  const rows = new Array(columnar.length);
+
+  for (let i = 0; i < columnar.length; i++) {
+    const row = { lineNumber: columnar.startLine + i };
+    if (has('originalText')) row.originalText = columns.originalText[i];
+    if (has('sentimentScore')) row.sentimentScore = columns.sentimentScore[i];
+    if (has('sentimentLabel')) row.sentimentLabel = labels[columns.sentimentLabel[i]];
+    if (has('keywords')) row.keywords = columns.keywords[i];
+    row.patternsFound = constants.patternsFound;
+    row.metadata = { processId: constants.processId, modelVersion: constants.modelVersion };
+    if (has('confidence')) row.metadata.confidence = columns.confidence[i];
+    if (has('cleanedText')) row.metadata.cleanedText = columns.cleanedText[i];
+    if (has('modelVersion')) row.metadata.modelVersion = columns.modelVersion[i];
+    rows[i] = row;
+  }
+  return rows;
+};
+
 class PythonIntegrationService {
   constructor() {
     this.pythonApiBaseUrl = config.pythonApi.url || 'http://localhost:8000';
     this.timeout = config.pythonApi.timeout || 300000; // 5 minutes for large files
+    this.retries = config.pythonApi.retries || 0;
+  }
+
+  /**
+   * axios.post that retries when Python's admission control answers 429/503 (honouring Retry-After)
+   */
+  async postWithRetry(url, data, options) {
+    for (let attempt = 0; ; attempt++) {
+      try {
+        return await axios.post(url, data, options);
+      } catch (error) {
+        const status = error.response?.status;
+        if ((status !== 429 && status !== 503) || attempt >= this.retries) throw error;
+        const waitSeconds = parseInt(error.response.headers?.['retry-after']) || 2 ** attempt;
+        logger.warn(`Python API busy (${status}); retrying in ${waitSeconds}s (${attempt + 1}/${this.retries})`);
+        await new Promise(resolve => setTimeout(resolve, waitSeconds * 1000));
+      }
+    }
+  }
+
+  /**
+   * Payload fields and axios options for the configured /process-content response shape
+   */
+  responseOptions() {
+    const { responseFormat, responseFields, responseEncoding } = config.pythonApi;
+    const useMsgpack = responseEncoding === 'msgpack' && msgpack !== null;
+    if (responseEncoding === 'msgpack' && !useMsgpack) {
+      logger.warn('PYTHON_API_RESPONSE_ENCODING=msgpack but @msgpack/msgpack is not installed; using JSON');
+    }
+
+    const payload = {};
+    if (responseFormat === 'columnar') {
+      payload.responseFormat = 'columnar';
+      if (responseFields) payload.fields = responseFields;
+    }
+    if (useMsgpack) payload.encoding = 'msgpack';
+    else if (responseEncoding === 'gzip') payload.encoding = 'gzip';
+
+    // gzip bodies are inflated by axios itself; msgpack needs the raw bytes
+    const axiosOptions = useMsgpack ? { responseType: 'arraybuffer' } : {};
+
+    // Budgeted (bounded-memory) jobs answer with plain JSON rows only
+    if (config.pythonApi.memoryBudgetMb > 0 && !payload.responseFormat && !payload.encoding) {
+      axiosOptions.params = { memoryBudgetMb: config.pythonApi.memoryBudgetMb };
+    }
+    return { payload, axiosOptions };
+  }
+
+  /**
+   * Decode a /process-content response into the usual { processingResult: { results: [rows] } }
+   */
+  decodeProcessResponse(response) {
+    let data = response.data;
+    if (String(response.headers?.['content-type'] || '').includes('application/msgpack')) {
+      data = msgpack.decode(new Uint8Array(data));
+    }
+    const results = data?.processingResult?.results;
+    if (results && results.format === 'columnar') {
+      data.processingResult.results = decodeColumnar(results);
+    }
+    return data;
   }
 
   /**
@@ -17,33 +112,47 @@ class PythonIntegrationService {
   async processFileWithPython(filePath, jobId, userId, mongoUri) {
     try {
       logger.info(`Calling Python API for job ${jobId}, file: ${filePath}`);
+
+      if (config.pythonApi.sharedUploads) {
+        // Python reads the upload straight from disk; no file content crosses the wire
+        const response = await this.postWithRetry(
+          `${this.pythonApiBaseUrl}/process-file`,
+          { path: path.resolve(filePath), filename: path.basename(filePath), jobId, userId },
+          { timeout: this.timeout, headers: { 'Content-Type': 'application/json' } }
+        );
+        return { success: true, data: response.data };
+      }
+
       const fileContent = await fs.readFile(filePath, 'utf-8');
 
       logger.info(`Sending file content to Python for job ${jobId}`);
       logger.info(`Content length: ${fileContent.length} characters`);
 
+      const { payload: responsePayload, axiosOptions } = this.responseOptions();
       const payload = {
         content: fileContent,      // ← Send the ACTUAL text
         filename: path.basename(filePath),
         jobId: jobId,
         userId: userId,
-        mongoUri: mongoUri || process.env.MONGO_URI
+        mongoUri: mongoUri || process.env.MONGO_URI,
+        ...responsePayload
       };
 
-      const response = await axios.post(
+      const response = await this.postWithRetry(
         `${this.pythonApiBaseUrl}/process-content`,
         payload,
         {
           timeout: this.timeout,
           headers: {
             'Content-Type': 'application/json'
-          }
+          },
+          ...axiosOptions
         }
       );
 
       return {
         success: true,
-        data: response.data
+        data: this.decodeProcessResponse(response)
       };
     } catch (error) {
       logger.error('Python API call failed:', { error: error.message });
@@ -73,6 +182,121 @@ class PythonIntegrationService {
     }
   }
 
+  /**
+   * Stream a file to Python's /process-stream endpoint and consume the NDJSON
+   * response chunk by chunk. onChunk(event) is called for every scored chunk;
+   * the resolved data mirrors processFileWithPython's ({ processingResult }).
+   */
+  async processFileStreamWithPython(filePath, jobId, userId, onChunk = null) {
+    try {
+      logger.info(`Streaming file to Python API for job ${jobId}, file: ${filePath}`);
+
+      const response = await axios.post(
+        `${this.pythonApiBaseUrl}/process-stream`,
+        createReadStream(filePath),
+        {
+          params: { jobId, userId, filename: path.basename(filePath) },
+          timeout: 0, // Progress arrives incrementally; no whole-job deadline
+          responseType: 'stream',
+          maxBodyLength: Infinity,
+          headers: {
+            'Content-Type': 'application/octet-stream'
+          }
+        }
+      );
+
+      const lines = readline.createInterface({ input: response.data, crlfDelay: Infinity });
+      let summary = null;
+      let linesReceived = 0;
+
+      for await (const line of lines) {
+        if (!line.trim()) continue;
+        const event = JSON.parse(line);
+
+        if (event.type === 'chunk') {
+          linesReceived += event.results.length;
+          if (onChunk) await onChunk(event);
+        } else if (event.type === 'summary') {
+          summary = event;
+        } else if (event.type === 'error') {
+          throw new Error(event.error);
+        }
+      }
+
+      if (!summary) {
+        throw new Error(`Python stream ended without a summary after ${linesReceived} lines`);
+      }
+
+      return {
+        success: true,
+        data: { success: true, jobId, processingResult: summary }
+      };
+    } catch (error) {
+      logger.error('Python stream call failed:', { error: error.message });
+
+      return {
+        success: false,
+        error: error.response ? 'Python API rejected the stream' : error.message,
+        details: {}
+      };
+    }
+  }
+
+  /**
+   * Submit a file as an async Python job. Returns as soon as the job is queued;
+   * progress, partial sentiment and the final results are written to MongoDB.
+   */
+  async submitFileJobToPython(filePath, jobId, userId) {
+    try {
+      // With shared uploads Python opens the file itself before replying, so it may be deleted afterwards
+      const payload = config.pythonApi.sharedUploads
+        ? { path: path.resolve(filePath) }
+        : { content: await fs.readFile(filePath, 'utf-8') };
+
+      const response = await this.postWithRetry(
+        `${this.pythonApiBaseUrl}${config.pythonApi.sharedUploads ? '/process-file' : '/process-content'}`,
+        {
+          ...payload,
+          filename: path.basename(filePath),
+          jobId: jobId,
+          userId: userId,
+          async: true
+        },
+        {
+          timeout: 30000,
+          headers: {
+            'Content-Type': 'application/json'
+          }
+        }
+      );
+
+      return {
+        success: true,
+        data: response.data
+      };
+    } catch (error) {
+      logger.error('Python job submission failed:', { error: error.message });
+
+      return {
+        success: false,
+        error: error.response?.data?.error || error.message,
+        details: error.response?.data || {}
+      };
+    }
+  }
+
+  /**
+   * Cancel a queued/running async Python job
+   */
+  async cancelPythonJob(jobId) {
+    try {
+      const response = await axios.post(`${this.pythonApiBaseUrl}/jobs/${jobId}/cancel`, {}, { timeout: 5000 });
+      return { success: true, data: response.data };
+    } catch (error) {
+      return { success: false, error: error.message };
+    }
+  }
+
   /**
  * Call Python API to process direct text (not file)
  */
@@ -80,28 +304,31 @@ class PythonIntegrationService {
     try {
       logger.info(`Calling Python API for direct text processing, job ${jobId}, text length: ${text.length}`);
 
+      const { payload: responsePayload, axiosOptions } = this.responseOptions();
       const payload = {
         content: text,
         filename: 'direct_text_input.txt',
         jobId: jobId,
         userId: userId,
-        mongoUri: mongoUri || process.env.MONGO_URI
+        mongoUri: mongoUri || process.env.MONGO_URI,
+        ...responsePayload
       };
 
-      const response = await axios.post(
+      const response = await this.postWithRetry(
         `${this.pythonApiBaseUrl}/process-content`,
         payload,
         {
           timeout: this.timeout,
           headers: {
             'Content-Type': 'application/json'
-          }
+          },
+          ...axiosOptions
         }
       );
 
       return {
         success: true,
-        data: response.data
+        data: this.decodeProcessResponse(response)
       };
     } catch (error) {
       logger.error('Python API call failed for direct text:', { error: error.message });
@@ -174,6 +401,53 @@ class PythonIntegrationService {
     }
   }
 
+  /**
+   * Analyze a small list of texts in one call (scored in shared micro-batches on the Python side)
+   */
+  async analyzeTexts(texts) {
+    try {
+      const response = await axios.post(
+        `${this.pythonApiBaseUrl}/analyze-batch`,
+        { texts },
+        { timeout: 10000 }
+      );
+
+      return {
+        success: true,
+        results: response.data.results
+      };
+    } catch (error) {
+      return {
+        success: false,
+        error: error.response?.data?.error || error.message
+      };
+    }
+  }
+
+  /**
+   * Search result lines across jobs through the Python line index
+   * params: { q, match, label, minConfidence, userId, since, until, days, jobId, page, limit }
+   */
+  async searchLines(params) {
+    try {
+      const response = await axios.get(`${this.pythonApiBaseUrl}/search/lines`, {
+        params,
+        timeout: 10000
+      });
+
+      return {
+        success: true,
+        data: response.data
+      };
+    } catch (error) {
+      return {
+        success: false,
+        status: error.response?.status,
+        error: error.response?.data?.error || error.message
+      };
+    }
+  }
+
   /**
    * Test MongoDB connection through Python API
    */
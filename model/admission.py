@@ -0,0 +1,191 @@
+# admission.py
+"""Memory-budgeted admission control for processing requests.
+
+Each request reserves its estimated peak memory before it starts. It is
+admitted when live usage plus outstanding reservations plus its estimate
+fits the budget; otherwise it waits (up to wait_seconds, at most
+max_waiting requests at a time) and is then rejected. Reservations live in
+shared memory, so with a preloaded multi-worker server every serving worker
+sees the same totals (create the controller before forking, like Metrics).
+
+Live usage counts reserved jobs twice once they have allocated, so the
+check errs on the side of rejecting.
+"""
+import multiprocessing as mp
+import os
+import time
+
+MB = 1024 * 1024
+ROW_BYTES = 1600  # Measured: one scored + formatted result line held in memory
+CONTENT_FACTOR = 32  # Measured: sync /process-content peak RSS per byte of request body
+POLL_SECONDS = 0.05
+
+
+class AdmissionRejected(RuntimeError):
+    """status is the HTTP status to answer with; retry_after is in seconds."""
+
+    def __init__(self, message, status, retry_after=5):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+def _read_int(path):
+    try:
+        with open(path) as f:
+            value = f.read().strip()
+        return None if value == 'max' else int(value)
+    except (OSError, ValueError):
+        return None
+
+
+def _meminfo_mb():
+    """(total, available) from /proc/meminfo, or (None, None) off Linux."""
+    try:
+        with open('/proc/meminfo') as f:
+            fields = {line.split(':')[0]: int(line.split()[1]) for line in f}
+        return fields['MemTotal'] / 1024, fields.get('MemAvailable', fields['MemFree']) / 1024
+    except (OSError, KeyError, ValueError, IndexError):
+        return None, None
+
+
+def current_rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / MB
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _memory_stat(path, key):
+    """One counter (bytes) from a cgroup memory.stat file, or 0."""
+    try:
+        with open(path) as f:
+            for line in f:
+                name, _, value = line.partition(' ')
+                if name == key: return int(value)
+    except (OSError, ValueError):
+        pass
+    return 0
+
+
+# (usage file, memory.stat file, reclaimable page cache counter) for cgroup v2, then v1
+CGROUP_MEMORY = (
+    ('/sys/fs/cgroup/memory.current', '/sys/fs/cgroup/memory.stat', 'inactive_file'),
+    ('/sys/fs/cgroup/memory/memory.usage_in_bytes', '/sys/fs/cgroup/memory/memory.stat', 'total_inactive_file'),
+)
+
+
+def used_memory_mb():
+    """Live usage of the container (cgroup), else of the machine, else of this process.
+
+    The cgroup figure includes page cache; inactive file pages (files read,
+    mmapped ingest) are reclaimable, so they are subtracted like the kernel
+    and `docker stats` do.
+    """
+    for usage_path, stat_path, reclaimable in CGROUP_MEMORY:
+        used = _read_int(usage_path)
+        if used is not None: return max(0, used - _memory_stat(stat_path, reclaimable)) / MB
+    total, available = _meminfo_mb()
+    if total is not None: return total - available
+    return current_rss_mb()
+
+
+def memory_limit_mb(probed_mb):
+    """The probed limit (cgroup / physical), capped by physical RAM when the cgroup is unlimited."""
+    total, _ = _meminfo_mb()
+    return min(probed_mb, total) if total else probed_mb
+
+
+def estimate_content_mb(n_bytes, factor=CONTENT_FACTOR):
+    """Whole-body jobs (sync /process-content) keep every result line until they respond."""
+    return n_bytes * factor / MB
+
+
+def estimate_stream_mb(chunk_size, window, n_bytes=0):
+    """Chunked jobs hold one window of chunks in flight (plus the body, if it was read whole)."""
+    return (chunk_size * max(1, window) * ROW_BYTES * 2 + n_bytes * 4) / MB
+
+
+class Reservation:
+    def __init__(self, controller, mb):
+        self.controller = controller
+        self.mb = mb
+
+    def release(self):
+        if self.mb:
+            self.controller._adjust(-self.mb)
+            self.mb = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
+
+
+class AdmissionController:
+    def __init__(self, budget_mb, max_waiting=8, wait_seconds=10.0):
+        self.budget_mb = budget_mb
+        self.max_waiting = max_waiting
+        self.wait_seconds = wait_seconds
+        self._reserved = mp.Value('d', 0.0)
+        self._waiting = mp.Value('i', 0)
+        self._rejected = mp.Value('i', 0)
+
+    def _adjust(self, mb):
+        with self._reserved.get_lock():
+            self._reserved.value = max(0.0, self._reserved.value + mb)
+
+    def _try_reserve(self, mb):
+        with self._reserved.get_lock():
+            if used_memory_mb() + self._reserved.value + mb > self.budget_mb: return False
+            self._reserved.value += mb
+            return True
+
+    def _reject(self, message, status, retry_after=5):
+        with self._rejected.get_lock():
+            self._rejected.value += 1
+        raise AdmissionRejected(message, status, retry_after)
+
+    def acquire(self, mb, wait=True):
+        """Reservation for `mb`, waiting for memory if allowed; raises AdmissionRejected."""
+        if mb > self.budget_mb:
+            self._reject(f'Estimated {mb:.0f}MB exceeds the {self.budget_mb:.0f}MB memory budget', 503, 60)
+        if self._try_reserve(mb): return Reservation(self, mb)
+        if not wait:
+            self._reject(f'Not enough memory for this job now ({mb:.0f}MB needed)', 503)
+
+        with self._waiting.get_lock():
+            if self._waiting.value >= self.max_waiting: full = True
+            else: full, self._waiting.value = False, self._waiting.value + 1
+        if full:
+            self._reject(f'Too many requests waiting for memory ({self.max_waiting})', 429)
+        try:
+            deadline = time.monotonic() + self.wait_seconds
+            while time.monotonic() < deadline:
+                time.sleep(POLL_SECONDS)
+                if self._try_reserve(mb): return Reservation(self, mb)
+        finally:
+            with self._waiting.get_lock():
+                self._waiting.value -= 1
+        self._reject(f'Timed out after {self.wait_seconds:g}s waiting for {mb:.0f}MB of memory', 503)
+
+    @property
+    def waiting(self):
+        return self._waiting.value
+
+    def stats(self):
+        used = used_memory_mb()
+        return {
+            'budgetMb': round(self.budget_mb, 1),
+            'usedMb': round(used, 1),
+            'reservedMb': round(self._reserved.value, 1),
+            'headroomMb': round(self.budget_mb - used - self._reserved.value, 1),
+            'rssMb': round(current_rss_mb(), 1),
+            'waiting': self._waiting.value,
+            'maxWaiting': self.max_waiting,
+            'rejected': self._rejected.value
+        }
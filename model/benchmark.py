@@ -0,0 +1,240 @@
+# benchmark.py
+"""Throughput / latency / memory benchmark for the sentiment pipeline.
+
+Each (corpus size, mode) pair runs in a fresh interpreter so startup time and
+peak RSS are measured per engine. Corpora come from
+create_training_data.generate_lines and are consumed lazily, chunk by chunk,
+so multi-million-line runs stay flat in memory.
+
+    python benchmark.py --lines 1000,100000 --modes sequential,parallel
+    python benchmark.py --lines 5000000 --duplication 0.3 --output bench.json
+    python benchmark.py --baseline bench_baseline.json --threshold 0.10
+
+With --baseline the run exits 1 when any mode's lines/sec falls more than
+--threshold below the baseline. Baselines recorded with a different
+create_training_data.CORPUS_VERSION are refused: regenerate them.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+_PROCESS_START = time.perf_counter()
+
+MODES = ('sequential', 'threaded', 'parallel', 'smart', 'stream')
+
+
+def percentile(values, pct):
+    if not values: return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(who).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+class TimedChunks:
+    """Groups generated lines into chunks, keeping generation time out of the measurement."""
+
+    def __init__(self, lines, chunk_size):
+        self.lines = lines
+        self.chunk_size = chunk_size
+        self.generation_s = 0.0
+
+    def __iter__(self):
+        while True:
+            start = time.perf_counter()
+            chunk = [line for _, line in zip(range(self.chunk_size), self.lines)]
+            self.generation_s += time.perf_counter() - start
+            if not chunk: return
+            yield chunk
+
+
+def run_mode(mode, args):
+    """Child process: load the engine, push the corpus through it, report metrics."""
+    import sentiment_api as api
+    from create_training_data import generate_lines
+
+    if mode in ('parallel', 'stream', 'smart'):
+        api.init_worker_pool()
+    if mode == 'smart':
+        api.init_scheduler()
+    api.init_resources()
+    startup_ms = (time.perf_counter() - _PROCESS_START) * 1000
+
+    lines = generate_lines(args.lines, args.duplication, args.min_words, args.max_words, args.seed)
+    chunks = TimedChunks(lines, args.chunk_lines)
+    engines = {
+        'sequential': lambda chunk: api.process_texts_sequentially(chunk),
+        'threaded': lambda chunk: api.process_texts_threaded(chunk, api.WORKER_COUNT, api.BATCH_SIZE),
+        'parallel': lambda chunk: api.process_texts_parallel(chunk),
+        'smart': lambda chunk: api.smart_process_texts(chunk)
+    }
+
+    latencies = []
+    total = 0
+    start = time.perf_counter()
+    if mode == 'stream':
+        # Latency per chunk = time between consecutive chunk events
+        last = start
+        for event in api.stream_process_texts(iter(chunks), chunk_size=args.chunk_lines):
+            now = time.perf_counter()
+            if event['type'] == 'chunk':
+                latencies.append((now - last) * 1000)
+                total += len(event['results'])
+            last = now
+    else:
+        engine = engines[mode]
+        for chunk in chunks:
+            chunk_start = time.perf_counter()
+            engine(chunk)
+            latencies.append((time.perf_counter() - chunk_start) * 1000)
+            total += len(chunk)
+    elapsed = time.perf_counter() - start - chunks.generation_s
+
+    if api.worker_pool is not None:
+        api.worker_pool.shutdown()  # Reaped workers show up in RUSAGE_CHILDREN
+    return {
+        'mode': mode,
+        'lines': total,
+        'linesPerSec': round(total / elapsed, 1) if elapsed > 0 else 0.0,
+        'elapsedMs': round(elapsed * 1000, 1),
+        'chunks': len(latencies),
+        'chunkP50Ms': round(percentile(latencies, 50), 2),
+        'chunkP99Ms': round(percentile(latencies, 99), 2),
+        'peakRssMb': peak_rss_mb(),
+        'workerPeakRssMb': peak_rss_mb(resource.RUSAGE_CHILDREN),
+        'startupMs': round(startup_ms, 1),
+        'workers': api.WORKER_COUNT if mode != 'sequential' else 1
+    }
+
+
+def spawn(mode, n_lines, args):
+    """Run one mode in a fresh interpreter and return its metrics."""
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
+        out_path = f.name
+    cmd = [sys.executable, os.path.abspath(__file__), '--run-mode', mode, '--result-file', out_path,
+           '--lines', str(n_lines), '--chunk-lines', str(args.chunk_lines),
+           '--duplication', str(args.duplication), '--min-words', str(args.min_words),
+           '--max-words', str(args.max_words), '--seed', str(args.seed)]
+    env = dict(os.environ, MODEL_FORMAT=args.model_format)
+    if not args.cache:
+        env['PREDICTION_CACHE_MB'] = '0'
+    try:
+        proc = subprocess.run(cmd, cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+                              stdout=None if args.verbose else subprocess.DEVNULL,
+                              stderr=None if args.verbose else subprocess.PIPE, text=True)
+        if proc.returncode != 0:
+            tail = (proc.stderr or '').strip().splitlines()[-1:] or ['see --verbose']
+            return {'mode': mode, 'lines': n_lines, 'error': tail[0]}
+        with open(out_path) as f:
+            return json.load(f)
+    finally:
+        os.unlink(out_path)
+
+
+def compare(results, baseline, threshold):
+    """Names of runs whose throughput dropped more than threshold below the baseline."""
+    regressions = []
+    for key, run in results['runs'].items():
+        base = baseline.get('runs', {}).get(key)
+        if not base or 'linesPerSec' not in base or 'linesPerSec' not in run: continue
+        ratio = run['linesPerSec'] / base['linesPerSec'] if base['linesPerSec'] else 1.0
+        run['baselineRatio'] = round(ratio, 3)
+        if ratio < 1 - threshold:
+            regressions.append(key)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', default='1000,10000,100000', help='Comma-separated corpus sizes')
+    parser.add_argument('--modes', default=','.join(MODES), help=f"Comma-separated subset of {','.join(MODES)}")
+    parser.add_argument('--chunk-lines', type=int, default=10000, help='Lines handed to the engine per call')
+    parser.add_argument('--duplication', type=float, default=0.0, help='Fraction of repeated lines (0-1)')
+    parser.add_argument('--min-words', type=int, default=3)
+    parser.add_argument('--max-words', type=int, default=12)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--model-format', default=os.environ.get('MODEL_FORMAT', 'pickle'), choices=('pickle', 'compact'))
+    parser.add_argument('--cache', action='store_true', help='Keep the prediction cache on (off by default)')
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', help='Earlier results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Allowed lines/sec drop vs the baseline')
+    parser.add_argument('--verbose', action='store_true', help='Show engine output')
+    parser.add_argument('--run-mode', help=argparse.SUPPRESS)
+    parser.add_argument('--result-file', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_mode:
+        args.lines = int(args.lines)
+        result = run_mode(args.run_mode, args)
+        with open(args.result_file, 'w') as f:
+            json.dump(result, f)
+        return 0
+
+    sizes = [int(n) for n in args.lines.split(',') if n.strip()]
+    modes = [m.strip() for m in args.modes.split(',') if m.strip()]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(sorted(unknown))}")
+
+    from create_training_data import CORPUS_VERSION
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        baseline_corpus = baseline.get('config', {}).get('corpusVersion', 1)
+        if baseline_corpus != CORPUS_VERSION:
+            parser.error(f"{args.baseline} was measured on corpus version {baseline_corpus}, this is "
+                         f"version {CORPUS_VERSION}; regenerate the baseline")
+
+    results = {
+        'createdAt': datetime.utcnow().isoformat(),
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'config': {'chunkLines': args.chunk_lines, 'duplication': args.duplication,
+                   'words': [args.min_words, args.max_words], 'seed': args.seed,
+                   'modelFormat': args.model_format, 'cache': args.cache, 'corpusVersion': CORPUS_VERSION},
+        'runs': {}
+    }
+    print(f"{'run':<22}{'lines/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'rss MB':>9}{'workers MB':>12}{'startup ms':>12}")
+    for n_lines in sizes:
+        for mode in modes:
+            run = spawn(mode, n_lines, args)
+            key = f"{mode}@{n_lines}"
+            results['runs'][key] = run
+            if 'error' in run:
+                print(f"{key:<22}❌ {run['error']}")
+                continue
+            print(f"{key:<22}{run['linesPerSec']:>12,.0f}{run['chunkP50Ms']:>10.1f}{run['chunkP99Ms']:>10.1f}"
+                  f"{run['peakRssMb']:>9.1f}{run['workerPeakRssMb']:>12.1f}{run['startupMs']:>12.0f}")
+
+    regressions = []
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        results['baseline'] = {'path': args.baseline, 'threshold': args.threshold, 'regressions': regressions}
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"💾 Results written to {args.output}")
+
+    if regressions:
+        for key in regressions:
+            print(f"❌ {key}: {results['runs'][key]['baselineRatio']:.0%} of baseline throughput")
+        return 1
+    if args.baseline:
+        print(f"✅ No run more than {args.threshold:.0%} below {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,214 @@
+# compact_model.py
+"""Compact on-disk layout for the TF-IDF vectorizer + linear classifier.
+
+export_compact() writes the vocabulary, IDF weights, coefficients and
+intercepts as flat .npy files plus a manifest. load_compact() maps them with
+np.memmap (via np.load(mmap_mode='r')), so every worker shares the same
+pages, and returns drop-in replacements for the vectorizer (transform) and
+the model (predict_proba / predict / classes_) that need only NumPy/SciPy.
+
+    python compact_model.py export   # from the pickles next to this file
+    python compact_model.py verify   # compare against the sklearn pipeline
+"""
+import json
+import os
+import re
+import sys
+
+import numpy as np
+import scipy.sparse as sp
+
+FORMAT_VERSION = 1
+DEFAULT_DIR = 'compact_model'
+_FILES = ('terms.npy', 'term_ids.npy', 'idf.npy', 'coef.npy', 'intercept.npy')
+
+
+def export_compact(vectorizer, model, out_dir):
+    """Write a fitted TfidfVectorizer + linear classifier in the compact layout."""
+    os.makedirs(out_dir, exist_ok=True)
+    vocab = vectorizer.vocabulary_
+    encoded = sorted((term.encode('utf-8'), index) for term, index in vocab.items())
+    width = max(len(term) for term, _ in encoded)
+    terms = np.array([term for term, _ in encoded], dtype=f'S{width}')
+    term_ids = np.array([index for _, index in encoded], dtype=np.int32)
+
+    multi_class = getattr(model, 'multi_class', 'ovr')
+    if multi_class == 'auto':
+        # Mirrors LogisticRegression._check_multi_class for the solvers we train with
+        multinomial = len(model.classes_) > 2 and model.solver != 'liblinear'
+        multi_class = 'multinomial' if multinomial else 'ovr'
+
+    manifest = {
+        'formatVersion': FORMAT_VERSION,
+        'nFeatures': len(vocab),
+        'classes': [c.item() if hasattr(c, 'item') else c for c in model.classes_],
+        'multiClass': multi_class,
+        'ngramRange': list(vectorizer.ngram_range),
+        'lowercase': vectorizer.lowercase,
+        'tokenPattern': vectorizer.token_pattern,
+        'norm': vectorizer.norm,
+        'useIdf': vectorizer.use_idf,
+        'sublinearTf': vectorizer.sublinear_tf,
+        'termWidth': width
+    }
+    np.save(os.path.join(out_dir, 'terms.npy'), terms)
+    np.save(os.path.join(out_dir, 'term_ids.npy'), term_ids)
+    idf = vectorizer.idf_ if vectorizer.use_idf else np.ones(len(vocab))
+    np.save(os.path.join(out_dir, 'idf.npy'), np.ascontiguousarray(idf, dtype=np.float64))
+    np.save(os.path.join(out_dir, 'coef.npy'), np.ascontiguousarray(model.coef_, dtype=np.float64))
+    np.save(os.path.join(out_dir, 'intercept.npy'), np.ascontiguousarray(model.intercept_, dtype=np.float64))
+    with open(os.path.join(out_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def artifact_paths(model_dir):
+    return [os.path.join(model_dir, name) for name in ('manifest.json',) + _FILES]
+
+
+class CompactVectorizer:
+    """TfidfVectorizer.transform over memory-mapped vocabulary and IDF arrays."""
+
+    def __init__(self, model_dir, manifest):
+        load = lambda name: np.load(os.path.join(model_dir, name), mmap_mode='r')
+        self.terms = load('terms.npy')
+        self.term_ids = load('term_ids.npy')
+        self.idf = load('idf.npy')
+        self.n_features = manifest['nFeatures']
+        self.min_n, self.max_n = manifest['ngramRange']
+        self.lowercase = manifest['lowercase']
+        self.norm = manifest['norm']
+        self.sublinear_tf = manifest['sublinearTf']
+        self.term_width = manifest['termWidth']
+        self._token = re.compile(manifest['tokenPattern'])
+        self._feature_names = None
+
+    def _ngrams(self, doc):
+        if self.lowercase: doc = doc.lower()
+        tokens = self._token.findall(doc)
+        if self.max_n == 1: return tokens
+        grams = tokens if self.min_n == 1 else []
+        n_tokens = len(tokens)
+        for n in range(max(self.min_n, 2), min(self.max_n, n_tokens) + 1):
+            grams = grams + [' '.join(tokens[i:i + n]) for i in range(n_tokens - n + 1)]
+        return grams
+
+    def transform(self, docs):
+        rows, grams = [], []
+        for row, doc in enumerate(docs):
+            doc_grams = [g for g in (s.encode('utf-8') for s in self._ngrams(doc)) if len(g) <= self.term_width]
+            grams.extend(doc_grams)
+            rows.extend([row] * len(doc_grams))
+        n_docs = len(docs)
+        if not grams:
+            return sp.csr_matrix((n_docs, self.n_features), dtype=np.float64)
+
+        grams = np.array(grams, dtype=self.terms.dtype)
+        pos = np.searchsorted(self.terms, grams)
+        pos[pos == len(self.terms)] = 0
+        hit = self.terms[pos] == grams
+        cols = np.asarray(self.term_ids[pos[hit]])
+        rows = np.asarray(rows, dtype=np.int32)[hit]
+
+        X = sp.csr_matrix((np.ones(len(cols)), (rows, cols)), shape=(n_docs, self.n_features), dtype=np.float64)
+        X.sum_duplicates()
+        if self.sublinear_tf:
+            np.log(X.data, X.data)
+            X.data += 1
+        X = X @ sp.diags(np.asarray(self.idf))
+        X = sp.csr_matrix(X)
+        if self.norm == 'l2':
+            norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=1)).ravel())
+        elif self.norm == 'l1':
+            norms = np.asarray(abs(X).sum(axis=1)).ravel()
+        else:
+            return X
+        norms[norms == 0] = 1.0
+        return sp.csr_matrix(sp.diags(1.0 / norms) @ X)
+
+    def get_feature_names_out(self):
+        if self._feature_names is None:
+            names = np.empty(self.n_features, dtype=object)
+            names[np.asarray(self.term_ids)] = [t.decode('utf-8') for t in self.terms]
+            self._feature_names = names
+        return self._feature_names
+
+
+class CompactClassifier:
+    """Linear-model scores and probabilities over memory-mapped coef/intercept."""
+
+    def __init__(self, model_dir, manifest):
+        self.coef = np.load(os.path.join(model_dir, 'coef.npy'), mmap_mode='r')
+        self.intercept = np.load(os.path.join(model_dir, 'intercept.npy'), mmap_mode='r')
+        self.classes_ = np.array(manifest['classes'])
+        self.multi_class = manifest['multiClass']
+
+    def decision_function(self, X):
+        scores = X @ np.asarray(self.coef).T + np.asarray(self.intercept)
+        return scores.ravel() if scores.shape[1] == 1 else scores
+
+    def predict_proba(self, X):
+        scores = self.decision_function(X)
+        if scores.ndim == 1:  # Binary: one column of scores for the positive class
+            positive = 1.0 / (1.0 + np.exp(-scores))
+            return np.column_stack([1 - positive, positive])
+        if self.multi_class == 'multinomial':
+            scores = scores - scores.max(axis=1, keepdims=True)
+            np.exp(scores, scores)
+        else:
+            scores = 1.0 / (1.0 + np.exp(-scores))
+        return scores / scores.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        scores = self.decision_function(X)
+        if scores.ndim == 1:
+            return self.classes_[(scores > 0).astype(int)]
+        return self.classes_[scores.argmax(axis=1)]
+
+
+def load_compact(model_dir):
+    """(vectorizer, model) backed by memory-mapped arrays in model_dir."""
+    with open(os.path.join(model_dir, 'manifest.json')) as f:
+        manifest = json.load(f)
+    if manifest.get('formatVersion') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported compact model format: {manifest.get('formatVersion')}")
+    return CompactVectorizer(model_dir, manifest), CompactClassifier(model_dir, manifest)
+
+
+def verify(vectorizer, model, compact_vectorizer, compact_model, texts, atol=1e-9):
+    """Compare the compact pipeline with sklearn on texts; returns a small report."""
+    X_ref = vectorizer.transform(texts)
+    X_new = compact_vectorizer.transform(texts)
+    proba_ref = model.predict_proba(X_ref)
+    proba_new = compact_model.predict_proba(X_new)
+    report = {
+        'lines': len(texts),
+        'maxFeatureDiff': float(abs(X_ref - X_new).max()) if X_ref.nnz or X_new.nnz else 0.0,
+        'maxProbaDiff': float(np.abs(proba_ref - proba_new).max()) if len(texts) else 0.0,
+        'labelMismatches': int((model.classes_[proba_ref.argmax(axis=1)]
+                                != compact_model.classes_[proba_new.argmax(axis=1)]).sum())
+    }
+    report['ok'] = report['maxFeatureDiff'] <= atol and report['maxProbaDiff'] <= atol and not report['labelMismatches']
+    return report
+
+
+if __name__ == '__main__':
+    import joblib
+    from text_normalizer import normalize_many
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    out_dir = os.path.join(here, DEFAULT_DIR)
+    sk_model = joblib.load(os.path.join(here, 'sentiment_model.pkl'))
+    sk_vectorizer = joblib.load(os.path.join(here, 'tfidf_vectorizer.pkl'))
+
+    if len(sys.argv) > 1 and sys.argv[1] == 'export':
+        manifest = export_compact(sk_vectorizer, sk_model, out_dir)
+        print(f"✅ Exported {manifest['nFeatures']} features to {out_dir}")
+
+    sample = normalize_many([
+        "The interface is beautiful", "Rated 7 out of 10", "Great job breaking it",
+        "Battery usage is not great after the update", "Upload complete", "", "zzz unknown words"
+    ] + [f"The app is {w} and support was {v}" for w in ('amazing', 'slow', 'buggy') for v in ('rude', 'helpful')])
+    report = verify(sk_vectorizer, sk_model, *load_compact(out_dir), sample)
+    print(("✓" if report['ok'] else "✗") + f" compact model vs sklearn: {report}")
+    sys.exit(0 if report['ok'] else 1)
@@ -1,40 +1,43 @@
+import os
 import pandas as pd
 import random
 
-def create_balanced_dataset():
-    data = []
-    
-    # --- 1. CORE VOCABULARY ---
-    subjects = ["The app", "Customer service", "The interface", "Loading speed", "Battery usage", 
-                "The new feature", "Support team", "Design", "Connection", "The update", "Performance"]
-    
-    # Positive Adjectives (Strong & Mild)
-    pos_adj = ["amazing", "great", "excellent", "flawless", "superb", "fantastic", "smooth", "fast", 
-               "intuitive", "beautiful", "helpful", "polite", "wonderful", "perfect", "clean", "responsive",
-               "loved", "impressive", "worth", "stunning", "reliable", "solid"]
-    
-    # Negative Adjectives
-    neg_adj = ["terrible", "horrible", "awful", "useless", "broken", "buggy", "slow", "confusing", 
-               "cluttered", "rude", "unhelpful", "laggy", "garbage", "trash", "disappointing", "ugly", 
-               "sucks", "hate", "worst", "bad", "annoying", "frustrating", "cheap"]
+# --- 1. CORE VOCABULARY ---
+SUBJECTS = ["The app", "Customer service", "The interface", "Loading speed", "Battery usage", 
+            "The new feature", "Support team", "Design", "Connection", "The update", "Performance"]
+
+# Positive Adjectives (Strong & Mild)
+POS_ADJ = ["amazing", "great", "excellent", "flawless", "superb", "fantastic", "smooth", "fast", 
+           "intuitive", "beautiful", "helpful", "polite", "wonderful", "perfect", "clean", "responsive",
+           "loved", "impressive", "worth", "stunning", "reliable", "solid"]
+
+# Negative Adjectives
+NEG_ADJ = ["terrible", "horrible", "awful", "useless", "broken", "buggy", "slow", "confusing", 
+           "cluttered", "rude", "unhelpful", "laggy", "garbage", "trash", "disappointing", "ugly", 
+           "sucks", "hate", "worst", "bad", "annoying", "frustrating", "cheap"]
+
+NEUTRAL_PHRASES = ["Update available", "Maintenance scheduled", "Logged in successfully", 
+                   "Please wait", "Loading data", "Version 2.3.1", "Terms updated", 
+                   "Privacy policy", "Check your email", "Account verified", "Wifi connected",
+                   "System rebooting", "File saved", "Upload complete"]
 
-    neutral_phrases = ["Update available", "Maintenance scheduled", "Logged in successfully", 
-                       "Please wait", "Loading data", "Version 2.3.1", "Terms updated", 
-                       "Privacy policy", "Check your email", "Account verified", "Wifi connected",
-                       "System rebooting", "File saved", "Upload complete"]
 
+def create_balanced_dataset(seed=42, path='sentiment_training_data.csv'):
+    rng = random.Random(seed)
+    data = []
+    
     # --- 2. GENERATION LOGIC ---
 
     # A. General Positive (400 lines)
     for _ in range(400):
-        sub = random.choice(subjects)
-        adj = random.choice(pos_adj)
+        sub = rng.choice(SUBJECTS)
+        adj = rng.choice(POS_ADJ)
         data.append({"text": f"{sub} is {adj}", "label": 1})
 
     # B. General Negative (400 lines)
     for _ in range(400):
-        sub = random.choice(subjects)
-        adj = random.choice(neg_adj)
+        sub = rng.choice(SUBJECTS)
+        adj = rng.choice(NEG_ADJ)
         data.append({"text": f"{sub} is {adj}", "label": 0})
 
     # C. BIAS FIX: "Interface" Specifics & Real World (100 lines)
@@ -70,8 +73,8 @@ def create_balanced_dataset():
 
     # D. "Not" Negation Logic (100 lines)
     for _ in range(100):
-        sub = random.choice(subjects)
-        adj = random.choice(pos_adj)
+        sub = rng.choice(SUBJECTS)
+        adj = rng.choice(POS_ADJ)
         data.append({"text": f"{sub} is not {adj}", "label": 0})
 
     # E. Sarcasm (Trigrams) (50 lines)
@@ -83,19 +86,19 @@ def create_balanced_dataset():
     ]
     nouns = ["data", "save button", "account", "feature", "app"]
     for _ in range(50):
-        text = random.choice(sarcastic_templates).format(noun=random.choice(nouns), time="10 mins")
+        text = rng.choice(sarcastic_templates).format(noun=rng.choice(nouns), time="10 mins")
         data.append({"text": text, "label": 0})
 
     # F. NUMBERS FIX: Ratings (100 lines)
     # We use variations to ensure robustness
     for i in range(50):
-        score = random.randint(7, 10)
+        score = rng.randint(7, 10)
         data.append({"text": f"Rated {score} out of 10", "label": 1})
         data.append({"text": f"I give it a {score}/10", "label": 1})
         data.append({"text": f"Score: {score} stars", "label": 1})
 
     for i in range(50):
-        score = random.randint(0, 4)
+        score = rng.randint(0, 4)
         data.append({"text": f"Rated {score} out of 10", "label": 0})
         data.append({"text": f"I give it a {score}/10", "label": 0})
         data.append({"text": f"Score: {score} stars", "label": 0})
@@ -105,21 +108,208 @@ def create_balanced_dataset():
     short_neg = ["Bad.", "Sucks.", "Broken.", "Trash.", "Nope.", "Hate it.", "Worst ever."]
 
     for _ in range(50):
-        data.append({"text": random.choice(short_pos), "label": 1})
+        data.append({"text": rng.choice(short_pos), "label": 1})
     
     for _ in range(50):
-        data.append({"text": random.choice(short_neg), "label": 0})
+        data.append({"text": rng.choice(short_neg), "label": 0})
 
     # G. Neutral (200 lines)
     for _ in range(200):
-        text = random.choice(neutral_phrases)
+        text = rng.choice(NEUTRAL_PHRASES)
         data.append({"text": text, "label": 2})
 
     # Shuffle and Save
-    random.shuffle(data)
+    rng.shuffle(data)
     df = pd.DataFrame(data)
-    df.to_csv('sentiment_training_data.csv', index=False)
+    df.to_csv(path, index=False)
     print(f"✅ Created balanced dataset with {len(df)} rows.")
 
+LABELS = {'negative': 0, 'positive': 1, 'neutral': 2}
+DEFAULT_MIX = {'positive': 0.4, 'negative': 0.4, 'neutral': 0.2}
+FILLERS = ["and", "but", "really", "today", "after", "the", "update", "again", "very", "support", "app"]  # No polarity words
+CORPUS_VERSION = 2  # Bump whenever generate_rows output for a given seed changes (benchmark baselines record it)
+DECOY_WORDS = ["north", "blue", "tier", "sku", "alpha", "beta", "gold", "silver", "retail", "web", "ios", "android"]
+FORMATS = ('csv', 'jsonl', 'parquet')
+CHUNK_ROWS = 50_000
+
+
+def generate_rows(n_rows, duplication=0.0, min_words=3, max_words=12, seed=42,
+                  label_mix=None, length='uniform', decoy_columns=0):
+    """Lazily yield (text, label, decoys) rows built from the vocabulary above.
+
+    - label_mix: {'positive': p, 'negative': p, 'neutral': p} shares (normalized)
+    - duplication: fraction of rows repeating a recently generated row
+    - length: 'uniform' word counts in [min_words, max_words], or 'lognormal'
+      (mostly short, with a long tail up to max_words). Rows are padded with
+      neutral FILLERS only and never cut below their template, so the word
+      that carries the label is always kept. Since CORPUS_VERSION 2 (which
+      introduced this) a seed no longer reproduces the rows of older versions
+    - decoy_columns: extra noise values per row, for wide CSVs
+    """
+    rng = random.Random(seed)
+    mix = label_mix or DEFAULT_MIX
+    total = sum(mix.values())
+    pos_cut = mix.get('positive', 0) / total
+    neg_cut = pos_cut + mix.get('negative', 0) / total
+    median = (min_words + max_words) / 4 or 1
+    recent = []
+    for _ in range(n_rows):
+        if recent and rng.random() < duplication:
+            yield rng.choice(recent)
+            continue
+        kind = rng.random()
+        if kind < pos_cut:
+            words, label = f"{rng.choice(SUBJECTS)} is {rng.choice(POS_ADJ)}".split(), LABELS['positive']
+        elif kind < neg_cut:
+            words, label = f"{rng.choice(SUBJECTS)} is {rng.choice(NEG_ADJ)}".split(), LABELS['negative']
+        else:
+            words, label = rng.choice(NEUTRAL_PHRASES).split(), LABELS['neutral']
+        if length == 'lognormal':
+            target = min(max(min_words, round(rng.lognormvariate(0, 0.6) * median)), max(min_words, max_words))
+        else:
+            target = rng.randint(min_words, max(min_words, max_words))
+        while len(words) < target:
+            words.append(rng.choice(FILLERS))
+        decoys = tuple(rng.choice(DECOY_WORDS) if i % 3 == 0 else str(rng.randrange(100000))
+                       for i in range(decoy_columns))
+        row = (' '.join(words), label, decoys)
+        if len(recent) < 4096:
+            recent.append(row)
+        else:
+            recent[rng.randrange(4096)] = row
+        yield row
+
+def generate_lines(n_lines, duplication=0.0, min_words=3, max_words=12, seed=42):
+    """Lazily yield n_lines synthetic review lines (the text of generate_rows)."""
+    for text, _, _ in generate_rows(n_lines, duplication, min_words, max_words, seed):
+        yield text
+
+# --- 3. LOAD CORPUS (chunked, parallel, seeded) ---
+
+def corpus_columns(decoy_columns):
+    """id, half the decoys, text, label, the other half: the text column is never first."""
+    decoys = [f"attr_{i}" for i in range(decoy_columns)]
+    half = decoy_columns // 2
+    return ['id'] + decoys[:half] + ['text', 'label'] + decoys[half:]
+
+def _ordered(row_id, text, label, decoys):
+    half = len(decoys) // 2
+    return (row_id,) + decoys[:half] + (text, label) + decoys[half:]
+
+def render_chunk(task):
+    """Worker: rows [start, start + n) of chunk `index` as bytes (csv/jsonl) or an Arrow table (parquet).
+
+    Each chunk has its own seed, so the output does not depend on the worker count.
+    """
+    import csv
+    import io
+    import json
+    index, start, n, fmt, options = task
+    rows = generate_rows(n, seed=options['seed'] * 1_000_003 + index, **options['rows'])
+    columns = corpus_columns(options['rows']['decoy_columns'])
+    if fmt == 'parquet':
+        import pyarrow as pa
+        values = list(zip(*(_ordered(start + i, *row) for i, row in enumerate(rows)))) or [()] * len(columns)
+        return pa.table({name: list(col) for name, col in zip(columns, values)})
+    out = io.StringIO()
+    if fmt == 'csv':
+        writer = csv.writer(out, lineterminator='\n')
+        writer.writerows(_ordered(start + i, *row) for i, row in enumerate(rows))
+    else:
+        dumps = json.dumps
+        for i, row in enumerate(rows):
+            out.write(dumps(dict(zip(columns, _ordered(start + i, *row)))) + '\n')
+    return out.getvalue().encode('utf-8')
+
+def _parse_size(text):
+    units = {'k': 1 << 10, 'm': 1 << 20, 'g': 1 << 30}
+    text = str(text).strip().lower().rstrip('b')
+    return int(float(text[:-1]) * units[text[-1]]) if text and text[-1] in units else int(text)
+
+def write_corpus(path, fmt=None, rows=None, size=None, workers=None, chunk_rows=CHUNK_ROWS, seed=42, **row_options):
+    """Stream a synthetic corpus to path until `rows` rows or `size` bytes; returns a small report.
+
+    Chunks are generated by a process pool, a window at a time, and written
+    in order, so memory stays at a few chunks whatever the target size.
+    """
+    import time
+    from worker_pool import WorkerPool
+
+    fmt = fmt or os.path.splitext(path)[1].lstrip('.').replace('ndjson', 'jsonl')
+    if fmt not in FORMATS: raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+    if not rows and not size: raise ValueError('rows or size is required')
+    row_options.setdefault('decoy_columns', 0)
+    options = {'seed': seed, 'rows': row_options}
+    workers = workers or os.cpu_count() or 1
+    start_time = time.perf_counter()
+
+    if fmt == 'parquet':
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pa_parquet
+        except ImportError:
+            raise SystemExit('Parquet output requires pyarrow (pip install pyarrow)')
+        columns = corpus_columns(row_options['decoy_columns'])
+        schema = pa.schema([(c, pa.int64() if c in ('id', 'label') else pa.string()) for c in columns])
+        out = pa_parquet.ParquetWriter(path, schema)
+        write, written = (lambda table: out.write_table(table.cast(schema))), (lambda: os.path.getsize(path))
+    else:
+        out = open(path, 'wb')
+        if fmt == 'csv': out.write((','.join(corpus_columns(row_options['decoy_columns'])) + '\n').encode())
+        write, written = out.write, out.tell
+
+    pool = WorkerPool(workers).start()
+    produced = 0
+    try:
+        index = 0
+        while (rows is None or produced < rows) and (size is None or written() < size):
+            window = []
+            for _ in range(pool.processes * 2):
+                n = chunk_rows if rows is None else min(chunk_rows, rows - produced - sum(t[2] for t in window))
+                if n <= 0: break
+                window.append((index, produced + sum(t[2] for t in window), n, fmt, options))
+                index += 1
+            for task, chunk in zip(window, pool.map(render_chunk, window)):
+                write(chunk)
+                produced += task[2]
+                if size is not None and written() >= size: break
+    finally:
+        pool.shutdown()
+        out.close()
+
+    seconds = time.perf_counter() - start_time
+    report = {'path': path, 'format': fmt, 'rows': produced, 'bytes': os.path.getsize(path),
+              'seconds': round(seconds, 2), 'rowsPerSec': round(produced / seconds) if seconds else None}
+    print(f"✅ Wrote {produced:,} rows ({report['bytes'] / (1 << 20):,.1f} MB) to {path} in {seconds:.1f}s")
+    return report
+
 if __name__ == "__main__":
-    create_balanced_dataset()
\ No newline at end of file
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description='Training data (default) or a large seeded load-test corpus')
+    parser.add_argument('--out', default=None, help='Corpus path; .csv / .jsonl / .parquet picks the format')
+    parser.add_argument('--format', choices=FORMATS, default=None)
+    parser.add_argument('--rows', type=int, default=None, help='Rows to write')
+    parser.add_argument('--size', default=None, help='Stop once the file reaches this size (e.g. 500MB, 2GB)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--mix', default=None, help='Label shares, e.g. positive=0.5,negative=0.3,neutral=0.2')
+    parser.add_argument('--duplication', type=float, default=0.0)
+    parser.add_argument('--min-words', type=int, default=3)
+    parser.add_argument('--max-words', type=int, default=12)
+    parser.add_argument('--length', choices=('uniform', 'lognormal'), default='uniform')
+    parser.add_argument('--decoy-columns', type=int, default=0, help='Extra noise columns (wide CSV)')
+    args = parser.parse_args()
+
+    if args.rows is None and args.size is None:
+        create_balanced_dataset(args.seed)
+    else:
+        mix = {k: float(v) for k, v in (pair.split('=') for pair in args.mix.split(','))} if args.mix else None
+        fmt = args.format or (os.path.splitext(args.out)[1].lstrip('.') if args.out else 'csv')
+        report = write_corpus(args.out or f'load_corpus.{fmt}', fmt, args.rows,
+                              _parse_size(args.size) if args.size else None, args.workers, args.chunk_rows, args.seed,
+                              duplication=args.duplication, min_words=args.min_words, max_words=args.max_words,
+                              label_mix=mix, length=args.length, decoy_columns=args.decoy_columns)
+        print(json.dumps(report))
@@ -0,0 +1,24 @@
+# gunicorn.conf.py
+"""Serving settings for `gunicorn -c gunicorn.conf.py wsgi:app` (see wsgi.py)."""
+import multiprocessing as mp
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('SERVE_WORKERS', 2))  # Serving processes forked from the preloaded master
+worker_class = 'gthread'  # Threads keep /health and /analyze answering while a job runs
+threads = int(os.environ.get('SERVE_THREADS', 8))
+preload_app = True
+timeout = int(os.environ.get('SERVE_TIMEOUT', 600))  # Sync jobs can run for minutes
+graceful_timeout = 30
+keepalive = 5
+
+# Every serving worker gets its own scoring pool; split the CPUs between them unless set explicitly.
+# Read by sentiment_api at import, which happens after this file is loaded.
+os.environ.setdefault('WORKER_COUNT', str(max(1, mp.cpu_count() // workers)))
+
+
+def worker_exit(server, worker):
+    import sentiment_api
+    sentiment_api.job_queue.shutdown()
+    if sentiment_api.worker_pool is not None:
+        sentiment_api.worker_pool.shutdown()
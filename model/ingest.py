@@ -0,0 +1,256 @@
+# ingest.py
+"""Chunked, column-projected readers for uploaded text.
+
+Every reader yields lists of at most `chunk_size` texts, so callers can feed
+them straight into stream_process_texts without holding the file:
+
+- .csv      header read first, then only the text column is parsed (usecols),
+            with pyarrow's multithreaded streaming reader when installed
+- .jsonl    one JSON object per line; only the text field is kept
+- .parquet  only the text column's pages are read (needs pyarrow)
+- anything else: one text per non-empty line
+
+Sources may be a pathlib.Path, a binary or text file object, or a str of
+content.
+"""
+import csv
+import io
+import json
+import mmap
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pa_parquet
+except ImportError:  # Optional: pandas' C parser is used instead
+    pa = pa_csv = pa_parquet = None
+
+TEXT_COLUMNS = ('text', 'content', 'message', 'review', 'comment')
+FORMATS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.parquet': 'parquet'}
+ARROW_BLOCK_BYTES = 4 << 20
+MMAP_WINDOW_BYTES = 8 << 20
+
+
+class IngestError(ValueError):
+    """The upload could not be parsed as its declared format."""
+
+
+def detect_format(filename):
+    return FORMATS.get(os.path.splitext((filename or '').lower())[1], 'text')
+
+
+def pick_column(columns):
+    """First known text column, else the first column (same rule as the old CSV path)."""
+    columns = list(columns)
+    for name in TEXT_COLUMNS:
+        if name in columns:
+            return name
+    if not columns:
+        raise IngestError('No columns found')
+    return columns[0]
+
+
+class _Prepend(io.RawIOBase):
+    """A binary stream with `head` put back in front, for non-seekable sources."""
+
+    def __init__(self, head, stream):
+        self.head = head
+        self.stream = stream
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.head:
+            n = min(len(buffer), len(self.head))
+            buffer[:n] = self.head[:n]
+            self.head = self.head[n:]
+            return n
+        data = self.stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def _as_binary(source):
+    """(binary file object, should_close) for a Path, str content, or text/binary file object."""
+    if isinstance(source, os.PathLike):
+        return open(source, 'rb'), True
+    if isinstance(source, str):
+        return io.BytesIO(source.encode('utf-8')), True
+    if isinstance(source, io.TextIOBase):
+        if isinstance(source, io.StringIO):
+            return io.BytesIO(source.getvalue().encode('utf-8')), True
+        return source.buffer, False
+    return source, False
+
+
+def _texts(values):
+    # Matches the old `df[col].astype(str)`: missing cells become 'nan'
+    return ['nan' if v is None else v if isinstance(v, str) else str(v) for v in values]
+
+
+def iter_line_chunks(lines, chunk_size):
+    """Group an iterable of raw lines into lists of non-empty, stripped texts."""
+    chunk = []
+    for line in lines:
+        if isinstance(line, bytes): line = line.decode('utf-8', errors='replace')
+        line = line.strip()
+        if not line: continue
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk: yield chunk
+
+
+def _mapped(file):
+    """Read-only mmap of an open binary file, or None when it is empty (cannot be mapped)."""
+    if os.fstat(file.fileno()).st_size == 0: return None
+    return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def count_lines(file, window_bytes=MMAP_WINDOW_BYTES):
+    """Newline count of an open binary file (an upper bound on rows/texts), window by window."""
+    mapped = _mapped(file)
+    if mapped is None: return 0
+    with mapped:
+        size = len(mapped)
+        lines = sum(mapped[start:start + window_bytes].count(b'\n') for start in range(0, size, window_bytes))
+        return lines + (mapped[size - 1:] != b'\n')
+
+
+def iter_mmap_line_chunks(file, chunk_size, window_bytes=MMAP_WINDOW_BYTES):
+    """iter_line_chunks over a memory-mapped (open, binary) file.
+
+    The file is cut into windows ending on a newline; only the lines of the
+    current chunk are decoded, so memory tracks window/chunk size, not file size.
+    """
+    mapped = _mapped(file)
+    if mapped is None: return
+    with mapped:
+        size = len(mapped)
+        chunk = []
+        start = 0
+        while start < size:
+            end = min(start + window_bytes, size)
+            if end < size:
+                cut = mapped.rfind(b'\n', start, end)
+                # A single line longer than the window: extend to its end
+                end = cut + 1 if cut >= start else (mapped.find(b'\n', end) + 1 or size)
+            for raw in mapped[start:end].split(b'\n'):
+                line = raw.decode('utf-8', errors='replace').strip()
+                if not line: continue
+                chunk.append(line)
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+            start = end
+        if chunk: yield chunk
+
+
+def iter_csv_chunks(stream, chunk_size, engine='auto'):
+    header = stream.readline()
+    if not header.strip():
+        return
+    try:
+        column = pick_column(next(csv.reader([header.decode('utf-8-sig', errors='replace')])))
+    except (csv.Error, StopIteration) as e:
+        raise IngestError(f'Unreadable CSV header: {e}')
+    body = io.BufferedReader(_Prepend(header, stream), buffer_size=1 << 20)
+
+    try:
+        if engine == 'pyarrow' or (engine == 'auto' and pa_csv is not None):
+            if pa_csv is None: raise IngestError('engine=pyarrow requested but pyarrow is not installed')
+            reader = pa_csv.open_csv(
+                body,
+                read_options=pa_csv.ReadOptions(block_size=ARROW_BLOCK_BYTES, encoding='utf8'),
+                parse_options=pa_csv.ParseOptions(newlines_in_values=True),  # Quoted multi-line reviews, like pandas
+                convert_options=pa_csv.ConvertOptions(include_columns=[column],
+                                                      column_types={column: pa.string()},
+                                                      strings_can_be_null=True))
+            pending = []
+            for batch in reader:
+                pending.extend(_texts(batch.column(0).to_pylist()))
+                while len(pending) >= chunk_size:
+                    yield pending[:chunk_size]
+                    pending = pending[chunk_size:]
+            if pending: yield pending
+        else:
+            reader = pd.read_csv(body, usecols=[column], dtype={column: str}, chunksize=chunk_size,
+                                 encoding='utf-8-sig', encoding_errors='replace')
+            for frame in reader:
+                yield frame[column].astype(str).tolist()
+    except IngestError:
+        raise
+    except Exception as e:
+        raise IngestError(f'Malformed CSV ({type(e).__name__}): {e}')
+
+
+def iter_jsonl_chunks(stream, chunk_size):
+    column = None
+    chunk = []
+    for number, line in enumerate(stream, 1):
+        if not line.strip(): continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            raise IngestError(f'Malformed JSON on line {number}: {e}')
+        if isinstance(record, dict):
+            if column is None: column = pick_column(record)
+            value = record.get(column)
+        else:
+            value = record
+        chunk.append(_texts([value])[0])
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk: yield chunk
+
+
+def iter_parquet_chunks(stream, chunk_size):
+    if pa_parquet is None:
+        raise IngestError('Parquet input requires pyarrow (pip install pyarrow)')
+    try:
+        parquet = pa_parquet.ParquetFile(stream)
+        column = pick_column(parquet.schema_arrow.names)
+        for batch in parquet.iter_batches(batch_size=chunk_size, columns=[column]):
+            yield _texts(batch.column(0).to_pylist())
+    except IngestError:
+        raise
+    except Exception as e:
+        raise IngestError(f'Malformed Parquet ({type(e).__name__}): {e}')
+
+
+def iter_file_chunks(file, chunk_size, engine='auto', filename=None):
+    """Chunks of texts from an open binary file on disk, which is closed at the end.
+
+    Plain text is memory-mapped; other formats go through the projected readers.
+    """
+    filename = filename or os.path.basename(getattr(file, 'name', '') or '')
+    try:
+        if detect_format(filename) == 'text':
+            yield from iter_mmap_line_chunks(file, chunk_size)
+        else:
+            yield from iter_text_chunks(file, filename, chunk_size, engine)
+    finally:
+        file.close()
+
+
+def iter_text_chunks(source, filename, chunk_size, engine='auto'):
+    """Chunks of texts from `source`, parsed according to `filename`'s extension."""
+    stream, should_close = _as_binary(source)
+    try:
+        fmt = detect_format(filename)
+        if fmt == 'csv':
+            yield from iter_csv_chunks(stream, chunk_size, engine)
+        elif fmt == 'jsonl':
+            yield from iter_jsonl_chunks(stream, chunk_size)
+        elif fmt == 'parquet':
+            yield from iter_parquet_chunks(stream, chunk_size)
+        else:
+            yield from iter_line_chunks(stream, chunk_size)
+    finally:
+        if should_close: stream.close()
@@ -0,0 +1,93 @@
+# job_analytics.py
+"""Job-level aggregates built in the same pass that formats results.
+
+Everything here is O(1) per line and O(buckets) per job, so the finished
+summary stays small no matter how many lines a job has. It is stored on the
+job document as `analytics`, and dashboards read it there instead of
+re-scanning result lines.
+
+Line-position buckets have a fixed count (at most POSITION_BUCKETS are
+reported). Their width starts at 1 line and doubles (adjacent buckets are
+merged) whenever the job outgrows them, so the total line count does not
+need to be known up front (streamed jobs).
+"""
+from keywords import KeywordTotals
+
+LABELS = ('negative', 'neutral', 'positive')
+CONFIDENCE_BINS = 10  # Equal-width bins over [0, 1]
+POSITION_BUCKETS = 20
+LOW_CONFIDENCE = 0.5
+TOP_KEYWORDS_PER_LABEL = 10
+
+
+class JobAnalytics:
+    def __init__(self, buckets=POSITION_BUCKETS, low_confidence=LOW_CONFIDENCE):
+        self.low_confidence = low_confidence
+        self.lines = 0
+        self.errors = 0
+        self.empty = 0
+        self.low_confidence_lines = 0
+        self.histogram = [0] * CONFIDENCE_BINS
+        self.confidence_sum = dict.fromkeys(LABELS, 0.0)
+        self.label_count = dict.fromkeys(LABELS, 0)
+        self.keywords = {label: KeywordTotals() for label in LABELS}
+        self.width = 1
+        self.positions = [[0.0, 0] for _ in range(buckets)]  # [score sum, scored lines]
+
+    def _position(self):
+        index = self.lines // self.width
+        while index >= len(self.positions):
+            pairs = (self.positions[i:i + 2] for i in range(0, len(self.positions), 2))
+            merged = [[sum(b[0] for b in pair), sum(b[1] for b in pair)] for pair in pairs]
+            self.positions = merged + [[0.0, 0] for _ in range(len(self.positions) - len(merged))]
+            self.width *= 2
+            index = self.lines // self.width
+        return self.positions[index]
+
+    def add(self, result):
+        """One analyze_batch result; must be called in line order."""
+        bucket = self._position()
+        self.lines += 1
+        if 'error' in result:
+            self.errors += 1
+            return
+        if not result.get('cleanedText', '').strip():
+            self.empty += 1  # Scored as a fixed neutral 0.0 with no confidence
+            return
+        label = result.get('sentimentLabel', 'neutral')
+        confidence = result.get('confidence', 0.0)
+        bucket[0] += result.get('sentimentScore', 0.0)
+        bucket[1] += 1
+        self.histogram[min(int(confidence * CONFIDENCE_BINS), CONFIDENCE_BINS - 1)] += 1
+        self.confidence_sum[label] = self.confidence_sum.get(label, 0.0) + confidence
+        self.label_count[label] = self.label_count.get(label, 0) + 1
+        if confidence < self.low_confidence: self.low_confidence_lines += 1
+        if result.get('keywordWeights'):
+            self.keywords.setdefault(label, KeywordTotals()).add(result['keywords'], result['keywordWeights'])
+
+    def to_dict(self):
+        used = -(-self.lines // self.width)  # Buckets that hold at least one line
+        return {
+            'lines': self.lines,
+            'errorLines': self.errors,
+            'emptyLines': self.empty,
+            'lowConfidenceLines': self.low_confidence_lines,
+            'lowConfidenceThreshold': self.low_confidence,
+            'confidenceHistogram': {
+                'bins': [round(i / CONFIDENCE_BINS, 2) for i in range(CONFIDENCE_BINS + 1)],
+                'counts': list(self.histogram)
+            },
+            'labelCounts': dict(self.label_count),
+            'confidenceByLabel': {
+                label: round(self.confidence_sum[label] / count, 4) if count else None
+                for label, count in self.label_count.items()
+            },
+            'sentimentByPosition': [
+                {'startLine': i * self.width + 1, 'endLine': min((i + 1) * self.width, self.lines),
+                 'averageSentiment': round(total / scored, 4) if scored else None, 'scoredLines': scored}
+                for i, (total, scored) in enumerate(self.positions[:used])
+            ],
+            'topKeywordsByLabel': {
+                label: totals.top(TOP_KEYWORDS_PER_LABEL)['topKeywords'] for label, totals in self.keywords.items()
+            }
+        }
@@ -0,0 +1,134 @@
+# job_queue.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+
+class QueueFullError(RuntimeError):
+    pass
+
+
+class JobHandle:
+    """State shared between the queue, the running job and the HTTP handlers."""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.status = 'queued'
+        self.progress = 0
+        self.lines_done = 0
+        self.total_lines = None
+        self.error = None
+        self.submitted_at = datetime.utcnow()
+        self.started_at = None
+        self.finished_at = None
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def to_dict(self):
+        return {
+            'jobId': self.job_id,
+            'status': self.status,
+            'progress': self.progress,
+            'linesDone': self.lines_done,
+            'totalLines': self.total_lines,
+            'error': self.error,
+            'submittedAt': self.submitted_at.isoformat(),
+            'startedAt': self.started_at.isoformat() if self.started_at else None,
+            'finishedAt': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+class JobQueue:
+    """In-process job queue running at most max_concurrent jobs at a time.
+
+    Submissions beyond max_concurrent + max_pending are rejected with
+    QueueFullError so a burst of uploads cannot queue unbounded work.
+    """
+
+    def __init__(self, max_concurrent=2, max_pending=32, keep_finished=256):
+        self.max_concurrent = max_concurrent
+        self.max_pending = max_pending
+        self.keep_finished = keep_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix='job')
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self.closed = False
+
+    def _active(self):
+        return [h for h in self._jobs.values() if h.status in ('queued', 'running')]
+
+    def submit(self, job_id, fn, *args, on_cancel=None):
+        """Queue fn(handle, *args); the handle is returned immediately.
+
+        on_cancel(handle) runs once if the job ends cancelled, whether it was
+        still queued (fn never ran) or stopped part way through.
+        """
+        with self._lock:
+            existing = self._jobs.get(job_id)
+            if existing and existing.status in ('queued', 'running'):
+                return existing
+            if len(self._active()) >= self.max_concurrent + self.max_pending:
+                raise QueueFullError(f"Job queue full ({self.max_concurrent} running, {self.max_pending} pending)")
+            handle = JobHandle(job_id)
+            self._jobs[job_id] = handle
+            self._prune()
+        self._executor.submit(self._run, handle, fn, args, on_cancel)
+        return handle
+
+    def _run(self, handle, fn, args, on_cancel=None):
+        try:
+            if handle.cancelled:
+                handle.status = 'cancelled'
+            else:
+                handle.status = 'running'
+                handle.started_at = datetime.utcnow()
+                try:
+                    fn(handle, *args)
+                    handle.status = 'cancelled' if handle.cancelled else 'completed'
+                except Exception as e:
+                    handle.status = 'failed'
+                    handle.error = str(e)
+                    print(f"❌ Job {handle.job_id} failed: {e}")
+            if handle.status == 'cancelled' and on_cancel is not None:
+                try:
+                    on_cancel(handle)
+                except Exception as e:
+                    print(f"⚠️ Cleanup of cancelled job {handle.job_id} failed: {e}")
+        finally:
+            handle.finished_at = datetime.utcnow()
+
+    def _prune(self):
+        finished = [h for h in self._jobs.values() if h.finished_at]
+        for h in sorted(finished, key=lambda h: h.finished_at)[:-self.keep_finished or None]:
+            del self._jobs[h.job_id]
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        handle = self._jobs.get(job_id)
+        if handle is None:
+            return None
+        handle.cancel()
+        return handle
+
+    def stats(self):
+        with self._lock:
+            active = self._active()
+            return {
+                'maxConcurrent': self.max_concurrent,
+                'running': sum(1 for h in active if h.status == 'running'),
+                'queued': sum(1 for h in active if h.status == 'queued')
+            }
+
+    def shutdown(self):
+        self.closed = True
+        for handle in self._active():
+            handle.cancel()
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,65 @@
+# keywords.py
+"""Keywords from the TF-IDF matrix the vectorizer already produced.
+
+Per row, the k highest-weight vocabulary terms (unigrams or n-grams) are
+picked with one lexsort over the CSR arrays, with no Python loop over
+nonzeros. Per job, KeywordTotals adds up those weights so the top keywords
+and n-grams are ready when the job finishes.
+"""
+from collections import Counter
+
+import numpy as np
+
+TOP_K = 10
+MIN_TERM_LENGTH = 3  # Same floor as the old `len(word) > 2` rule
+
+
+class KeywordExtractor:
+    def __init__(self, vectorizer, k=TOP_K, min_length=MIN_TERM_LENGTH):
+        self.k = k
+        self.names = np.asarray(vectorizer.get_feature_names_out(), dtype=object)
+        self.eligible = np.fromiter((len(t) >= min_length for t in self.names), dtype=bool, count=len(self.names))
+
+    def top_terms(self, X):
+        """[(term, weight), ...] per row of X, highest weight first (ties by feature index)."""
+        X = X.tocsr()
+        n_rows = X.shape[0]
+        rows = np.repeat(np.arange(n_rows), np.diff(X.indptr))
+        keep = self.eligible[X.indices]
+        rows, cols, data = rows[keep], X.indices[keep], X.data[keep]
+
+        order = np.lexsort((cols, -data, rows))
+        rows, cols, data = rows[order], cols[order], data[order]
+        first = np.searchsorted(rows, np.arange(n_rows))
+        top = (np.arange(len(rows)) - first[rows]) < self.k
+        rows, cols, data = rows[top], cols[top], data[top]
+
+        bounds = np.searchsorted(rows, np.arange(n_rows + 1)).tolist()
+        names = self.names[cols].tolist()
+        weights = np.round(data, 4).tolist()
+        return [list(zip(names[a:b], weights[a:b])) for a, b in zip(bounds[:-1], bounds[1:])]
+
+
+def fallback_keywords(cleaned, k=TOP_K):
+    """The original heuristic, for text with no in-vocabulary terms."""
+    return [word for word in cleaned.split() if len(word) >= MIN_TERM_LENGTH][:k]
+
+
+class KeywordTotals:
+    """Summed keyword weights over a job's lines; split into words and n-grams at the end."""
+
+    def __init__(self):
+        self.weights = Counter()
+
+    def add(self, keywords, weights):
+        for term, weight in zip(keywords, weights):
+            self.weights[term] += weight
+
+    def top(self, n=20):
+        words, ngrams = [], []
+        for term, weight in self.weights.most_common():
+            bucket = ngrams if ' ' in term else words
+            if len(bucket) < n:
+                bucket.append({'term': term, 'weight': round(weight, 3)})
+            if len(words) >= n and len(ngrams) >= n: break
+        return {'topKeywords': words, 'topNgrams': ngrams}
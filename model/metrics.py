@@ -0,0 +1,190 @@
+# metrics.py
+"""Shared-memory counters and histograms rendered in Prometheus text format.
+
+Every series is preallocated (label values are fixed up front) in an
+mp.Array, so metrics recorded inside forked pool workers show up in the
+parent's /metrics. Create the registry before forking the pool, exactly like
+the prediction cache counters.
+"""
+import itertools
+import multiprocessing as mp
+import os
+import time
+
+STAGES = ('request_parse', 'csv_parse', 'clean', 'vectorize', 'predict', 'keywords', 'format', 'mongo_write')
+MODES = ('sequential', 'batched', 'thread', 'process', 'stream', 'async', 'file', 'budgeted', 'pipelined')
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+ENDPOINTS = ('analyze', 'analyze_batch')
+PIPELINE_STAGES = ('parse', 'score', 'format', 'persist')  # See pipeline.py
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+JOB_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _format_labels(pairs):
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}' if pairs else ''
+
+
+class _Series:
+    """Fixed label space -> slot index in one shared array."""
+
+    def __init__(self, name, help_text, labels, width):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self.label_values = [tuple(labels[k]) for k in self.label_names]
+        self._index = {combo: i for i, combo in enumerate(itertools.product(*self.label_values))}
+        self.width = width
+        self.values = mp.Array('d', len(self._index) * width)
+
+    def _slot(self, labels):
+        i = self._index.get(tuple(labels[k] for k in self.label_names))
+        return None if i is None else i * self.width
+
+    def _series(self):
+        for combo, i in self._index.items():
+            yield tuple(zip(self.label_names, combo)), i * self.width
+
+
+class Counter(_Series):
+    def __init__(self, name, help_text, labels):
+        super().__init__(name, help_text, labels, 1)
+
+    def inc(self, amount=1, **labels):
+        slot = self._slot(labels)
+        if slot is None: return  # Unknown label values are dropped rather than raising
+        with self.values.get_lock():
+            self.values[slot] += amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        for pairs, slot in self._series():
+            if self.values[slot]:
+                lines.append(f'{self.name}{_format_labels(pairs)} {self.values[slot]:g}')
+        return lines
+
+
+class Histogram(_Series):
+    """Per series: one count per bucket, then +Inf count, then sum."""
+
+    def __init__(self, name, help_text, labels, buckets):
+        self.buckets = tuple(buckets)
+        super().__init__(name, help_text, labels, len(self.buckets) + 2)
+
+    def observe(self, value, **labels):
+        slot = self._slot(labels)
+        if slot is None: return
+        bucket = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        with self.values.get_lock():
+            self.values[slot + bucket] += 1
+            self.values[slot + self.width - 1] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        for pairs, slot in self._series():
+            counts = self.values[slot:slot + len(self.buckets) + 1]
+            total = sum(counts)
+            if not total: continue
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                lines.append(f'{self.name}_bucket{_format_labels(pairs + (("le", le),))} {cumulative:g}')
+            lines.append(f'{self.name}_sum{_format_labels(pairs)} {self.values[slot + self.width - 1]:.6f}')
+            lines.append(f'{self.name}_count{_format_labels(pairs)} {total:g}')
+        return lines
+
+
+class _StageTimer:
+    __slots__ = ('metrics', 'stage', 'items', 'start')
+
+    def __init__(self, metrics, stage, items):
+        self.metrics = metrics
+        self.stage = stage
+        self.items = items
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe_stage(self.stage, time.perf_counter() - self.start, self.items)
+        return False
+
+
+class Metrics:
+    """The API's metric registry: per-stage timings per worker, job outcomes per mode."""
+
+    def __init__(self, worker_count):
+        self.worker_count = max(1, worker_count)
+        self.workers = ('main',) + tuple(f'w{i}' for i in range(self.worker_count))
+        self._next_worker = mp.Value('i', 0)
+        self._worker = ('main', os.getpid())
+
+        self.stage_seconds = Histogram('sentiment_stage_seconds', 'Time spent in each pipeline stage',
+                                       {'stage': STAGES, 'worker': self.workers}, STAGE_BUCKETS)
+        self.stage_items = Counter('sentiment_stage_items_total', 'Lines (or requests) passed through each stage',
+                                   {'stage': STAGES, 'worker': self.workers})
+        self.job_seconds = Histogram('sentiment_job_seconds', 'End-to-end job duration',
+                                     {'mode': MODES}, JOB_BUCKETS)
+        self.jobs = Counter('sentiment_jobs_total', 'Finished jobs',
+                            {'mode': MODES, 'status': ('completed', 'failed', 'cancelled')})
+        self.lines = Counter('sentiment_lines_total', 'Lines scored', {'mode': MODES})
+        self.request_seconds = Histogram('sentiment_request_seconds', 'End-to-end latency of the scoring endpoints',
+                                         {'endpoint': ENDPOINTS}, STAGE_BUCKETS)
+        self.microbatch_size = Histogram('sentiment_microbatch_size', 'Texts scored per coalesced micro-batch',
+                                         {}, BATCH_SIZE_BUCKETS)
+        self.microbatch_wait = Histogram('sentiment_microbatch_wait_seconds', 'Time a request queued before its micro-batch ran',
+                                         {}, STAGE_BUCKETS)
+        self.pipeline_seconds = Counter('sentiment_pipeline_seconds_total', 'Pipelined jobs: time each stage spent working, starved or blocked',
+                                        {'stage': PIPELINE_STAGES, 'state': ('busy', 'starved', 'blocked')})
+        self._all = (self.stage_seconds, self.stage_items, self.job_seconds, self.jobs, self.lines,
+                     self.request_seconds, self.microbatch_size, self.microbatch_wait, self.pipeline_seconds)
+
+    def register_pool_worker(self):
+        """Called from the pool's child initializer: claim the next of w0..wN-1 for this process."""
+        with self._next_worker.get_lock():
+            slot = self._next_worker.value % self.worker_count
+            self._next_worker.value += 1
+        self._worker = (f'w{slot}', os.getpid())
+
+    def worker_label(self):
+        """'wN' in registered pool workers; every other process (API, gunicorn serving workers) is 'main'."""
+        return self._worker[0] if self._worker[1] == os.getpid() else 'main'
+
+    def stage(self, name, items=1):
+        """`with metrics.stage('vectorize', len(texts)):` times the block."""
+        return _StageTimer(self, name, items)
+
+    def observe_stage(self, name, seconds, items=1):
+        worker = self.worker_label()
+        self.stage_seconds.observe(seconds, stage=name, worker=worker)
+        self.stage_items.inc(items, stage=name, worker=worker)
+
+    def record_job(self, mode, lines, seconds, status='completed'):
+        self.jobs.inc(mode=mode, status=status)
+        self.lines.inc(lines, mode=mode)
+        self.job_seconds.observe(seconds, mode=mode)
+
+    def record_microbatch(self, size, waits):
+        self.microbatch_size.observe(size)
+        for seconds in waits:
+            self.microbatch_wait.observe(seconds)
+
+    def record_pipeline(self, report):
+        for stage, clock in report['stages'].items():
+            for state in ('busy', 'starved', 'blocked'):
+                self.pipeline_seconds.inc(clock[f'{state}Seconds'], stage=stage, state=state)
+
+    def render(self, gauges=None):
+        """Prometheus exposition text; `gauges` maps name -> (help, value) for point-in-time values."""
+        lines = []
+        for metric in self._all:
+            lines.extend(metric.render())
+        for name, (help_text, value) in (gauges or {}).items():
+            if value is None: continue
+            lines.extend([f'# HELP {name} {help_text}', f'# TYPE {name} gauge', f'{name} {float(value):g}'])
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,112 @@
+# micro_batcher.py
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from job_queue import QueueFullError
+
+
+class _Request:
+    __slots__ = ('texts', 'future', 'enqueued_at')
+
+    def __init__(self, texts):
+        self.texts = texts
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class MicroBatcher:
+    """Coalesces concurrent scoring requests into one vectorized call.
+
+    The first waiting request opens a window of max_wait_ms; requests that
+    arrive before it closes (or until max_batch texts are gathered) are scored
+    together by score_fn(texts) -> results and each caller gets its own slice
+    back. A single request larger than max_batch is scored on its own.
+    on_batch(size, waits) is called per batch (for metrics).
+    """
+
+    def __init__(self, score_fn, max_batch=64, max_wait_ms=2.0, max_queue=4096, on_batch=None):
+        self.score_fn = score_fn
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.max_queue = max_queue
+        self.on_batch = on_batch
+        self._queue = queue.Queue()
+        self._carry = None  # Request that did not fit in the previous batch
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self.batches = 0
+        self.texts = 0
+
+    def _ensure_thread(self):
+        # Threads do not survive fork, so a forked server worker starts its own
+        if self._pid == os.getpid() and self._thread.is_alive(): return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive(): return
+            self._queue = queue.Queue()
+            self._carry = None
+            self._thread = threading.Thread(target=self._loop, name='micro-batcher', daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+
+    def submit(self, texts):
+        """Future resolving to the results for `texts`, in order."""
+        self._ensure_thread()
+        if self._queue.qsize() >= self.max_queue:
+            raise QueueFullError(f"Micro-batch queue full ({self.max_queue} requests waiting)")
+        request = _Request(list(texts))
+        self._queue.put(request)
+        return request.future
+
+    def score(self, texts, timeout=None):
+        return self.submit(texts).result(timeout)
+
+    def _gather(self):
+        first = self._carry or self._queue.get()
+        self._carry = None
+        batch, size = [first], len(first.texts)
+        deadline = first.enqueued_at + self.max_wait
+        while size < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if size + len(request.texts) > self.max_batch:
+                self._carry = request
+                break
+            batch.append(request)
+            size += len(request.texts)
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._gather()
+            started = time.perf_counter()
+            texts = [text for request in batch for text in request.texts]
+            try:
+                results = self.score_fn(texts)
+            except Exception as e:
+                for request in batch: request.future.set_exception(e)
+                continue
+            offset = 0
+            for request in batch:
+                request.future.set_result(results[offset:offset + len(request.texts)])
+                offset += len(request.texts)
+            self.batches += 1
+            self.texts += len(texts)
+            if self.on_batch:
+                self.on_batch(len(texts), [started - request.enqueued_at for request in batch])
+
+    def stats(self):
+        return {
+            'maxBatch': self.max_batch,
+            'maxWaitMs': self.max_wait * 1000,
+            'queuedRequests': self._queue.qsize(),
+            'batches': self.batches,
+            'texts': self.texts,
+            'averageBatchSize': round(self.texts / self.batches, 2) if self.batches else 0.0
+        }
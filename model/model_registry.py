@@ -0,0 +1,265 @@
+# model_registry.py
+"""Versioned model artifacts with checksums, plus the active-version pointer.
+
+    registry/
+      CURRENT                        # name of the active version, replaced atomically
+      20261017-142501-3fa9c2d1/
+        manifest.json                # version, createdAt, sha256 per file, canary predictions
+        sentiment_model.pkl
+        tfidf_vectorizer.pkl
+        compact_model/...            # memory-mapped copy (MODEL_FORMAT=compact)
+
+publish() builds a version under a temporary name and renames it into
+place before CURRENT is repointed, so no reader ever sees half a version.
+Versions are never modified afterwards; rolling back is repointing CURRENT.
+A running API notices CURRENT change (ModelWatcher) or is told through
+POST /model/reload, and swaps the new version in without a restart (see
+sentiment_api.reload_model).
+
+    python model_registry.py list
+    python model_registry.py publish [--no-activate]   # the pickles next to this file
+    python model_registry.py activate VERSION           # roll forward / back
+    python model_registry.py verify [VERSION]
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import joblib
+
+MANIFEST = 'manifest.json'
+CURRENT = 'CURRENT'
+MODEL_FILE = 'sentiment_model.pkl'
+VECTORIZER_FILE = 'tfidf_vectorizer.pkl'
+CANARY_TEXTS = [
+    "The app is amazing and the support team was very helpful",
+    "Battery usage is terrible after the update",
+    "Upload complete", "Rated 7 out of 10", "Not worth the price",
+    "I love waiting 10 mins for it to load", "Interface is clean and simple",
+    "The product stopped working after two days.", "Great job breaking it",
+    "The interface is beautiful", "Customer service was rude", "Account verified"
+]
+
+
+class RegistryError(RuntimeError):
+    """A version is missing, fails its checksums or fails its canary."""
+
+
+class ReloadInProgress(RuntimeError):
+    pass
+
+
+class ModelBundle:
+    """Everything one model version scores with, loaded together and swapped as a unit."""
+
+    def __init__(self, version, fingerprint, vectorizer, model, keyword_extractor, path=None):
+        self.version = version
+        self.fingerprint = fingerprint
+        self.vectorizer = vectorizer
+        self.model = model
+        self.keyword_extractor = keyword_extractor
+        self.path = path
+        self.loaded_at = datetime.utcnow()
+
+    def to_dict(self):
+        return {'version': self.version, 'fingerprint': self.fingerprint,
+                'loadedAt': self.loaded_at.isoformat(), 'path': self.path}
+
+
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _checksums(directory):
+    found = {}
+    for parent, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(parent, name)
+            relative = os.path.relpath(path, directory).replace(os.sep, '/')
+            if relative != MANIFEST: found[relative] = sha256_file(path)
+    return dict(sorted(found.items()))
+
+
+def version_dir(root, version):
+    if not version or os.sep in version or version.startswith('.') or (os.altsep and os.altsep in version):
+        raise RegistryError(f"Invalid model version {version!r}")
+    return os.path.join(root, version)
+
+
+def current_version(root):
+    """The active version name, or None when the registry has none yet."""
+    try:
+        with open(os.path.join(root, CURRENT)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def read_manifest(root, version):
+    try:
+        with open(os.path.join(version_dir(root, version), MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise RegistryError(f"Model version {version} not found in {root}")
+
+
+def list_versions(root):
+    """Manifests of every published version, oldest first."""
+    if not os.path.isdir(root): return []
+    manifests = []
+    for name in sorted(os.listdir(root)):
+        if not name.startswith('.') and os.path.isfile(os.path.join(root, name, MANIFEST)):
+            manifests.append(read_manifest(root, name))
+    return manifests
+
+
+def verify(root, version):
+    """Raise RegistryError unless every file of the version matches its manifest checksum."""
+    manifest = read_manifest(root, version)
+    directory = version_dir(root, version)
+    for relative, expected in manifest['files'].items():
+        path = os.path.join(directory, *relative.split('/'))
+        if not os.path.isfile(path):
+            raise RegistryError(f"{version}: {relative} is missing")
+        if sha256_file(path) != expected:
+            raise RegistryError(f"{version}: checksum mismatch for {relative}")
+    return manifest
+
+
+def activate(root, version):
+    """Point CURRENT at a verified version (atomic rename, so readers see old or new)."""
+    verify(root, version)
+    staging = os.path.join(root, f'.{CURRENT}.{uuid.uuid4().hex}')
+    with open(staging, 'w') as f:
+        f.write(version + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(staging, os.path.join(root, CURRENT))
+    return version
+
+
+def canary_predictions(vectorizer, model, texts=CANARY_TEXTS):
+    from text_normalizer import normalize_many
+    predictions = model.predict(vectorizer.transform(normalize_many(texts)))
+    return [p.item() if hasattr(p, 'item') else p for p in predictions]
+
+
+def publish(root, vectorizer, model, make_active=True, compact=True, notes=None):
+    """Write a new immutable version from a fitted vectorizer + model; returns its manifest."""
+    os.makedirs(root, exist_ok=True)
+    staging = os.path.join(root, f'.staging-{uuid.uuid4().hex}')
+    os.makedirs(staging)
+    try:
+        joblib.dump(model, os.path.join(staging, MODEL_FILE))
+        joblib.dump(vectorizer, os.path.join(staging, VECTORIZER_FILE))
+        if compact:
+            from compact_model import DEFAULT_DIR, export_compact
+            export_compact(vectorizer, model, os.path.join(staging, DEFAULT_DIR))
+        files = _checksums(staging)
+        digest = hashlib.sha256(json.dumps(files, sort_keys=True).encode()).hexdigest()
+        created = datetime.utcnow()
+        version = f"{created:%Y%m%d-%H%M%S}-{digest[:8]}"
+        manifest = {
+            'version': version,
+            'createdAt': created.isoformat(),
+            'files': files,
+            'canary': {'texts': CANARY_TEXTS, 'predictions': canary_predictions(vectorizer, model)},
+            'notes': notes
+        }
+        with open(os.path.join(staging, MANIFEST), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.rename(staging, version_dir(root, version))
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    if make_active: activate(root, version)
+    return manifest
+
+
+class ModelWatcher:
+    """Polls CURRENT and calls on_change(version) until it succeeds for the new version.
+
+    A reload that is busy or fails for another reason is retried at the next
+    poll; a version rejected with RegistryError (missing, checksums, canary)
+    is not retried until CURRENT moves again. Like MicroBatcher, the thread
+    is (re)started lazily per process, so each forked serving worker watches
+    for itself.
+    """
+
+    def __init__(self, root, interval, on_change):
+        self.root = root
+        self.interval = interval
+        self.on_change = on_change
+        self.seen = None
+        self.rejected = None
+        self._pid = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self, seen):
+        if self.interval <= 0 or (self._pid == os.getpid() and self._thread.is_alive()): return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive(): return
+            self.seen = seen
+            self._thread = threading.Thread(target=self._loop, name='model-watcher', daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+
+    def _loop(self):
+        while True:
+            time.sleep(self.interval)
+            version = None
+            try:
+                version = current_version(self.root)
+                if version and version not in (self.seen, self.rejected):
+                    self.on_change(version)
+                    self.seen = version
+            except ReloadInProgress:
+                pass  # Another reload is running; look again at the next poll
+            except RegistryError as e:
+                self.rejected = version
+                print(f"⚠️ Model watcher: {version} rejected, keeping the current model: {e}")
+            except Exception as e:
+                print(f"⚠️ Model watcher: {e} (retrying)")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description='Manage versioned model artifacts')
+    parser.add_argument('--root', default=os.environ.get('MODEL_REGISTRY_DIR', os.path.join(here, 'registry')))
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list')
+    publish_cmd = commands.add_parser('publish', help='Publish the pickles next to this file as a new version')
+    publish_cmd.add_argument('--no-activate', action='store_true')
+    publish_cmd.add_argument('--notes')
+    commands.add_parser('activate').add_argument('version')
+    commands.add_parser('verify').add_argument('version', nargs='?')
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        current = current_version(args.root)
+        for manifest in list_versions(args.root):
+            marker = '*' if manifest['version'] == current else ' '
+            print(f"{marker} {manifest['version']}  {manifest['createdAt']}  {len(manifest['files'])} files  {manifest.get('notes') or ''}")
+    elif args.command == 'publish':
+        manifest = publish(args.root, joblib.load(os.path.join(here, VECTORIZER_FILE)),
+                           joblib.load(os.path.join(here, MODEL_FILE)), not args.no_activate, notes=args.notes)
+        print(f"✅ Published {manifest['version']}" + ('' if args.no_activate else ' (active)'))
+    elif args.command == 'activate':
+        print(f"✅ Active version: {activate(args.root, args.version)}")
+    else:
+        version = args.version or current_version(args.root)
+        if not version: raise SystemExit('❌ No version to verify')
+        verify(args.root, version)
+        print(f"✅ {version}: all checksums match")
@@ -0,0 +1,197 @@
+# pipeline.py
+"""Pipelined job engine: parse, score, format and persist overlap.
+
+    parse thread --q--> score thread --q--> format (caller) --q--> persist thread
+                        (up to `inflight` chunks in the pool)
+
+Every queue is bounded, so a stage that falls behind blocks the one feeding
+it (backpressure) and at most queue_size chunks wait between two stages.
+Chunk order is kept end to end. Each stage records time spent working
+(busy), waiting for input (starved) and waiting for room downstream
+(blocked); utilization is busy / wall time, so the slowest stage shows up
+near 1.0 and the others as starved or blocked.
+"""
+import collections
+import queue
+import threading
+import time
+
+STAGES = ('parse', 'score', 'format', 'persist')
+POLL_SECONDS = 0.1
+_DONE = object()
+
+
+class _Stopped(Exception):
+    """Another stage failed; unwind this one."""
+
+
+class StageClock:
+    def __init__(self, name):
+        self.name = name
+        self.busy = 0.0
+        self.starved = 0.0
+        self.blocked = 0.0
+        self.chunks = 0
+
+    def to_dict(self, wall):
+        return {
+            'chunks': self.chunks,
+            'busySeconds': round(self.busy, 4),
+            'starvedSeconds': round(self.starved, 4),
+            'blockedSeconds': round(self.blocked, 4),
+            'utilization': round(min(1.0, self.busy / wall), 3) if wall else 0.0
+        }
+
+
+class Pipeline:
+    """One run of the engine; create a new Pipeline per job.
+
+    - chunks: iterable of text chunks (iterated on the parse thread, so lazy parsing overlaps)
+    - submit(chunk) -> handle, collect(handle) -> results: the scorer (e.g. a pool's
+      submit/wait pair); up to `inflight` handles are outstanding at once
+    - format_chunk(results) -> item: runs on the calling thread, in chunk order
+    - persist(item): runs on the I/O thread, in chunk order (optional)
+    """
+
+    def __init__(self, submit, collect, format_chunk, persist=None, inflight=1, queue_size=4):
+        self.submit = submit
+        self.collect = collect
+        self.format_chunk = format_chunk
+        self.persist = persist
+        self.inflight = max(1, inflight)
+        self.queue_size = max(1, queue_size)
+        self.clocks = {name: StageClock(name) for name in STAGES}
+        self.wall = 0.0
+        self._stop = threading.Event()
+        self._errors = []
+
+    # --- queue helpers: block for backpressure, but give up once another stage failed ---
+
+    def _put(self, q, item, clock):
+        start = time.perf_counter()
+        try:
+            while True:
+                if self._stop.is_set(): raise _Stopped()
+                try:
+                    return q.put(item, timeout=POLL_SECONDS)
+                except queue.Full:
+                    continue
+        finally:
+            clock.blocked += time.perf_counter() - start
+
+    def _get(self, q, clock):
+        start = time.perf_counter()
+        try:
+            while True:
+                if self._stop.is_set(): raise _Stopped()
+                try:
+                    return q.get(timeout=POLL_SECONDS)
+                except queue.Empty:
+                    continue
+        finally:
+            clock.starved += time.perf_counter() - start
+
+    def _thread(self, target, *args):
+        def run():
+            try:
+                target(*args)
+            except _Stopped:
+                pass
+            except BaseException as e:
+                self._errors.append(e)
+                self._stop.set()
+        thread = threading.Thread(target=run, name=f'pipeline-{target.__name__.strip("_")}', daemon=True)
+        thread.start()
+        return thread
+
+    # --- stages ---
+
+    def _parse(self, chunks, out):
+        clock = self.clocks['parse']
+        chunks = iter(chunks)
+        while True:
+            start = time.perf_counter()
+            chunk = next(chunks, _DONE)
+            clock.busy += time.perf_counter() - start
+            if chunk is _DONE: break
+            if not chunk: continue
+            clock.chunks += 1
+            self._put(out, chunk, clock)
+        self._put(out, _DONE, clock)
+
+    def _score(self, inbox, out):
+        clock = self.clocks['score']
+        pending = collections.deque()
+        source_done = False
+        while pending or not source_done:
+            # Collect the oldest chunk when the pool is full, the input is drained, or nothing is ready to submit
+            if pending and (len(pending) >= self.inflight or source_done or inbox.empty()):
+                start = time.perf_counter()
+                results = self.collect(pending.popleft())
+                clock.busy += time.perf_counter() - start
+                clock.chunks += 1
+                self._put(out, results, clock)
+                continue
+            chunk = self._get(inbox, clock)
+            if chunk is _DONE:
+                source_done = True
+                continue
+            start = time.perf_counter()
+            pending.append(self.submit(chunk))
+            clock.busy += time.perf_counter() - start
+        self._put(out, _DONE, clock)
+
+    def _persist(self, inbox):
+        clock = self.clocks['persist']
+        while True:
+            item = self._get(inbox, clock)
+            if item is _DONE: return
+            start = time.perf_counter()
+            self.persist(item)
+            clock.busy += time.perf_counter() - start
+            clock.chunks += 1
+
+    def run(self, chunks):
+        """Drive every stage to completion; re-raises the first stage error."""
+        started = time.perf_counter()
+        parsed, scored = queue.Queue(self.queue_size), queue.Queue(self.queue_size)
+        to_persist = queue.Queue(self.queue_size) if self.persist else None
+        threads = [self._thread(self._parse, chunks, parsed), self._thread(self._score, parsed, scored)]
+        if to_persist is not None:
+            threads.append(self._thread(self._persist, to_persist))
+
+        clock = self.clocks['format']
+        try:
+            while True:
+                results = self._get(scored, clock)
+                if results is _DONE: break
+                start = time.perf_counter()
+                item = self.format_chunk(results)
+                clock.busy += time.perf_counter() - start
+                clock.chunks += 1
+                if to_persist is not None: self._put(to_persist, item, clock)
+            if to_persist is not None: self._put(to_persist, _DONE, clock)
+        except _Stopped:
+            pass
+        except BaseException as e:
+            self._errors.append(e)
+            self._stop.set()
+        finally:
+            if self._errors: self._stop.set()
+            for thread in threads:
+                thread.join()
+            self.wall = time.perf_counter() - started
+        if self._errors: raise self._errors[0]
+        return self
+
+    def report(self):
+        """Per-stage utilization plus the bottleneck (the busiest stage)."""
+        stages = {name: clock.to_dict(self.wall) for name, clock in self.clocks.items()
+                  if name != 'persist' or self.persist}
+        return {
+            'wallSeconds': round(self.wall, 4),
+            'inflight': self.inflight,
+            'queueSize': self.queue_size,
+            'bottleneck': max(stages, key=lambda name: stages[name]['busySeconds']),
+            'stages': stages
+        }
@@ -0,0 +1,141 @@
+# postings.py
+"""Inverted index over stored result lines, for cross-job line search.
+
+Postings are built from the cleaned text the engine already produced (the
+normalize() tokens: lowercase [a-z0-9] runs, stopwords removed) each time a
+result chunk is sealed (see result_store.ChunkWriter). There is one document
+per (term, result chunk), with parallel arrays holding, for every line of
+that chunk containing the term:
+
+    {"term": "battery", "jobId": ObjectId, "startLine": 1001,
+     "lines": [1004, 1090], "labels": [0, 2], "confidences": [0.91, 0.64]}
+
+labels use the response_format.LABELS codes (0 negative, 1 neutral,
+2 positive). Queries resolve the user's jobs in the date range first (the
+processingjobs userId/createdAt index), then match postings on
+{term, jobId}, so the work grows with the hits, not with the corpus.
+
+    python postings.py --backfill [--job JOB_ID]   # index jobs stored before postings existed
+"""
+from bson import ObjectId
+
+from response_format import LABELS
+from text_normalizer import normalize
+
+POSTINGS_COLLECTION = 'resultpostings'
+LABEL_CODES = {label: code for code, label in enumerate(LABELS)}
+MAX_QUERY_TERMS = 8
+MAX_SEARCH_JOBS = 5000  # Newest jobs considered per query
+
+
+def chunk_postings(job_id, lines):
+    """Posting documents for one chunk of formatted result lines."""
+    index = {}
+    for line in lines:
+        metadata = line.get('metadata') or {}
+        terms = set((metadata.get('cleanedText') or '').split())
+        if not terms: continue
+        label = LABEL_CODES.get(line.get('sentimentLabel'), LABEL_CODES['neutral'])
+        confidence = round(float(metadata.get('confidence') or 0.0), 4)
+        for term in terms:
+            posting = index.get(term)
+            if posting is None:
+                posting = index[term] = ([], [], [])
+            posting[0].append(line['lineNumber'])
+            posting[1].append(label)
+            posting[2].append(confidence)
+    start_line = lines[0]['lineNumber'] if lines else 1
+    return [{'term': term, 'jobId': job_id, 'startLine': start_line,
+             'lines': numbers, 'labels': labels, 'confidences': confidences}
+            for term, (numbers, labels, confidences) in index.items()]
+
+
+def query_terms(text):
+    """Query text -> index terms, normalized exactly like indexed lines."""
+    terms = list(dict.fromkeys(normalize(text).split()))
+    if len(terms) > MAX_QUERY_TERMS:
+        raise ValueError(f"At most {MAX_QUERY_TERMS} search terms")
+    return terms
+
+
+class PostingStore:
+    def __init__(self, client, db_name='text_processor'):
+        self.collection = client[db_name][POSTINGS_COLLECTION]
+        self._indexed = False
+
+    def ensure_indexes(self):
+        if not self._indexed:
+            self.collection.create_index([('term', 1), ('jobId', 1), ('startLine', 1)])
+            self.collection.create_index([('jobId', 1)])
+            self._indexed = True
+
+    def delete(self, job_id):
+        self.collection.delete_many({'jobId': ObjectId(job_id)})
+
+    def search(self, terms, job_ids, match='all', labels=None, min_confidence=None, skip=0, limit=20):
+        """(total, page) of {jobId, lineNumber, sentimentLabel, confidence, terms}, newest job first.
+
+        match='all' needs every term on the line, 'any' at least one.
+        """
+        if not terms or not job_ids: return 0, []
+        codes = [LABEL_CODES[label] for label in labels or ()]
+        pipeline = [{'$match': {'term': {'$in': terms}, 'jobId': {'$in': job_ids},
+                                **({'labels': {'$in': codes}} if codes else {})}},
+                    {'$project': {'_id': 0, 'term': 1, 'jobId': 1, 'lines': 1, 'labels': 1, 'confidences': 1}},
+                    {'$unwind': {'path': '$lines', 'includeArrayIndex': 'i'}},
+                    {'$project': {'term': 1, 'jobId': 1, 'line': '$lines',
+                                  'label': {'$arrayElemAt': ['$labels', '$i']},
+                                  'confidence': {'$arrayElemAt': ['$confidences', '$i']}}}]
+        line_filter = {}
+        if codes: line_filter['label'] = {'$in': codes}
+        if min_confidence is not None: line_filter['confidence'] = {'$gte': min_confidence}
+        if line_filter: pipeline.append({'$match': line_filter})
+        if len(terms) > 1:  # One row per line, with the terms it matched
+            pipeline.append({'$group': {'_id': {'jobId': '$jobId', 'line': '$line'}, 'terms': {'$addToSet': '$term'},
+                                        'label': {'$first': '$label'}, 'confidence': {'$first': '$confidence'}}})
+            if match == 'all': pipeline.append({'$match': {'terms': {'$size': len(terms)}}})
+            pipeline.append({'$project': {'_id': 0, 'jobId': '$_id.jobId', 'line': '$_id.line',
+                                          'label': 1, 'confidence': 1, 'terms': 1}})
+        pipeline.append({'$facet': {
+            'total': [{'$count': 'lines'}],
+            'page': [{'$sort': {'jobId': -1, 'line': 1}}, {'$skip': skip}, {'$limit': limit}]
+        }})
+        facets = next(self.collection.aggregate(pipeline, allowDiskUse=True))
+        total = facets['total'][0]['lines'] if facets['total'] else 0
+        page = [{'jobId': str(row['jobId']), 'lineNumber': row['line'], 'sentimentLabel': LABELS[row['label']],
+                 'confidence': row['confidence'], 'terms': sorted(row.get('terms') or [row.get('term')])}
+                for row in facets['page']]
+        return total, page
+
+
+def backfill(client, job_id=None, db_name='text_processor'):
+    """Index completed chunked jobs that have no postings yet (or re-index one job)."""
+    from result_store import RESULTS_COLLECTION
+    db = client[db_name]
+    store = PostingStore(client, db_name)
+    store.ensure_indexes()
+    match = {'_id': ObjectId(job_id)} if job_id else {'status': 'completed', 'resultChunks.collection': RESULTS_COLLECTION}
+    for job in db.processingjobs.find(match, {'_id': 1}):
+        if job_id: store.delete(job_id)
+        elif store.collection.find_one({'jobId': job['_id']}, {'_id': 1}): continue
+        docs = 0
+        for chunk in db[RESULTS_COLLECTION].find({'jobId': job['_id']}, {'lines': 1}).sort('startLine', 1):
+            postings = chunk_postings(job['_id'], chunk['lines'])
+            if postings: store.collection.insert_many(postings, ordered=False)
+            docs += len(postings)
+        print(f"✅ Indexed job {job['_id']} ({docs} postings)")
+
+
+if __name__ == '__main__':
+    import argparse
+    import os
+
+    import pymongo
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description='Build line postings for stored results')
+    parser.add_argument('--backfill', action='store_true', required=True)
+    parser.add_argument('--job', help='Re-index only this job')
+    args = parser.parse_args()
+    backfill(pymongo.MongoClient(os.environ.get('MONGO_URI', 'mongodb://localhost:27017')), args.job)
@@ -0,0 +1,171 @@
+# prediction_cache.py
+import hashlib
+import json
+import multiprocessing as mp
+import os
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+
+ENTRY_OVERHEAD_BYTES = 160  # OrderedDict node + value tuple, roughly
+KEYWORD_BYTES = 72  # (term, weight) pair; terms are shared vocabulary strings
+
+
+def file_fingerprint(*paths):
+    """sha256 over the artifact files; changes whenever a pickle is replaced."""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+class PredictionCache:
+    """Memory-bounded LRU of cleaned text -> (label, score, confidence, keywords).
+
+    Entries are tied to a model fingerprint. Lookups may name another
+    fingerprint (a job still running on the previous model version after a
+    hot reload); entries of retired versions simply age out of the LRU, and
+    their persisted rows are dropped at the next start.
+    With sqlite_path set, entries are also persisted so restarts stay warm.
+    Hit/miss counters live in shared memory (create the cache before forking
+    the worker pool) so /cache/stats covers every worker.
+    """
+
+    def __init__(self, fingerprint, max_bytes=64 * 1024 * 1024, sqlite_path=None):
+        self.fingerprint = fingerprint
+        self.max_bytes = max_bytes
+        self.sqlite_path = sqlite_path
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._counters = {name: mp.Value('q', 0) for name in ('hits', 'misses', 'diskHits', 'deduplicated', 'evictions')}
+        self._db = None
+        self._db_pid = None
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+        if sqlite_path:
+            self._connect().execute('DELETE FROM predictions WHERE fingerprint != ?', (fingerprint,))
+            self._db.commit()
+
+    # ----- persistence -----
+    def _connect(self):
+        # sqlite connections must not cross a fork: each process opens its own
+        if self._db is None or self._db_pid != os.getpid():
+            self._db = sqlite3.connect(self.sqlite_path, timeout=30, check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+            columns = [row[1] for row in self._db.execute('PRAGMA table_info(predictions)')]
+            if columns and 'keywords' not in columns:
+                self._db.execute('DROP TABLE predictions')  # Pre-keyword layout; it's only a cache
+            self._db.execute('''CREATE TABLE IF NOT EXISTS predictions (
+                fingerprint TEXT, text TEXT, label TEXT, score REAL, confidence REAL, keywords TEXT,
+                PRIMARY KEY (fingerprint, text))''')
+            self._db_pid = os.getpid()
+        return self._db
+
+    def _after_fork(self):
+        # A thread of the parent may have held the lock at fork time
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+
+    def _disk_get(self, keys, fingerprint):
+        found = {}
+        with self._db_lock:
+            found.update(self._disk_select(keys, fingerprint))
+        return found
+
+    def _disk_select(self, keys, fingerprint):
+        found = {}
+        db = self._connect()
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            rows = db.execute(
+                f"SELECT text, label, score, confidence, keywords FROM predictions "
+                f"WHERE fingerprint = ? AND text IN ({','.join('?' * len(batch))})",
+                [fingerprint, *batch])
+            for text, label, score, confidence, keywords in rows:
+                found[text] = (label, score, confidence, tuple(map(tuple, json.loads(keywords or '[]'))))
+        return found
+
+    def _disk_put(self, items, fingerprint):
+        with self._db_lock:
+            db = self._connect()
+            db.executemany('INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?, ?, ?)',
+                           [(fingerprint, text, label, score, confidence, json.dumps(keywords))
+                            for text, (label, score, confidence, keywords) in items.items()])
+            db.commit()
+
+    # ----- LRU -----
+    def _count(self, name, n):
+        if n:
+            counter = self._counters[name]
+            with counter.get_lock():
+                counter.value += n
+
+    @staticmethod
+    def _entry_bytes(key, value):
+        return sys.getsizeof(key[1]) + ENTRY_OVERHEAD_BYTES + KEYWORD_BYTES * len(value[3])
+
+    def _store(self, key, value):
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return
+        self._entries[key] = value
+        self._bytes += self._entry_bytes(key, value)
+        evicted = 0
+        while self._bytes > self.max_bytes and self._entries:
+            old_key, old_value = self._entries.popitem(last=False)
+            self._bytes -= self._entry_bytes(old_key, old_value)
+            evicted += 1
+        self._count('evictions', evicted)
+
+    def get_many(self, keys, fingerprint=None):
+        """Cached values for the (already deduplicated) keys that have one."""
+        fingerprint = fingerprint or self.fingerprint
+        found = {}
+        with self._lock:
+            for key in keys:
+                value = self._entries.get((fingerprint, key))
+                if value is not None:
+                    self._entries.move_to_end((fingerprint, key))
+                    found[key] = value
+        missing = [k for k in keys if k not in found]
+        if missing and self.sqlite_path:
+            on_disk = self._disk_get(missing, fingerprint)
+            with self._lock:
+                for key, value in on_disk.items():
+                    self._store((fingerprint, key), value)
+            found.update(on_disk)
+            self._count('diskHits', len(on_disk))
+        self._count('hits', len(found))
+        self._count('misses', len(keys) - len(found))
+        return found
+
+    def put_many(self, items, fingerprint=None):
+        fingerprint = fingerprint or self.fingerprint
+        with self._lock:
+            for key, value in items.items():
+                self._store((fingerprint, key), value)
+        if items and self.sqlite_path:
+            self._disk_put(items, fingerprint)
+
+    def record_deduplicated(self, n):
+        self._count('deduplicated', n)
+
+    def stats(self):
+        # Counters are shared by all workers; entries/bytes describe this process's LRU
+        counters = {name: value.value for name, value in self._counters.items()}
+        lookups = counters['hits'] + counters['misses']
+        return {
+            'fingerprint': self.fingerprint,
+            **counters,
+            'hitRate': round(counters['hits'] / lookups, 4) if lookups else 0.0,
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'maxBytes': self.max_bytes,
+            'persistent': bool(self.sqlite_path)
+        }
@@ -0,0 +1,133 @@
+# profiler.py
+"""Low-overhead sampling profiler for capturing one job in production.
+
+A background thread snapshots every other thread's stack (sys._current_frames)
+every `interval` seconds. Nothing is traced in between, so the profiled job
+runs at close to full speed. Work done inside forked pool workers appears as
+time spent waiting in WorkerPool.map; the per-stage metrics cover that side.
+Idle threads (Flask's server loop, pool bookkeeping) are left out: a thread is
+sampled only if its stack passes through a file under `source_dir`.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+class SamplingProfiler:
+    def __init__(self, interval=0.005, max_depth=64, source_dir=SOURCE_DIR):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.source_dir = source_dir
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._started = None
+        self._elapsed = 0.0
+
+    def _sample(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own: continue
+                stack, ours = [], False
+                while frame is not None and len(stack) < self.max_depth:
+                    ours = ours or frame.f_code.co_filename.startswith(self.source_dir)
+                    stack.append(_frame_name(frame))
+                    frame = frame.f_back
+                if ours:
+                    self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._elapsed = time.perf_counter() - self._started
+        return self
+
+    def report(self, top=25):
+        """Collapsed stacks (flamegraph.pl / speedscope input) plus the hottest frames."""
+        self_counts, total_counts = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(';')
+            self_counts[frames[-1]] += count
+            for frame in set(frames):
+                total_counts[frame] += count
+        snapshots = sum(self.stacks.values()) or 1
+        return {
+            'intervalMs': self.interval * 1000,
+            'durationMs': int(self._elapsed * 1000),
+            'samples': self.samples,
+            'topSelf': [{'frame': f, 'samples': n, 'percent': round(100 * n / snapshots, 1)}
+                        for f, n in self_counts.most_common(top)],
+            'topTotal': [{'frame': f, 'samples': n, 'percent': round(100 * n / snapshots, 1)}
+                         for f, n in total_counts.most_common(top)],
+            'collapsed': '\n'.join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+        }
+
+
+class JobProfiler:
+    """Arm once, profile the next job that starts, keep its report until re-armed."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.armed_interval = None
+        self.last = None
+
+    def arm(self, interval=0.005):
+        with self._lock:
+            self.armed_interval = interval
+            self.last = None
+
+    def disarm(self):
+        with self._lock:
+            self.armed_interval = None
+
+    def claim(self):
+        """The armed interval if this caller gets to profile its job, else None."""
+        with self._lock:
+            interval, self.armed_interval = self.armed_interval, None
+            return interval
+
+    def capture(self, job_id):
+        return _Capture(self, job_id)
+
+    def status(self):
+        return {'armed': self.armed_interval is not None, 'profile': self.last}
+
+
+class _Capture:
+    def __init__(self, owner, job_id):
+        self.owner = owner
+        self.job_id = job_id
+        self.profiler = None
+
+    def __enter__(self):
+        interval = self.owner.claim()
+        if interval is not None:
+            self.profiler = SamplingProfiler(interval).start()
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if self.profiler is not None:
+            report = self.profiler.stop().report()
+            report.update({'jobId': self.job_id, 'failed': exc_type is not None,
+                           'capturedAt': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())})
+            self.owner.last = report
+        return False
@@ -0,0 +1,93 @@
+# response_format.py
+"""Columnar encoding of processing results, plus gzip / msgpack bodies.
+
+The row shape (see format_result) repeats per-line constants and nests
+metadata. The columnar shape keeps one array per selected field, stores
+labels as small integer codes, and hoists per-job constants:
+
+    {"format": "columnar", "version": 1, "length": 3, "startLine": 1,
+     "fields": ["sentimentLabel", "confidence"],
+     "labels": ["negative", "neutral", "positive"],
+     "constants": {"patternsFound": ["ml_prediction"], "processId": 4242,
+                   "modelVersion": "20261017-142501-3fa9c2d1"},
+     "columns": {"sentimentLabel": [2, 0, 1], "confidence": [0.91, 0.77, 0.52]}}
+
+lineNumber is implied by startLine + index. The Node client
+(python-integration.service.js, decodeColumnar) rebuilds rows from this.
+"""
+import gzip
+import json
+
+try:
+    import msgpack
+except ImportError:  # Optional: only needed for encoding=msgpack
+    msgpack = None
+
+FORMAT_VERSION = 1
+LABELS = ('negative', 'neutral', 'positive')
+# Column name -> (path into a formatted row)
+FIELDS = {
+    'originalText': ('originalText',),
+    'sentimentScore': ('sentimentScore',),
+    'sentimentLabel': ('sentimentLabel',),
+    'keywords': ('keywords',),
+    'confidence': ('metadata', 'confidence'),
+    'cleanedText': ('metadata', 'cleanedText'),
+    'modelVersion': ('metadata', 'modelVersion')
+}
+DEFAULT_FIELDS = ('originalText', 'sentimentScore', 'sentimentLabel', 'keywords', 'confidence')
+ENCODINGS = ('json', 'gzip', 'msgpack')
+GZIP_MIN_BYTES = 64 * 1024
+
+
+def select_fields(fields):
+    """Validated field list (known names only, request order); None means the defaults."""
+    if not fields: return list(DEFAULT_FIELDS)
+    if isinstance(fields, str): fields = fields.split(',')
+    unknown = [f for f in fields if f not in FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)} (choose from {', '.join(FIELDS)})")
+    return list(dict.fromkeys(fields))
+
+
+def to_columnar(rows, fields=None):
+    """Formatted result rows -> columnar dict with only `fields`."""
+    fields = select_fields(fields)
+    label_codes = {label: code for code, label in enumerate(LABELS)}
+    columns = {}
+    for field in fields:
+        path = FIELDS[field]
+        if len(path) == 1:
+            values = [row.get(path[0]) for row in rows]
+        else:
+            values = [row.get(path[0], {}).get(path[1]) for row in rows]
+        if field == 'sentimentLabel':
+            values = [label_codes.get(v, 1) for v in values]
+        columns[field] = values
+    first = rows[0] if rows else {}
+    return {
+        'format': 'columnar',
+        'version': FORMAT_VERSION,
+        'length': len(rows),
+        'startLine': first.get('lineNumber', 1),
+        'fields': fields,
+        'labels': list(LABELS),
+        'constants': {
+            'patternsFound': first.get('patternsFound', ['ml_prediction']),
+            'processId': first.get('metadata', {}).get('processId'),
+            'modelVersion': first.get('metadata', {}).get('modelVersion')
+        },
+        'columns': columns
+    }
+
+
+def encode(payload, encoding='json', accepts_gzip=False):
+    """(body bytes, content type, extra headers) for a response payload."""
+    if encoding == 'msgpack':
+        if msgpack is None:
+            raise RuntimeError('msgpack encoding requested but msgpack is not installed')
+        return msgpack.packb(payload, use_bin_type=True), 'application/msgpack', {}
+    body = json.dumps(payload, separators=(',', ':'), default=str).encode('utf-8')
+    if encoding == 'gzip' or (accepts_gzip and len(body) >= GZIP_MIN_BYTES):
+        return gzip.compress(body, compresslevel=5), 'application/json', {'Content-Encoding': 'gzip', 'Vary': 'Accept-Encoding'}
+    return body, 'application/json', {}
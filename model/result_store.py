@@ -0,0 +1,138 @@
+# result_store.py
+from datetime import datetime
+
+from bson import ObjectId
+
+from postings import PostingStore, chunk_postings
+
+RESULTS_COLLECTION = 'processingresults'
+MAX_CHUNK_BYTES = 8 * 1024 * 1024  # Well under Mongo's 16MB document limit
+LINE_OVERHEAD_BYTES = 400  # BSON field names, numbers, metadata and ObjectIds of one formatted line
+
+
+class ChunkWriter:
+    """Buffers formatted result lines and writes them as chunk documents.
+
+    A chunk is sealed at chunk_size lines, or earlier once its approximate
+    BSON size reaches max_chunk_bytes, so long lines cannot push a document
+    past Mongo's limit. Lines must arrive in lineNumber order. Full chunks
+    are batched into one unordered insert_many every `flush_every` chunks,
+    together with their postings when the store keeps a line index (see
+    postings.py).
+    """
+
+    def __init__(self, store, job_id, flush_every=8):
+        self.store = store
+        self.job_id = ObjectId(job_id)
+        self.flush_every = flush_every
+        self.chunk_count = 0
+        self.stored_lines = 0
+        self._lines = []
+        self._bytes = 0
+        self._docs = []
+        self._postings = []
+
+    def add(self, results):
+        size, max_bytes = self.store.chunk_size, self.store.max_chunk_bytes
+        for result in results:
+            line_bytes = encoded_size(result)
+            if self._lines and self._bytes + line_bytes > max_bytes:
+                self._seal()
+            self._lines.append(result)
+            self._bytes += line_bytes
+            if len(self._lines) == size:
+                self._seal()
+        if len(self._docs) >= self.flush_every:
+            self.flush()
+
+    def _seal(self):
+        if not self._lines: return
+        self._docs.append({
+            'jobId': self.job_id,
+            'chunkIndex': self.chunk_count,
+            'startLine': self._lines[0]['lineNumber'],
+            'endLine': self._lines[-1]['lineNumber'],
+            'lines': self._lines,
+            'createdAt': datetime.utcnow()
+        })
+        if self.store.postings: self._postings.extend(chunk_postings(self.job_id, self._lines))
+        self.chunk_count += 1
+        self.stored_lines += len(self._lines)
+        self._lines = []
+        self._bytes = 0
+
+    def flush(self):
+        if self._docs:
+            self.store.collection.insert_many(self._docs, ordered=False)
+            self._docs = []
+        if self._postings:
+            self.store.postings.collection.insert_many(self._postings, ordered=False)
+            self._postings = []
+
+    def close(self):
+        """Write the trailing partial chunk; returns the job's chunk index."""
+        self._seal()
+        self.flush()
+        return self.index()
+
+    def index(self):
+        return {
+            'collection': RESULTS_COLLECTION,
+            'chunkSize': self.store.chunk_size,
+            'maxChunkBytes': self.store.max_chunk_bytes,
+            'chunkCount': self.chunk_count,
+            'storedLines': self.stored_lines
+        }
+
+
+def encoded_size(line):
+    """Approximate BSON bytes of one formatted result line (the texts dominate)."""
+    metadata = line.get('metadata') or {}
+    return (LINE_OVERHEAD_BYTES + len(line.get('originalText', '').encode('utf-8'))
+            + len(metadata.get('cleanedText', '').encode('utf-8'))
+            + sum(len(keyword) + 16 for keyword in line.get('keywords', ())))
+
+
+class ResultStore:
+    """Result lines live in RESULTS_COLLECTION, at most chunk_size lines (and about
+    max_chunk_bytes) per document, so a job document only carries aggregates
+    and a small chunk index. Chunks are looked up by startLine/endLine."""
+
+    def __init__(self, client, chunk_size=1000, db_name='text_processor', postings=True,
+                 max_chunk_bytes=MAX_CHUNK_BYTES):
+        self.chunk_size = chunk_size
+        self.max_chunk_bytes = max_chunk_bytes
+        self.collection = client[db_name][RESULTS_COLLECTION]
+        self.postings = PostingStore(client, db_name) if postings else None
+        self._indexed = False
+
+    def ensure_indexes(self):
+        if not self._indexed:
+            self.collection.create_index([('jobId', 1), ('startLine', 1)], unique=True)
+            if self.postings: self.postings.ensure_indexes()
+            self._indexed = True
+
+    def writer(self, job_id, flush_every=8):
+        """Fresh writer for a job; chunks from an earlier attempt are dropped."""
+        self.ensure_indexes()
+        self.delete(job_id)
+        return ChunkWriter(self, job_id, flush_every)
+
+    def write_all(self, job_id, results):
+        writer = self.writer(job_id)
+        writer.add(results)
+        return writer.close()
+
+    def read(self, job_id, start_line=1, limit=100):
+        """Lines [start_line, start_line + limit) of a job, in order."""
+        end_line = start_line + limit - 1
+        cursor = self.collection.find(
+            {'jobId': ObjectId(job_id), 'startLine': {'$lte': end_line}, 'endLine': {'$gte': start_line}},
+            {'lines': 1, '_id': 0}
+        ).sort('startLine', 1)
+        return [line for doc in cursor for line in doc['lines']
+                if start_line <= line['lineNumber'] <= end_line]
+
+    def delete(self, job_id):
+        self.collection.delete_many({'jobId': ObjectId(job_id)})
+        if self.postings: self.postings.delete(job_id)
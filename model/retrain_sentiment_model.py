@@ -1,76 +1,258 @@
+import argparse
+import itertools
+import os
+import time
+from collections import Counter
+
 import pandas as pd
 import joblib
-import re
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
-from sklearn.model_selection import train_test_split
+import numpy as np
+from scipy.sparse import vstack
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.metrics import classification_report
-from nltk.corpus import stopwords
+from text_normalizer import load_stop_words, normalize as smart_clean_text, normalize_many
+from compact_model import export_compact, load_compact, verify, DEFAULT_DIR
+from worker_pool import WorkerPool
+import model_registry
 import nltk
 
-nltk.download('stopwords')
-
-def smart_clean_text(text):
-    if pd.isna(text): return ""
-    text = str(text).lower()
-    # Keep letters AND numbers
-    text = re.sub(r'[^a-zA-Z0-9\s]', ' ', text)
-    text = re.sub(r'\s+', ' ', text).strip()
-    
-    # Custom Stopwords (Keep Negations)
-    stop_words = set(stopwords.words('english'))
-    negations = {'no', 'not', 'nor', 'never', 'none', 'neither'}
-    stop_words = stop_words - negations
-    
-    words = text.split()
-    words = [word for word in words if word not in stop_words]
-    return ' '.join(words)
-
-# 1. Load the new balanced data
-print("Loading data...")
-df = pd.read_csv('sentiment_training_data.csv')
-df['cleaned_text'] = df['text'].apply(smart_clean_text)
-
-X = df['cleaned_text']
-y = df['label']
-
-# 2. Vectorizer Upgrade
-print("Vectorizing...")
-vectorizer = TfidfVectorizer(
-    max_features=2500,
-    min_df=1,
-    ngram_range=(1, 3),       # Trigrams for sarcasm
-    token_pattern=r'(?u)\b\w+\b', # <--- CRITICAL FIX: Allows single digits (e.g. "7")
-    use_idf=True
-)
-
-X_vec = vectorizer.fit_transform(X)
-
-# 3. Train Model
-print("Training...")
-model = LogisticRegression(
-    max_iter=1000,
-    random_state=42,
-    class_weight='balanced'
-)
-
-model.fit(X_vec, y)
-
-# 4. Save
-joblib.dump(model, 'sentiment_model.pkl')
-joblib.dump(vectorizer, 'tfidf_vectorizer.pkl')
-print("✅ New Model & Vectorizer Saved!")
-
-# 5. Quick Verification
-test_sentences = [
-    "The interface is beautiful",   # Bias Check
-    "Rated 7 out of 10",            # Number Check
-    "Great job breaking it"         # Sarcasm Check
-]
-print("\n--- Final Verification ---")
-label_map = {0: 'Negative', 1: 'Positive', 2: 'Neutral'}
-for t in test_sentences:
-    cleaned = smart_clean_text(t)
-    vec = vectorizer.transform([cleaned])
-    pred = model.predict(vec)[0]
-    print(f"'{t}' -> {label_map[pred]}")
\ No newline at end of file
+TOKEN_PATTERN = r'(?u)\b\w+\b'  # <--- CRITICAL FIX: Allows single digits (e.g. "7")
+NGRAM_RANGE = (1, 3)            # Trigrams for sarcasm
+MAX_FEATURES = 2500
+VOCAB_CANDIDATES = 2_000_000    # Distinct n-grams tracked in pass 1 before the rarest are pruned
+HOLDOUT_EVERY = 10              # Out-of-core: every 10th row is held out for evaluation
+HOLDOUT_MAX = 50_000
+
+
+def train_in_memory(csv_path, max_features=MAX_FEATURES):
+    """The original pipeline: whole CSV in RAM, TF-IDF + LogisticRegression on one core."""
+    # 1. Load the new balanced data
+    print("Loading data...")
+    df = pd.read_csv(csv_path)
+    df['cleaned_text'] = normalize_many(df['text'])
+
+    X = df['cleaned_text']
+    y = df['label']
+
+    # 2. Vectorizer Upgrade
+    print("Vectorizing...")
+    vectorizer = TfidfVectorizer(
+        max_features=max_features,
+        min_df=1,
+        ngram_range=NGRAM_RANGE,
+        token_pattern=TOKEN_PATTERN,
+        use_idf=True
+    )
+
+    X_vec = vectorizer.fit_transform(X)
+
+    # 3. Train Model
+    print("Training...")
+    model = LogisticRegression(
+        max_iter=1000,
+        random_state=42,
+        class_weight='balanced'
+    )
+
+    model.fit(X_vec, y)
+    return vectorizer, model, df['cleaned_text'].tolist()
+
+
+# ----- Out-of-core mode -----
+# Pool workers are forked after these globals are set, so they inherit them
+_counter = None
+_vectorizer = None
+
+
+def iter_corpus(csv_path, chunk_size):
+    """(texts, labels) chunks of the training CSV; only the two columns are parsed."""
+    for frame in pd.read_csv(csv_path, usecols=['text', 'label'], chunksize=chunk_size):
+        yield frame['text'].tolist(), frame['label'].to_numpy()
+
+
+def _count_chunk(chunk):
+    """Pass 1 worker: clean a chunk, then n-gram term and document frequencies."""
+    texts, labels = chunk
+    cleaned = normalize_many(texts)
+    counts = _counter.fit_transform(cleaned)
+    names = _counter.get_feature_names_out().tolist()
+    tf = np.asarray(counts.sum(axis=0)).ravel().tolist()
+    df = np.bincount(counts.indices, minlength=counts.shape[1]).tolist()
+    return dict(zip(names, tf)), dict(zip(names, df)), Counter(labels.tolist()), len(texts)
+
+
+def _vectorize_chunk(chunk):
+    """Pass 2 worker: clean and TF-IDF a chunk with the fixed vocabulary."""
+    texts, labels = chunk
+    cleaned = normalize_many(texts)
+    return _vectorizer.transform(cleaned), labels, cleaned
+
+
+def _map_windows(pool, func, chunks):
+    # At most one chunk per worker (times two) is read ahead, so memory tracks chunk size
+    chunks = iter(chunks)
+    while True:
+        window = list(itertools.islice(chunks, pool.processes * 2))
+        if not window: return
+        yield from pool.map(func, window)
+
+
+def _start_pool(workers):
+    load_stop_words()  # Loaded once here and inherited, not once per row or per worker
+    return WorkerPool(workers).start()
+
+
+def _prune(tf, df, keep):
+    """Keep the `keep` most frequent candidates (approximate once pruning has happened)."""
+    survivors = sorted(tf, key=tf.get, reverse=True)[:keep]
+    return {t: tf[t] for t in survivors}, {t: df[t] for t in survivors}
+
+
+def build_vocabulary(csv_path, chunk_size, workers, max_features=MAX_FEATURES):
+    """Pass 1: TfidfVectorizer with the top max_features n-grams and their IDF, plus label counts."""
+    global _counter
+    _counter = CountVectorizer(ngram_range=NGRAM_RANGE, token_pattern=TOKEN_PATTERN)
+    tf, df, labels, n_docs = Counter(), Counter(), Counter(), 0
+    pool = _start_pool(workers)
+    try:
+        for chunk_tf, chunk_df, chunk_labels, rows in _map_windows(pool, _count_chunk, iter_corpus(csv_path, chunk_size)):
+            tf.update(chunk_tf)
+            df.update(chunk_df)
+            labels.update(chunk_labels)
+            n_docs += rows
+            if len(tf) > VOCAB_CANDIDATES:
+                tf, df = map(Counter, _prune(tf, df, VOCAB_CANDIDATES // 2))
+    finally:
+        pool.shutdown()
+
+    # Same selection as TfidfVectorizer(max_features=...): highest corpus frequency, indices in term order
+    terms = sorted(sorted(tf, key=lambda t: (-tf[t], t))[:max_features])
+    vectorizer = TfidfVectorizer(vocabulary={t: i for i, t in enumerate(terms)},
+                                 ngram_range=NGRAM_RANGE, token_pattern=TOKEN_PATTERN, use_idf=True)
+    vectorizer.idf_ = np.log((1 + n_docs) / (1 + np.array([df[t] for t in terms], dtype=np.float64))) + 1
+    return vectorizer, labels, n_docs
+
+
+def train_out_of_core(csv_path, chunk_size=50_000, workers=None, epochs=3, max_features=MAX_FEATURES, seed=42):
+    """Two streaming passes over the CSV with cleaning/vectorizing spread over a process pool.
+
+    Pass 1 picks the vocabulary and IDF; pass 2 (repeated per epoch) fits an
+    SGD logistic regression with partial_fit. The result is a regular
+    TfidfVectorizer + linear classifier, so the API loads it unchanged.
+    """
+    global _vectorizer
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+
+    print(f"Pass 1: vocabulary ({workers} workers, chunks of {chunk_size})...")
+    _vectorizer, label_counts, n_docs = build_vocabulary(csv_path, chunk_size, workers, max_features)
+    vocab_seconds = time.perf_counter() - started
+    print(f"   {n_docs} rows, {len(_vectorizer.vocabulary_)} features in {vocab_seconds:.1f}s "
+          f"({n_docs / vocab_seconds:,.0f} rows/s)")
+
+    # class_weight='balanced' computed from the pass 1 counts (partial_fit cannot compute it)
+    classes = np.array(sorted(label_counts))
+    class_weight = {c: n_docs / (len(classes) * label_counts[c]) for c in classes}
+    model = SGDClassifier(loss='log_loss', alpha=1e-5, class_weight=class_weight, random_state=seed)
+    rng = np.random.default_rng(seed)
+    holdout_X, holdout_y, holdout_texts = [], [], []
+    holdout_end = 0  # Rows before this index were sampled for the holdout (it stops at HOLDOUT_MAX)
+
+    pool = _start_pool(workers)  # Forked after the vocabulary exists
+    try:
+        for epoch in range(epochs):
+            epoch_start = time.perf_counter()
+            rows = 0
+            for X, y, cleaned in _map_windows(pool, _vectorize_chunk, iter_corpus(csv_path, chunk_size)):
+                index = np.arange(rows, rows + len(y))
+                collect = epoch == 0 and sum(map(len, holdout_y)) < HOLDOUT_MAX
+                if collect: holdout_end = rows + len(y)
+                # Only rows that actually went into the holdout are kept out of training
+                held = (index % HOLDOUT_EVERY == 0) & (index < holdout_end)
+                if collect:
+                    holdout_X.append(X[held])
+                    holdout_y.append(y[held])
+                    holdout_texts.extend(t for t, h in zip(cleaned, held) if h)
+                train = np.flatnonzero(~held)
+                rng.shuffle(train)
+                model.partial_fit(X[train], y[train], classes=classes)
+                rows += len(y)
+            seconds = time.perf_counter() - epoch_start
+            accuracy = model.score(*_stack(holdout_X, holdout_y))
+            print(f"   Epoch {epoch + 1}/{epochs}: {rows / seconds:,.0f} rows/s, holdout accuracy {accuracy:.3f}")
+    finally:
+        pool.shutdown()
+
+    total = time.perf_counter() - started
+    print(f"⏱️ Trained on {n_docs} rows x {epochs} epochs in {total:.1f}s "
+          f"({n_docs * (epochs + 1) / total:,.0f} rows/s over all passes)")
+    X_holdout, y_holdout = _stack(holdout_X, holdout_y)
+    print(classification_report(y_holdout, model.predict(X_holdout), zero_division=0))
+    return _vectorizer, model, holdout_texts
+
+
+def _stack(blocks, labels):
+    return vstack(blocks).tocsr(), np.concatenate(labels)
+
+
+def save_artifacts(vectorizer, model, verify_texts):
+    # 4. Save
+    joblib.dump(model, 'sentiment_model.pkl')
+    joblib.dump(vectorizer, 'tfidf_vectorizer.pkl')
+    print("✅ New Model & Vectorizer Saved!")
+
+    # Memory-mapped copy for the API (MODEL_FORMAT=compact), checked against sklearn
+    export_compact(vectorizer, model, DEFAULT_DIR)
+    report = verify(vectorizer, model, *load_compact(DEFAULT_DIR), verify_texts)
+    if not report['ok']:
+        raise SystemExit(f"❌ Compact model does not match sklearn: {report}")
+    print(f"✅ Compact model exported to {DEFAULT_DIR}/ ({report['lines']} lines verified)")
+
+
+def publish_artifacts(vectorizer, model, registry_dir, notes=None):
+    # 6. New immutable registry version; a running API swaps it in without a restart
+    manifest = model_registry.publish(registry_dir, vectorizer, model, notes=notes)
+    print(f"✅ Published model version {manifest['version']} to {registry_dir}/ (active)")
+
+
+def quick_check(vectorizer, model):
+    # 5. Quick Verification
+    test_sentences = [
+        "The interface is beautiful",   # Bias Check
+        "Rated 7 out of 10",            # Number Check
+        "Great job breaking it"         # Sarcasm Check
+    ]
+    print("\n--- Final Verification ---")
+    label_map = {0: 'Negative', 1: 'Positive', 2: 'Neutral'}
+    for t in test_sentences:
+        cleaned = smart_clean_text(t)
+        vec = vectorizer.transform([cleaned])
+        pred = model.predict(vec)[0]
+        print(f"'{t}' -> {label_map[pred]}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Retrain the sentiment model and vectorizer')
+    parser.add_argument('--data', default='sentiment_training_data.csv', help='CSV with text,label columns')
+    parser.add_argument('--out-of-core', action='store_true',
+                        help='Stream the CSV in chunks (parallel cleaning, SGD partial_fit) instead of loading it')
+    parser.add_argument('--chunk-size', type=int, default=50_000, help='Rows per chunk (out-of-core)')
+    parser.add_argument('--workers', type=int, default=None, help='Cleaning/vectorizing processes (out-of-core)')
+    parser.add_argument('--epochs', type=int, default=3, help='Passes of partial_fit over the data (out-of-core)')
+    parser.add_argument('--max-features', type=int, default=MAX_FEATURES)
+    parser.add_argument('--registry', default=os.environ.get('MODEL_REGISTRY_DIR', 'registry'),
+                        help='Model registry to publish the new version to')
+    parser.add_argument('--no-publish', action='store_true', help='Only write the pickles, do not publish a version')
+    args = parser.parse_args()
+
+    nltk.download('stopwords')
+    if args.out_of_core:
+        vectorizer, model, verify_texts = train_out_of_core(args.data, args.chunk_size, args.workers,
+                                                             args.epochs, args.max_features)
+    else:
+        vectorizer, model, verify_texts = train_in_memory(args.data, args.max_features)
+    save_artifacts(vectorizer, model, verify_texts)
+    quick_check(vectorizer, model)
+    if not args.no_publish:
+        publish_artifacts(vectorizer, model, args.registry, notes=f"retrained on {args.data}")
@@ -0,0 +1,158 @@
+# scheduler.py
+import math
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ExecutionPlan:
+    def __init__(self, mode, workers, chunk_size, estimated_ms, reason):
+        self.mode = mode
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.estimated_ms = estimated_ms
+        self.reason = reason
+
+    def to_dict(self):
+        return {
+            'mode': self.mode,
+            'workers': self.workers,
+            'chunkSize': self.chunk_size,
+            'estimatedMs': round(self.estimated_ms, 1),
+            'reason': self.reason
+        }
+
+
+class CostModel:
+    """Chooses an execution mode, worker count and chunk size from measured costs.
+
+    Costs are calibrated once with a micro-benchmark of the real scoring
+    function: a fixed per-call overhead plus a per-line cost for in-process
+    batches, the speedup two threads actually achieve, and the round-trip and
+    per-line IPC cost of the process pool.
+    """
+
+    def __init__(self, max_workers, max_chunk=2000, min_chunk=64, mem_per_worker_mb=256, cpu_count=None):
+        self.max_workers = max(1, max_workers)
+        self.cpu_count = cpu_count or os.cpu_count() or 1
+        self.max_chunk = max_chunk
+        self.min_chunk = min_chunk
+        self.mem_per_worker_mb = mem_per_worker_mb
+        # Conservative defaults until calibrate() runs
+        self.call_overhead_ms = 2.0
+        self.per_line_ms = 0.05
+        self.thread_efficiency = 0.0
+        self.dispatch_ms = 5.0
+        self.ipc_per_line_ms = 0.01
+        self.cold_start_ms = 1500.0
+        self.calibrated = False
+        self._lock = threading.Lock()
+
+    # ----- calibration -----
+    @staticmethod
+    def _time_ms(fn, repeat=3):
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1000)
+        return statistics.median(samples)
+
+    def calibrate(self, score_batch, sample, pool=None):
+        """Micro-benchmark score_batch (and the pool, if given) on sample lines."""
+        with self._lock:
+            small = sample[:16]
+            score_batch(sample)  # warm caches before timing
+            t_small = self._time_ms(lambda: score_batch(small))
+            t_large = self._time_ms(lambda: score_batch(sample))
+            self.per_line_ms = max((t_large - t_small) / max(len(sample) - len(small), 1), 1e-4)
+            self.call_overhead_ms = max(t_small - self.per_line_ms * len(small), 0.0)
+
+            half = len(sample) // 2
+            with ThreadPoolExecutor(max_workers=2) as ex:
+                t_threads = self._time_ms(lambda: list(ex.map(score_batch, [sample[:half], sample[half:]])))
+            speedup = t_large / t_threads if t_threads else 1.0
+            self.thread_efficiency = min(max(speedup - 1.0, 0.0), 1.0)
+
+            if pool is not None:
+                self.cold_start_ms = getattr(pool, 'startup_ms', None) or self.cold_start_ms
+                t_pool_small = self._time_ms(lambda: pool.map(score_batch, [small]))
+                t_pool_large = self._time_ms(lambda: pool.map(score_batch, [sample]))
+                self.dispatch_ms = max(t_pool_small - t_small, 0.1)
+                pool_per_line = (t_pool_large - t_pool_small) / max(len(sample) - len(small), 1)
+                self.ipc_per_line_ms = max(pool_per_line - self.per_line_ms, 0.0)
+            self.calibrated = True
+        return self.describe()
+
+    def describe(self):
+        return {
+            'calibrated': self.calibrated,
+            'callOverheadMs': round(self.call_overhead_ms, 3),
+            'perLineMs': round(self.per_line_ms, 5),
+            'threadEfficiency': round(self.thread_efficiency, 3),
+            'dispatchMs': round(self.dispatch_ms, 3),
+            'ipcPerLineMs': round(self.ipc_per_line_ms, 5),
+            'maxWorkers': self.max_workers,
+            'cpuCount': self.cpu_count
+        }
+
+    # ----- estimates -----
+    def _chunk_size(self, n_lines, workers, chunks_per_worker=4):
+        size = math.ceil(n_lines / (workers * chunks_per_worker))
+        return int(min(max(size, self.min_chunk), self.max_chunk))
+
+    def estimate_in_process_ms(self, n_lines, chunk_size):
+        return math.ceil(n_lines / chunk_size) * self.call_overhead_ms + n_lines * self.per_line_ms
+
+    def estimate_thread_ms(self, n_lines, workers, chunk_size):
+        speedup = 1.0 + (min(workers, self.cpu_count) - 1) * self.thread_efficiency
+        return self.estimate_in_process_ms(n_lines, chunk_size) / speedup
+
+    def estimate_process_ms(self, n_lines, workers, chunk_size, pool_warm=True):
+        n_chunks = math.ceil(n_lines / chunk_size)
+        work = n_chunks * self.call_overhead_ms + n_lines * (self.per_line_ms + self.ipc_per_line_ms)
+        parallelism = min(workers, n_chunks, self.cpu_count)
+        return self.dispatch_ms + work / parallelism + (0 if pool_warm else self.cold_start_ms)
+
+    def _best_workers(self, estimate, n_lines, limit):
+        best = None
+        for workers in range(2, limit + 1):
+            chunk = self._chunk_size(n_lines, workers)
+            ms = estimate(n_lines, workers, chunk)
+            if best is None or ms < best[2] * 0.97:  # Only add workers for a real gain
+                best = (workers, chunk, ms)
+        return best
+
+    # ----- decision -----
+    def plan(self, n_lines, memory_mb=None, pool_warm=True):
+        if n_lines <= self.max_chunk:
+            seq_ms = self.call_overhead_ms + n_lines * self.per_line_ms
+            candidates = [ExecutionPlan('sequential', 1, max(n_lines, 1), seq_ms,
+                                        f"{n_lines} lines fit in one vectorized batch")]
+        else:
+            chunk = self.max_chunk
+            batched_ms = self.estimate_in_process_ms(n_lines, chunk)
+            candidates = [ExecutionPlan('batched', 1, chunk, batched_ms,
+                                        f"{math.ceil(n_lines / chunk)} in-process batches of {chunk}")]
+
+        limit = self.max_workers
+        if memory_mb is not None:
+            limit = min(limit, int(memory_mb // self.mem_per_worker_mb))
+        if limit >= 2 and n_lines >= 2 * self.min_chunk:
+            if self.thread_efficiency > 0.1:
+                workers, chunk, ms = self._best_workers(self.estimate_thread_ms, n_lines, limit)
+                candidates.append(ExecutionPlan('thread', workers, chunk, ms,
+                                                f"threads scale at {self.thread_efficiency:.0%} per extra worker"))
+            estimate = lambda n, w, c: self.estimate_process_ms(n, w, c, pool_warm)
+            workers, chunk, ms = self._best_workers(estimate, n_lines, limit)
+            candidates.append(ExecutionPlan('process', workers, chunk, ms,
+                                            f"pool dispatch {self.dispatch_ms:.1f}ms amortized over {n_lines} lines"))
+
+        best = min(candidates, key=lambda p: p.estimated_ms)
+        others = ', '.join(f"{p.mode}≈{p.estimated_ms:.0f}ms" for p in candidates if p is not best)
+        best.reason = f"{best.reason}; est {best.estimated_ms:.0f}ms" + (f" vs {others}" if others else '')
+        if limit < self.max_workers:
+            best.reason += f"; workers capped at {max(limit, 1)} by {memory_mb:.0f}MB memory"
+        return best
@@ -1,25 +1,47 @@
 # sentiment_api.py
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 from dotenv import load_dotenv
 
 load_dotenv()
 import joblib
-import re
-import pandas as pd
 import numpy as np
-from nltk.corpus import stopwords
 import pymongo
-from datetime import datetime
+from datetime import datetime, timedelta
 import multiprocessing as mp
 from bson import ObjectId
+from bson.errors import InvalidId
 import time
 import os
-import traceback
 import warnings
-import nltk
-import sys
-import io  # Critical for CSV parsing
+import shutil
+import tempfile
+import json
+import atexit
+import itertools
+from functools import partial
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from worker_pool import WorkerPool
+from scheduler import CostModel
+from job_queue import JobHandle, JobQueue, QueueFullError
+from result_store import ResultStore
+from text_normalizer import load_stop_words, normalize, normalize_many
+from prediction_cache import PredictionCache, file_fingerprint
+import compact_model
+import response_format
+from keywords import TOP_K, KeywordExtractor, KeywordTotals, fallback_keywords
+from job_analytics import JobAnalytics
+from ingest import IngestError, count_lines, detect_format, iter_file_chunks, iter_text_chunks
+from metrics import Metrics
+from profiler import JobProfiler
+from micro_batcher import MicroBatcher
+from admission import CONTENT_FACTOR, MB, ROW_BYTES, AdmissionController, AdmissionRejected, estimate_content_mb, estimate_stream_mb, memory_limit_mb
+from spill_store import SpillStore
+from pipeline import Pipeline
+from postings import MAX_SEARCH_JOBS, query_terms
+import model_registry
+from model_registry import ModelBundle, ModelWatcher, RegistryError, ReloadInProgress
 
 warnings.filterwarnings('ignore')
 
@@ -29,15 +51,67 @@ CORS(app)  # Allow requests from Node.js
 # ===== CONFIGURATION =====
 ASSET_PATH = os.path.join(os.path.dirname(__file__)) 
 MONGO_URI = os.environ.get('MONGO_URI')
+BATCH_SIZE = int(os.environ.get('BATCH_SIZE', 2000))  # Lines per vectorized inference call
+WORKER_COUNT = int(os.environ.get('WORKER_COUNT', 0)) or mp.cpu_count()
+MAX_CONCURRENT_JOBS = int(os.environ.get('MAX_CONCURRENT_JOBS', 2))
+MAX_PENDING_JOBS = int(os.environ.get('MAX_PENDING_JOBS', 32))
+PROGRESS_EVERY_CHUNKS = int(os.environ.get('PROGRESS_EVERY_CHUNKS', 5))  # Mongo progress write interval
+RESULT_CHUNK_SIZE = int(os.environ.get('RESULT_CHUNK_SIZE', 1000))  # Result lines per Mongo document
+RESULT_CHUNK_MAX_MB = float(os.environ.get('RESULT_CHUNK_MAX_MB', 8))  # Chunks seal early past this size (Mongo caps documents at 16MB)
+MONGO_POOL_SIZE = int(os.environ.get('MONGO_POOL_SIZE', 20))
+PREDICTION_CACHE_MB = float(os.environ.get('PREDICTION_CACHE_MB', 64))  # 0 disables the cache
+PREDICTION_CACHE_DB = os.environ.get('PREDICTION_CACHE_DB')  # Optional SQLite file to persist it
+MODEL_FORMAT = os.environ.get('MODEL_FORMAT', 'pickle')  # 'compact' = memory-mapped NumPy arrays
+UPLOAD_DIR = os.path.realpath(os.environ.get('UPLOAD_DIR', os.path.join(ASSET_PATH, '..', 'backend', 'uploads')))  # /process-file paths must live here
+INGEST_ENGINE = os.environ.get('INGEST_ENGINE', 'auto')  # CSV parser: auto (pyarrow if installed) | pandas | pyarrow
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', '').lower() in ('1', 'true', 'yes')  # Allows /profile
+MICROBATCH_MAX_SIZE = int(os.environ.get('MICROBATCH_MAX_SIZE', 64))  # Texts per coalesced /analyze call
+MICROBATCH_WAIT_MS = float(os.environ.get('MICROBATCH_WAIT_MS', 2))  # How long the first request waits for company
+MICROBATCH_MAX_QUEUE = int(os.environ.get('MICROBATCH_MAX_QUEUE', 4096))  # Waiting requests before 429
+ANALYZE_BATCH_MAX_TEXTS = int(os.environ.get('ANALYZE_BATCH_MAX_TEXTS', 1000))  # Larger inputs belong in /process-content
+ADMISSION_MEMORY_FRACTION = float(os.environ.get('ADMISSION_MEMORY_FRACTION', 0.8))  # Share of the memory limit jobs may fill
+ADMISSION_MAX_WAITING = int(os.environ.get('ADMISSION_MAX_WAITING', 8))  # Requests queued for memory before 429
+ADMISSION_WAIT_SECONDS = float(os.environ.get('ADMISSION_WAIT_SECONDS', 10))  # Then 503
+ADMISSION_CONTENT_FACTOR = float(os.environ.get('ADMISSION_CONTENT_FACTOR', CONTENT_FACTOR))  # Sync /process-content peak bytes per body byte
+JOB_MEMORY_BUDGET_MB = float(os.environ.get('JOB_MEMORY_BUDGET_MB', 0))  # >0: sync /process-content runs budgeted (see budgeted_process_content)
+SPILL_DIR = os.environ.get('SPILL_DIR') or None  # Where budgeted jobs spill result chunks (default: system temp dir)
+PIPELINE_ENABLED = os.environ.get('PIPELINE_ENABLED', '1').lower() in ('1', 'true', 'yes')  # Overlap parse/score/persist for multi-chunk sync jobs
+PIPELINE_QUEUE_CHUNKS = int(os.environ.get('PIPELINE_QUEUE_CHUNKS', 4))  # Chunks buffered between two pipeline stages
+SEARCH_INDEX_ENABLED = os.environ.get('SEARCH_INDEX_ENABLED', '1').lower() in ('1', 'true', 'yes')  # Write line postings with result chunks (see postings.py)
+MODEL_REGISTRY_DIR = os.environ.get('MODEL_REGISTRY_DIR', os.path.join(ASSET_PATH, 'registry'))  # Versioned artifacts (see model_registry.py)
+MODEL_WATCH_SECONDS = float(os.environ.get('MODEL_WATCH_SECONDS', 5))  # Registry CURRENT poll interval; 0 disables hot reload on publish
+MODEL_VERSIONS_KEPT = int(os.environ.get('MODEL_VERSIONS_KEPT', 2))  # Model versions held in memory per process
 
 if not MONGO_URI:
     print("⚠️ WARNING: MONGO_URI not found in environment variables.")
 
 # Global resources 
-model = None
-vectorizer = None
-stop_words = None
+active_bundle = None  # ModelBundle new jobs score with; swapped whole by reload_model()
+_bundles = {}  # version -> ModelBundle loaded in this process (active + recent, for jobs pinned to them)
+_model_lock = threading.Lock()
+_reload_lock = threading.Lock()
+last_reload = None
+prediction_cache = None
 mongo_client = None
+result_store = None
+worker_pool = None
+scheduler = None
+job_queue = JobQueue(MAX_CONCURRENT_JOBS, MAX_PENDING_JOBS)
+atexit.register(job_queue.shutdown)
+_pool_lock = threading.Lock()
+metrics = Metrics(WORKER_COUNT)  # Shared memory: must exist before the pool forks
+job_profiler = JobProfiler()
+micro_batcher = MicroBatcher(lambda texts: analyze_batch(texts), MICROBATCH_MAX_SIZE, MICROBATCH_WAIT_MS,
+                             MICROBATCH_MAX_QUEUE, on_batch=metrics.record_microbatch)
+model_watcher = ModelWatcher(MODEL_REGISTRY_DIR, MODEL_WATCH_SECONDS, lambda version: reload_model())
+
+def _reset_model_locks():
+    # A reload thread of the parent may have held them at fork time
+    global _model_lock, _reload_lock
+    _model_lock, _reload_lock = threading.Lock(), threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_model_locks)
 
 import platform
 import ctypes
@@ -84,175 +158,442 @@ def get_available_memory_mb():
         print(f"⚠️ Memory detection failed: {e}")
         return 512
 
+# Shared memory like `metrics`: one budget across all serving workers of a preloaded server
+admission = AdmissionController(ADMISSION_MEMORY_FRACTION * memory_limit_mb(get_available_memory_mb()),
+                                ADMISSION_MAX_WAITING, ADMISSION_WAIT_SECONDS)
+
 # ===== 2. INITIALIZATION =====
+def read_artifacts(directory):
+    """(vectorizer, model, artifact paths) from a directory holding the pickles (+ compact_model/)."""
+    compact_dir = os.path.join(directory, compact_model.DEFAULT_DIR)
+    if MODEL_FORMAT == 'compact' and os.path.exists(os.path.join(compact_dir, 'manifest.json')):
+        # Arrays are mmapped, so forked workers share the pages instead of unpickled copies
+        vectorizer, model = compact_model.load_compact(compact_dir)
+        return vectorizer, model, compact_model.artifact_paths(compact_dir)
+    if MODEL_FORMAT == 'compact':
+        print(f"⚠️ No compact model in {compact_dir}, falling back to pickles "
+              "(run `python compact_model.py export`)")
+    model_path = os.path.join(directory, model_registry.MODEL_FILE)
+    vect_path = os.path.join(directory, model_registry.VECTORIZER_FILE)
+    return joblib.load(vect_path), joblib.load(model_path), [model_path, vect_path]
+
+def load_bundle(version=None):
+    """Load one model version: a registry version (checksums verified first), or with
+    version=None / 'legacy-*' the pickles next to this file, as before the registry."""
+    if version and not version.startswith('legacy-'):
+        model_registry.verify(MODEL_REGISTRY_DIR, version)
+        directory = model_registry.version_dir(MODEL_REGISTRY_DIR, version)
+    else:
+        directory = ASSET_PATH
+    vectorizer, model, artifacts = read_artifacts(directory)
+    # Keyed by the artifacts' checksum, so replacing any of them invalidates the cache
+    fingerprint = f"{file_fingerprint(*artifacts)}-kw{TOP_K}"
+    if directory == ASSET_PATH:
+        legacy = f"legacy-{fingerprint[:8]}"
+        if version and version != legacy:
+            raise RegistryError(f"Model version {version} is gone (the pickles now hold {legacy})")
+        version = legacy
+    return ModelBundle(version, fingerprint, vectorizer, model, KeywordExtractor(vectorizer, TOP_K), directory)
+
+def load_models(watch=True):
+    """Load the active model version and stopwords into this process (once).
+
+    The version is the registry's CURRENT, or the legacy pickles when nothing
+    was published yet. With watch, this process also follows CURRENT (see
+    reload_model); pool workers and the preloading gunicorn master don't.
+    """
+    global active_bundle, prediction_cache
+    
+    if active_bundle is None:
+        with _model_lock:
+            if active_bundle is None:
+                bundle = load_bundle(model_registry.current_version(MODEL_REGISTRY_DIR))
+                load_stop_words()
+                if PREDICTION_CACHE_MB > 0:
+                    prediction_cache = PredictionCache(bundle.fingerprint, int(PREDICTION_CACHE_MB * 1024 * 1024),
+                                                       PREDICTION_CACHE_DB)
+                _bundles[bundle.version] = bundle
+                active_bundle = bundle
+                print(f"✅ ML models loaded successfully (version {bundle.version})")
+    if watch: model_watcher.ensure_started(active_bundle.version)
+
+def bundle_for(version=None):
+    """The bundle to score with: the active one, or the version a running job pinned.
+
+    Pool workers were forked with whatever was active then, so they load a
+    newer pinned version on first use. Only MODEL_VERSIONS_KEPT versions stay
+    in memory; an evicted one is simply loaded again if a job still needs it.
+    """
+    bundle = active_bundle
+    if version is None or (bundle is not None and bundle.version == version): return bundle
+    bundle = _bundles.get(version)
+    if bundle is None:
+        with _model_lock:
+            bundle = _bundles.get(version)
+            if bundle is None:
+                bundle = _bundles[version] = load_bundle(version)
+                evict_bundles(keep=version)
+    return bundle
+
+def evict_bundles(keep=None):
+    # Oldest first (dict order), never the active version or the one just loaded
+    for version in list(_bundles):
+        if len(_bundles) <= max(1, MODEL_VERSIONS_KEPT): break
+        if version not in (keep, active_bundle and active_bundle.version):
+            del _bundles[version]
+
+def current_model_version():
+    """Pinned at job start: every chunk of a job is scored by the same version."""
+    load_models()
+    return active_bundle.version
+
+def reload_model(version=None, wait=True):
+    """Hot-swap the model: load `version` (default: the registry's CURRENT) beside the
+    active one, canary it, then make it active for new jobs.
+
+    Running jobs keep the version they pinned, so nothing is interrupted or
+    mixed. An explicit version is also written to CURRENT, so the other
+    serving processes follow through their watchers. Returns last_reload
+    (None with wait=False: the reload runs on a background thread).
+    """
+    if not _reload_lock.acquire(blocking=False):
+        raise ReloadInProgress('A model reload is already running')
+    if wait: return _reload_locked(version)
+    threading.Thread(target=_reload_locked, args=(version, False), name='model-reload', daemon=True).start()
+    return None
+
+def _reload_locked(version, raise_errors=True):
+    global active_bundle, last_reload
+    load_models(watch=False)
+    previous = active_bundle
+    status = {'status': 'loading', 'version': version, 'previousVersion': previous.version,
+              'startedAt': datetime.utcnow().isoformat()}
+    last_reload = status
+    try:
+        target = version or model_registry.current_version(MODEL_REGISTRY_DIR)
+        if not target: raise RegistryError(f"No model version published in {MODEL_REGISTRY_DIR}")
+        status['version'] = target
+        if target != previous.version:
+            bundle = _bundles.get(target) or load_bundle(target)
+            _bundles[target] = bundle
+            status['canary'] = canary_check(bundle)
+            if not status['canary']['ok']:
+                _bundles.pop(target, None)
+                raise RegistryError(f"Model {target} failed its canary: {status['canary']}")
+            with _model_lock:
+                active_bundle = bundle
+                evict_bundles()
+            if prediction_cache: prediction_cache.fingerprint = bundle.fingerprint
+            print(f"🔁 Model {previous.version} -> {target}")
+        if version and version != model_registry.current_version(MODEL_REGISTRY_DIR):
+            model_registry.activate(MODEL_REGISTRY_DIR, version)
+        model_watcher.seen = target
+        status.update(status='active' if target != previous.version else 'unchanged')
+    except Exception as e:
+        status.update(status='failed', error=str(e))
+        print(f"❌ Model reload failed, keeping {previous.version}: {e}")
+        if raise_errors: raise
+    finally:
+        status['finishedAt'] = datetime.utcnow().isoformat()
+        _reload_lock.release()
+    return status
+
+def canary_check(bundle):
+    """Score the canary texts with a freshly loaded bundle before it serves anything.
+
+    Registry versions must reproduce the predictions recorded when they were
+    published; every version must score without errors.
+    """
+    texts, expected = model_registry.CANARY_TEXTS, None
+    if not bundle.version.startswith('legacy-'):
+        canary = model_registry.read_manifest(MODEL_REGISTRY_DIR, bundle.version).get('canary') or {}
+        texts = canary.get('texts') or texts
+        if 'predictions' in canary:
+            expected = [label_for_prediction(p)[0] for p in canary['predictions']]
+    start = time.perf_counter()
+    results = analyze_batch(texts, use_cache=False, version=bundle.version)
+    labels = [r.get('sentimentLabel') for r in results]
+    errors = [r['error'] for r in results if 'error' in r]
+    mismatches = sum(a != b for a, b in zip(labels, expected)) if expected else 0
+    return {'ok': not errors and not mismatches, 'texts': len(texts), 'errors': errors[:3],
+            'mismatches': mismatches, 'latencyMs': round((time.perf_counter() - start) * 1000, 2)}
+
 def init_resources():
     """Initialize ML models and MongoDB connection"""
-    global model, vectorizer, stop_words, mongo_client
+    global mongo_client, result_store
     
-    if model is None:
-        try:
-            model_path = os.path.join(ASSET_PATH, 'sentiment_model.pkl')
-            vect_path = os.path.join(ASSET_PATH, 'tfidf_vectorizer.pkl')
-            model = joblib.load(model_path)
-            vectorizer = joblib.load(vect_path)
-            try:
-                nltk.data.find('corpora/stopwords')
-            except LookupError:
-                nltk.download('stopwords')
-            stop_words = set(stopwords.words('english'))
-            print("✅ ML models loaded successfully")
-        except Exception as e:
-            print(f"❌ Failed to load ML models: {e}")
-            raise
+    try:
+        load_models()
+    except Exception as e:
+        print(f"❌ Failed to load ML models: {e}")
+        raise
     
     if mongo_client is None:
         try:
-            mongo_client = pymongo.MongoClient(MONGO_URI)
+            mongo_client = pymongo.MongoClient(MONGO_URI, maxPoolSize=MONGO_POOL_SIZE)
+            result_store = ResultStore(mongo_client, RESULT_CHUNK_SIZE, postings=SEARCH_INDEX_ENABLED,
+                                       max_chunk_bytes=int(RESULT_CHUNK_MAX_MB * MB))
             print("✅ MongoDB connected successfully")
         except Exception as e:
             print(f"❌ MongoDB connection failed: {e}")
             raise
 
 def init_worker():
-    """Worker init for multiprocessing"""
-    global model, vectorizer, stop_words
-    if model is None:
+    """Worker init for multiprocessing (no-op when the models were inherited via fork)"""
+    metrics.register_pool_worker()
+    try:
+        load_models(watch=False)
+    except Exception as e:
+        print(f"❌ Worker init failed: {e}")
+
+def init_worker_pool():
+    """Load models in the parent, then fork the long-lived worker pool once."""
+    global worker_pool
+    with _pool_lock:
+        if worker_pool is None:
+            load_models()
+            worker_pool = WorkerPool(WORKER_COUNT, initializer=init_worker).start()
+            atexit.register(worker_pool.shutdown)
+            print(f"✅ Worker pool warm ({WORKER_COUNT} workers)")
+    return worker_pool
+
+CALIBRATION_SAMPLE = [
+    f"{line} {i}" for i in range(64) for line in (
+        "The app is amazing and the support team was very helpful",
+        "Battery usage is terrible after the update",
+        "Upload complete", "Rated 7 out of 10", "Not worth the price",
+        "I love waiting 10 mins for it to load", "Interface is clean and simple",
+        "The product stopped working after two days.")
+]  # Distinct lines, scored with the cache off, so calibration measures real inference
+
+def init_scheduler(watch=True):
+    """Calibrate the cost model with a micro-benchmark of the real engines (watch: see load_models)."""
+    global scheduler
+    if scheduler is None:
+        load_models(watch=watch)
+        cost_model = CostModel(WORKER_COUNT, max_chunk=BATCH_SIZE)
         try:
-            model_path = os.path.join(ASSET_PATH, 'sentiment_model.pkl')
-            vect_path = os.path.join(ASSET_PATH, 'tfidf_vectorizer.pkl')
-            model = joblib.load(model_path)
-            vectorizer = joblib.load(vect_path)
-            try:
-                nltk.data.find('corpora/stopwords')
-            except LookupError:
-                nltk.download('stopwords')
-            stop_words = set(stopwords.words('english'))
+            cost_model.calibrate(partial(analyze_batch, use_cache=False), CALIBRATION_SAMPLE, pool=worker_pool)
+            print(f"✅ Scheduler calibrated: {cost_model.describe()}")
         except Exception as e:
-            print(f"❌ Worker init failed: {e}")
+            print(f"⚠️ Scheduler calibration failed ({e}) -> using default costs")
+        scheduler = cost_model
+    return scheduler
 
 # ===== 3. TEXT CLEANING & ANALYSIS =====
 def clean_text(text):
-    if pd.isna(text): return ""
-    text = str(text).lower()
-    text = re.sub(r'[^a-zA-Z0-9\s]', ' ', text)
-    text = re.sub(r'\s+', ' ', text).strip()
-    
-    global stop_words
-    if stop_words is None: stop_words = set(stopwords.words('english'))
-    negations = {'no', 'not', 'nor', 'never', 'none', 'neither'}
-    safe_stop_words = stop_words - negations
-    
-    words = text.split()
-    words = [word for word in words if word not in safe_stop_words]
-    return ' '.join(words)
+    return normalize(text)
 
-def analyze_single_text(text):
+def analyze_single_text(text, bundle=None):
+    bundle = bundle or bundle_for()
     try:
         cleaned = clean_text(text)
         if not cleaned.strip():
             return {
                 'originalText': text, 'sentimentScore': 0.0, 'sentimentLabel': 'neutral',
-                'confidence': 0.0, 'keywords': [], 'cleanedText': cleaned
+                'confidence': 0.0, 'keywords': [], 'cleanedText': cleaned, 'modelVersion': bundle.version
             }
         
-        text_vector = vectorizer.transform([cleaned])
-        prediction = model.predict(text_vector)[0]
-        print(f"DEBUG: Text='{cleaned[:20]}...', Prediction={prediction}, Type={type(prediction)}")
+        text_vector = bundle.vectorizer.transform([cleaned])
+        prediction = bundle.model.predict(text_vector)[0]
         
         confidence = 0.0
         try:
-            probabilities = model.predict_proba(text_vector)[0]
+            probabilities = bundle.model.predict_proba(text_vector)[0]
             confidence = max(probabilities)
         except:
             confidence = 1.0
         
-        if prediction == 0:
-            label = "negative"
-            score = -1.0
-        elif prediction == 1:
-            label = "positive"
-            score = 1.0
-        else:
-            label = "neutral"
-            score = 0.0
+        label, score = label_for_prediction(prediction)
         
-        keywords = [word for word in cleaned.split() if len(word) > 2][:10]
+        terms = bundle.keyword_extractor.top_terms(text_vector)[0]
+        keywords = [term for term, _ in terms] or fallback_keywords(cleaned)
         
         return {
             'originalText': text, 'sentimentScore': float(score), 'sentimentLabel': label,
-            'confidence': float(confidence), 'keywords': keywords, 'cleanedText': cleaned,
-            'timestamp': datetime.utcnow().isoformat()
+            'confidence': float(confidence), 'keywords': keywords, 'keywordWeights': [w for _, w in terms],
+            'cleanedText': cleaned, 'timestamp': datetime.utcnow().isoformat(), 'modelVersion': bundle.version
         }
     except Exception as e:
-        return {'originalText': text, 'error': str(e)}
+        return {'originalText': text, 'error': str(e), 'modelVersion': bundle.version}
+
+def label_for_prediction(prediction):
+    if prediction == 0: return "negative", -1.0
+    if prediction == 1: return "positive", 1.0
+    return "neutral", 0.0
+
+def analyze_batch(text_list, use_cache=True, version=None):
+    """Vectorized analyze_single_text: one transform and one predict_proba per chunk.
+
+    Each distinct cleaned text is scored once per batch, and only if the
+    prediction cache doesn't already hold it. Keywords are the top TF-IDF
+    terms of each row of that same matrix. `version` pins a model version
+    (see bundle_for); by default the active one scores.
+    """
+    bundle = bundle_for(version)
+    model = bundle.model
+    cache = prediction_cache if use_cache else None
+    try:
+        with metrics.stage('clean', len(text_list)):
+            cleaned_list = normalize_many(text_list)
+        results = [None] * len(text_list)
+        positions = {}  # cleaned text -> line indexes
+        for i, (text, cleaned) in enumerate(zip(text_list, cleaned_list)):
+            if cleaned.strip():
+                positions.setdefault(cleaned, []).append(i)
+            else:
+                results[i] = {
+                    'originalText': text, 'sentimentScore': 0.0, 'sentimentLabel': 'neutral',
+                    'confidence': 0.0, 'keywords': [], 'cleanedText': cleaned, 'modelVersion': bundle.version
+                }
+        if not positions:
+            return results
+
+        unique = list(positions)
+        predicted = cache.get_many(unique, bundle.fingerprint) if cache else {}
+        if cache: cache.record_deduplicated(len(text_list) - len(unique))
+        to_score = [c for c in unique if c not in predicted] if predicted else unique
+        if to_score:
+            with metrics.stage('vectorize', len(to_score)):
+                text_matrix = bundle.vectorizer.transform(to_score)
+            with metrics.stage('predict', len(to_score)):
+                try:
+                    probabilities = model.predict_proba(text_matrix)
+                    predictions = model.classes_[probabilities.argmax(axis=1)]
+                    confidences = probabilities.max(axis=1)
+                except AttributeError:
+                    predictions = model.predict(text_matrix)
+                    confidences = np.ones(len(to_score))
+            with metrics.stage('keywords', len(to_score)):
+                terms = bundle.keyword_extractor.top_terms(text_matrix)
+            scored = {c: (*label_for_prediction(p), float(conf), tuple(kw))
+                      for c, p, conf, kw in zip(to_score, predictions, confidences, terms)}
+            if cache: cache.put_many(scored, bundle.fingerprint)
+            predicted.update(scored)
+
+        with metrics.stage('format', len(text_list)):
+            timestamp = datetime.utcnow().isoformat()
+            for cleaned, indexes in positions.items():
+                label, score, confidence, terms = predicted[cleaned]
+                keywords = [term for term, _ in terms] or fallback_keywords(cleaned)
+                weights = [weight for _, weight in terms]
+                for i in indexes:
+                    results[i] = {
+                        'originalText': text_list[i], 'sentimentScore': score, 'sentimentLabel': label,
+                        'confidence': confidence, 'keywords': list(keywords), 'keywordWeights': weights,
+                        'cleanedText': cleaned, 'timestamp': timestamp, 'modelVersion': bundle.version
+                    }
+        return results
+    except Exception:
+        # Isolate the failing line(s) exactly like the per-line path would
+        return [analyze_single_text(t, bundle) for t in text_list]
+
+def iter_chunks(text_list, size):
+    for start in range(0, len(text_list), size):
+        yield text_list[start:start + size]
 
 # ===== 4. ENGINES =====
-def process_texts_parallel(text_list):
-    """High-Performance Mode"""
-    workers = min(mp.cpu_count(), 4)
-    with mp.Pool(processes=workers, initializer=init_worker) as pool:
-        results = pool.map(analyze_single_text, text_list)
-    return results, workers
-
-def process_texts_sequentially(text_list):
+def process_texts_parallel(text_list, workers=None, chunk_size=None, version=None):
+    """High-Performance Mode: chunks fanned out over the warm process pool"""
+    pool = init_worker_pool()
+    workers = min(workers or pool.processes, pool.processes)
+    chunk_size = chunk_size or max(1, min(BATCH_SIZE, -(-len(text_list) // workers)))
+    chunk_results = pool.map(partial(analyze_batch, version=version), iter_chunks(text_list, chunk_size))
+    results = [r for chunk in chunk_results for r in chunk]
+    return results, min(workers, len(chunk_results))
+
+def process_texts_threaded(text_list, workers, chunk_size, version=None):
+    """Thread Mode: shares the loaded models, useful where numpy/scipy release the GIL"""
+    init_resources()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        chunk_results = list(executor.map(partial(analyze_batch, version=version), iter_chunks(text_list, chunk_size)))
+    results = [r for chunk in chunk_results for r in chunk]
+    return results, min(workers, len(chunk_results))
+
+def process_texts_sequentially(text_list, chunk_size=None, version=None):
     """Safe Mode"""
     init_resources()
-    results = [analyze_single_text(t) for t in text_list]
+    results = []
+    for chunk in iter_chunks(text_list, chunk_size or BATCH_SIZE):
+        results.extend(analyze_batch(chunk, version=version))
     return results, 1
 
 # ===== 5. SMART DISPATCHER =====
+class RunningStats:
+    """Incremental averageSentiment / sentimentDistribution / top keywords over result chunks.
+
+    `analytics` (job_analytics.py) is only reported with the final summary.
+    """
+    def __init__(self):
+        self.score_sum = 0.0
+        self.scored = 0
+        self.distribution = {'positive': 0, 'neutral': 0, 'negative': 0}
+        self.keywords = KeywordTotals()
+        self.analytics = JobAnalytics()
+
+    def add(self, results):
+        for r in results:
+            self.analytics.add(r)
+            if 'error' in r: continue
+            self.score_sum += r.get('sentimentScore', 0)
+            self.scored += 1
+            label = r.get('sentimentLabel', 'neutral')
+            self.distribution[label] = self.distribution.get(label, 0) + 1
+            if r.get('keywordWeights'): self.keywords.add(r['keywords'], r['keywordWeights'])
+
+    def summary(self):
+        return {
+            'averageSentiment': float(self.score_sum / self.scored) if self.scored else 0.0,
+            'sentimentDistribution': dict(self.distribution),
+            **self.keywords.top()
+        }
+
+def format_result(result, line_number):
+    return {
+        'lineNumber': line_number,
+        'originalText': result.get('originalText', ''),
+        'sentimentScore': result.get('sentimentScore', 0.0),
+        'sentimentLabel': result.get('sentimentLabel', 'neutral'),
+        'keywords': result.get('keywords', []),
+        'patternsFound': ['ml_prediction'],
+        'metadata': {
+            'confidence': result.get('confidence', 0.0),
+            'cleanedText': result.get('cleanedText', ''),
+            'modelVersion': result.get('modelVersion'),
+            'processId': os.getpid(),
+            'processingTime': time.time()
+        }
+    }
+
 def smart_process_texts(text_list, job_id=None, user_id=None):
     start_time = time.time()
     total_mem = get_available_memory_mb()
     print(f"💾 Detected System Memory: {total_mem:.2f} MB")
     
-    # Determine mode variable for logging
-    mode = "sequential" 
+    pool_warm = worker_pool is not None and worker_pool.is_warm
+    plan = init_scheduler().plan(len(text_list), memory_mb=total_mem, pool_warm=pool_warm)
+    print(f"🧭 {plan.mode} x{plan.workers} (chunk {plan.chunk_size}): {plan.reason}")
+    version = current_model_version()
     
-    # Threshold: 1500MB
-    if total_mem > 1500 and len(text_list) > 100:
-        try:
-            print("🚀 High RAM -> Parallel Mode")
-            results, workers_used = process_texts_parallel(text_list)
-            mode = "parallel" # <--- Track mode
-        except Exception as e:
-            print(f"⚠️ Parallel failed ({e}) -> Sequential Mode")
-            results, workers_used = process_texts_sequentially(text_list)
-            mode = "sequential"
-    else:
-        print("🐢 Low RAM/Small Batch -> Sequential Mode")
-        results, workers_used = process_texts_sequentially(text_list)
-        mode = "sequential"
+    try:
+        if plan.mode == 'process':
+            results, workers_used = process_texts_parallel(text_list, plan.workers, plan.chunk_size, version)
+        elif plan.mode == 'thread':
+            results, workers_used = process_texts_threaded(text_list, plan.workers, plan.chunk_size, version)
+        else:
+            results, workers_used = process_texts_sequentially(text_list, plan.chunk_size, version)
+    except Exception as e:
+        if plan.mode not in ('process', 'thread'): raise
+        print(f"⚠️ {plan.mode} failed ({e}) -> Batched Mode")
+        plan.reason = f"{plan.mode} failed ({e}); fell back to in-process batches"
+        plan.mode, plan.workers, plan.chunk_size = 'batched', 1, BATCH_SIZE
+        results, workers_used = process_texts_sequentially(text_list, version=version)
 
-    # Stats calculation
-    scores = [r.get('sentimentScore', 0) for r in results if 'error' not in r]
-    labels = [r.get('sentimentLabel', 'neutral') for r in results if 'error' not in r]
-    
-    if scores:
-        avg_sentiment = sum(scores) / len(scores)
-        pos_count = labels.count('positive')
-        neg_count = labels.count('negative')
-        neu_count = labels.count('neutral')
-    else:
-        avg_sentiment = 0.0
-        pos_count = neg_count = neu_count = 0
-    
-    formatted_results = []
-    for idx, result in enumerate(results):
-        formatted_results.append({
-            'lineNumber': idx + 1,
-            'originalText': result.get('originalText', ''),
-            'sentimentScore': result.get('sentimentScore', 0.0),
-            'sentimentLabel': result.get('sentimentLabel', 'neutral'),
-            'keywords': result.get('keywords', []),
-            'patternsFound': ['ml_prediction'],
-            'metadata': {
-                'confidence': result.get('confidence', 0.0),
-                'cleanedText': result.get('cleanedText', ''),
-                'processId': os.getpid(),
-                'processingTime': time.time()
-            }
-        })
+    with metrics.stage('format', len(results)):
+        stats = RunningStats()
+        stats.add(results)
+        formatted_results = [format_result(result, idx + 1) for idx, result in enumerate(results)]
+    metrics.record_job(plan.mode, len(text_list), time.time() - start_time)
     
     return {
         'jobId': job_id, 
@@ -260,91 +601,886 @@ def smart_process_texts(text_list, job_id=None, user_id=None):
         'totalLines': len(text_list),
         'processingTimeMs': int((time.time() - start_time) * 1000),
         'workersUsed': workers_used,
-        'averageSentiment': float(avg_sentiment),
-        'sentimentDistribution': {'positive': pos_count, 'neutral': neu_count, 'negative': neg_count},
+        **stats.summary(),
+        'analytics': stats.analytics.to_dict(),
         'results': formatted_results, 
         'status': 'completed', 
-        'processingMode': mode, # <--- THIS WAS MISSING!
+        'processingMode': plan.to_dict(),
+        'modelVersion': version,
         'completedAt': datetime.utcnow().isoformat()
     }
     
+def stream_process_texts(chunk_iter, job_id=None, user_id=None, chunk_size=BATCH_SIZE):
+    """Score chunks as they arrive and yield one event per chunk, then a summary.
+
+    At most one window of chunks (one per warm pool worker) is held in memory.
+    """
+    start_time = time.time()
+    init_resources()
+    window_size = worker_pool.processes if worker_pool is not None and worker_pool.is_warm else 1
+    version = current_model_version()
+    score = partial(analyze_batch, version=version)
+    stats = RunningStats()
+    line_number = 0
+    chunk_index = 0
+    window = []
+
+    def flush(window):
+        if len(window) > 1:
+            return worker_pool.map(score, window)
+        return [score(window[0])]
+
+    for chunk in itertools.chain(chunk_iter, [None]):
+        if chunk is not None:
+            window.append(chunk)
+            if len(window) < window_size: continue
+        if not window: break
+        for results in flush(window):
+            with metrics.stage('format', len(results)):
+                stats.add(results)
+                formatted = [format_result(r, line_number + i + 1) for i, r in enumerate(results)]
+            yield {'type': 'chunk', 'chunkIndex': chunk_index, 'startLine': line_number + 1,
+                   'results': formatted, **stats.summary()}
+            line_number += len(results)
+            chunk_index += 1
+        window = []
+
+    yield {
+        'type': 'summary',
+        'jobId': job_id,
+        'userId': user_id,
+        'totalLines': line_number,
+        'processingTimeMs': int((time.time() - start_time) * 1000),
+        'workersUsed': window_size,
+        **stats.summary(),
+        'analytics': stats.analytics.to_dict(),
+        'status': 'completed',
+        'processingMode': {'mode': 'stream', 'workers': window_size, 'chunkSize': chunk_size,
+                           'reason': 'incremental NDJSON stream'},
+        'modelVersion': version,
+        'completedAt': datetime.utcnow().isoformat()
+    }
+
+def run_async_job(handle, chunks, total_lines, job_id, user_id, mode='async'):
+    """Queue worker: score chunks of texts, writing progress and results to Mongo as it goes.
+
+    Every write is conditional on the job not being 'cancelled', so a cancel
+    from the Node side (or /jobs/<id>/cancel) stops the job at the next write.
+    Returns the summary event (None if the job did not complete).
+    """
+    init_resources()
+    jobs = mongo_client.text_processor.processingjobs
+    live = {'_id': ObjectId(job_id), 'status': {'$ne': 'cancelled'}}
+    handle.total_lines = total_lines
+    start_time = time.time()
+    summary = None
+    
+    started = jobs.update_one(live, {'$set': {
+        'status': 'processing', 'startedAt': datetime.utcnow(), 'progress': 0
+    }})
+    if started.matched_count == 0:
+        if hasattr(chunks, 'close'): chunks.close()
+        return handle.cancel()
+    
+    writer = result_store.writer(job_id)
+    chunks_since_write = 0
+    try:
+        with job_profiler.capture(job_id):
+            for event in stream_process_texts(chunks, job_id, user_id):
+                if event['type'] == 'chunk':
+                    with metrics.stage('mongo_write', len(event['results'])):
+                        writer.add(event['results'])
+                    handle.lines_done += len(event['results'])
+                    handle.progress = min(99, handle.lines_done * 100 // max(total_lines, 1))
+                    chunks_since_write += 1
+                    if chunks_since_write < PROGRESS_EVERY_CHUNKS and not handle.cancelled: continue
+                    with metrics.stage('mongo_write'):
+                        writer.flush()
+                        written = jobs.update_one(live, {'$set': {
+                            'progress': handle.progress,
+                            'sentimentDistribution': event['sentimentDistribution'],
+                            'averageSentiment': event['averageSentiment'],
+                            'resultChunks': writer.index()
+                        }})
+                    chunks_since_write = 0
+                    if written.matched_count == 0: handle.cancel()
+                    if handle.cancelled: break
+                else:
+                    with metrics.stage('mongo_write'):
+                        written = jobs.update_one(live, {
+                            '$set': {
+                                'status': 'completed', 'progress': 100,
+                                'sentimentDistribution': event['sentimentDistribution'],
+                                'averageSentiment': event['averageSentiment'],
+                                'totalLines': event['totalLines'],
+                                'processingTimeMs': event['processingTimeMs'],
+                                'workersUsed': event['workersUsed'],
+                                'processingMode': event['processingMode'],
+                                'topKeywords': event['topKeywords'],
+                                'topNgrams': event['topNgrams'],
+                                'analytics': event['analytics'],
+                                'modelVersion': event['modelVersion'],
+                                'resultChunks': writer.close(),
+                                'completedAt': datetime.utcnow()
+                            },
+                            '$unset': {'results': ''}
+                        })
+                    if written.matched_count == 0: handle.cancel()
+                    handle.progress = 100
+                    summary = event
+    except Exception as e:
+        jobs.update_one(live, {'$set': {'status': 'failed', 'errorMessage': str(e), 'failedAt': datetime.utcnow()}})
+        metrics.record_job(mode, handle.lines_done, time.time() - start_time, 'failed')
+        raise
+    finally:
+        if hasattr(chunks, 'close'): chunks.close()  # Releases the source file when stopped early
+    
+    if handle.cancelled:  # The caller runs discard_cancelled_job (the queue via on_cancel)
+        metrics.record_job(mode, handle.lines_done, time.time() - start_time, 'cancelled')
+        print(f"🛑 Job {job_id} cancelled at {handle.lines_done}/{total_lines} lines")
+        return None
+    metrics.record_job(mode, handle.lines_done, time.time() - start_time)
+    print(f"✅ Job {job_id} completed ({mode})")
+    return summary
+
+def run_admitted_job(handle, estimate_mb, chunks, total_lines, job_id, user_id, mode='async'):
+    """Queue entry for async jobs: waits for a memory reservation, then run_async_job."""
+    try:
+        reservation = admission.acquire(estimate_mb)
+    except AdmissionRejected as e:
+        if hasattr(chunks, 'close'): chunks.close()
+        init_resources()
+        mongo_client.text_processor.processingjobs.update_one(
+            {'_id': ObjectId(job_id), 'status': {'$ne': 'cancelled'}},
+            {'$set': {'status': 'failed', 'errorMessage': str(e), 'failedAt': datetime.utcnow()}})
+        raise
+    with reservation:
+        return run_async_job(handle, chunks, total_lines, job_id, user_id, mode)
+
+def discard_cancelled_job(handle, upload=None):
+    """Cleanup for a cancelled job, whether it was still queued or stopped part way.
+
+    Marks the job cancelled and deletes the result chunks and postings it had
+    written. `upload` is the job's input file: a job cancelled while queued
+    never opened it, so it is closed here (which removes a spooled upload).
+    """
+    if upload is not None: upload.close()
+    init_resources()
+    mongo_client.text_processor.processingjobs.update_one(
+        {'_id': ObjectId(handle.job_id)},
+        {'$set': {'status': 'cancelled', 'cancelledAt': datetime.utcnow()}, '$unset': {'resultChunks': ''}})
+    result_store.delete(handle.job_id)
+    print(f"🧹 Job {handle.job_id} cancelled, partial results removed")
+
+def discard_failed_job(job_id, error):
+    """Like discard_cancelled_job, for a job that raised part way: marks it failed
+    with the error and deletes the result chunks and postings it had written."""
+    init_resources()
+    mongo_client.text_processor.processingjobs.update_one(
+        {'_id': ObjectId(job_id)},
+        {'$set': {'status': 'failed', 'errorMessage': str(error), 'failedAt': datetime.utcnow()},
+         '$unset': {'resultChunks': ''}})
+    result_store.delete(job_id)
+    print(f"🧹 Job {job_id} failed, partial results removed")
+
+def budgeted_process_content(content, filename, budget_mb, job_id=None, user_id=None):
+    """Score `content` in bounded memory: (summary, SpillStore of formatted result chunks).
+
+    Chunks are sized so the chunks in flight use about half of budget_mb.
+    Finished chunks are kept in memory up to the other half, then spilled to
+    disk. The texts are parsed chunk by chunk, never as one list. The caller
+    streams the store to Mongo and/or the response, then closes it.
+    """
+    start_time = time.time()
+    init_resources()
+    window = worker_pool.processes if worker_pool is not None and worker_pool.is_warm else 1
+    chunk_size = max(64, min(BATCH_SIZE, int(budget_mb * MB / 2 / (window * ROW_BYTES * 2))))
+    spill = SpillStore(budget_mb * MB / 2, SPILL_DIR)
+    summary = None
+    try:
+        chunks = iter_text_chunks(content, filename, chunk_size, INGEST_ENGINE)
+        for event in stream_process_texts(chunks, job_id, user_id, chunk_size):
+            if event['type'] == 'chunk':
+                spill.add(event['results'])
+            else:
+                summary = {k: v for k, v in event.items() if k != 'type'}
+    except BaseException:
+        spill.close()
+        metrics.record_job('budgeted', spill.lines, time.time() - start_time, 'failed')
+        raise
+    summary['processingMode'] = {
+        'mode': 'budgeted', 'workers': window, 'chunkSize': chunk_size, 'memoryBudgetMb': budget_mb,
+        'spilledChunks': spill.spilled_chunks,
+        'reason': f"{budget_mb:g}MB budget: chunks of {chunk_size}, results spilled to disk past {budget_mb / 2:g}MB"
+    }
+    metrics.record_job('budgeted', spill.lines, time.time() - start_time)
+    return summary, spill
+
+def pipelined_process_content(content, filename, plan, job_id=None, user_id=None):
+    """Same result as smart_process_texts, with the stages overlapped (see pipeline.py).
+
+    Chunks are parsed lazily on one thread, scored by the planned engine (the
+    warm pool or threads with two chunks per worker in flight, or in-process
+    batches on the score thread), formatted here in order, and written to
+    Mongo by an I/O thread while later chunks are still scoring. If the pool
+    or thread engine fails, the job reruns on in-process batches.
+    """
+    start_time = time.time()
+    init_resources()
+    version = current_model_version()
+    score = partial(analyze_batch, version=version)
+    executor = None
+    if plan.mode == 'process':
+        pool = init_worker_pool()
+        workers = min(plan.workers, pool.processes)
+        submit, collect = (lambda chunk: pool.submit(score, chunk)), pool.wait
+    elif plan.mode == 'thread':
+        workers = plan.workers
+        executor = ThreadPoolExecutor(max_workers=workers)
+        submit, collect = (lambda chunk: executor.submit(score, chunk)), (lambda future: future.result())
+    else:
+        workers = 1
+        submit, collect = (lambda chunk: chunk), score
+    stats = RunningStats()
+    formatted_results = []
+    writer = result_store.writer(job_id) if job_id and mongo_client else None
+    persist_errors = []
+
+    def format_chunk(results):
+        with metrics.stage('format', len(results)):
+            stats.add(results)
+            offset = len(formatted_results)
+            formatted = [format_result(r, offset + i + 1) for i, r in enumerate(results)]
+            formatted_results.extend(formatted)
+        return formatted
+
+    def persist(formatted):
+        if persist_errors: return  # Keep draining so scoring is not blocked; the job is reported unsaved
+        try:
+            with metrics.stage('mongo_write', len(formatted)):
+                writer.add(formatted)
+        except Exception as e:
+            persist_errors.append(e)
+            print(f"⚠️ Mongo Update Failed: {e}")
+
+    engine = Pipeline(submit, collect, format_chunk, persist if writer else None,
+                      inflight=workers * 2 if workers > 1 else 1, queue_size=PIPELINE_QUEUE_CHUNKS)
+    engine_error = None
+    try:
+        engine.run(iter_text_chunks(content, filename, plan.chunk_size, INGEST_ENGINE))
+    except Exception as e:
+        if plan.mode not in ('process', 'thread') or isinstance(e, IngestError):
+            metrics.record_job('pipelined', len(formatted_results), time.time() - start_time, 'failed')
+            raise
+        engine_error = e
+    except BaseException:
+        metrics.record_job('pipelined', len(formatted_results), time.time() - start_time, 'failed')
+        raise
+    finally:
+        if executor: executor.shutdown()
+    if engine_error is not None:
+        # Like smart_process_texts: a crashed worker or executor costs speed, not the job.
+        # The rerun's writer drops the chunks and postings this attempt already stored.
+        print(f"⚠️ pipelined {plan.mode} failed ({engine_error}) -> Batched Mode")
+        plan.reason = f"{plan.mode} failed ({engine_error}); fell back to in-process batches"
+        plan.mode, plan.workers, plan.chunk_size = 'batched', 1, BATCH_SIZE
+        return pipelined_process_content(content, filename, plan, job_id, user_id)
+    report = engine.report()
+    metrics.record_pipeline(report)
+
+    result = {
+        'jobId': job_id,
+        'userId': user_id,
+        'totalLines': len(formatted_results),
+        'processingTimeMs': int((time.time() - start_time) * 1000),
+        'workersUsed': workers,
+        **stats.summary(),
+        'analytics': stats.analytics.to_dict(),
+        'results': formatted_results,
+        'status': 'completed',
+        'processingMode': {**plan.to_dict(), 'mode': 'pipelined', 'pipeline': report,
+                           'reason': f"{plan.reason}; parse/score/format/persist overlapped, bottleneck: {report['bottleneck']}"},
+        'modelVersion': version,
+        'completedAt': datetime.utcnow().isoformat()
+    }
+    if writer and not persist_errors and result['totalLines']:
+        try:
+            with metrics.stage('mongo_write'):
+                mongo_client.text_processor.processingjobs.update_one(
+                    {'_id': ObjectId(job_id)},
+                    {'$set': completed_job_fields(result, writer.close()), '$unset': {'results': ''}})
+            print(f"✅ Job {job_id} updated in MongoDB")
+        except Exception as e:
+            print(f"⚠️ Mongo Update Failed: {e}")
+    metrics.record_job('pipelined', result['totalLines'], time.time() - start_time)
+    return result
+
 # ===== 6. API ENDPOINTS =====
+def admission_error(e):
+    return jsonify({'success': False, 'error': str(e)}), e.status, {'Retry-After': str(e.retry_after)}
+
 
 @app.route('/health', methods=['GET'])
 def health_check():
     try:
         init_resources()
-        return jsonify({'status': 'healthy', 'models_loaded': True}), 200
+        pool_status = worker_pool.health() if worker_pool else {'status': 'cold', 'workers': WORKER_COUNT}
+        return jsonify({
+            'status': 'healthy', 'models_loaded': True, 'modelFormat': 'compact' if isinstance(active_bundle.model, compact_model.CompactClassifier) else 'pickle',
+            'modelVersion': active_bundle.version,
+            'workerPool': pool_status,
+            'scheduler': scheduler.describe() if scheduler else {'calibrated': False},
+            'jobQueue': job_queue.stats(),
+            'predictionCache': prediction_cache.stats() if prediction_cache else None,
+            'microBatcher': micro_batcher.stats(),
+            'admission': admission.stats()
+        }), 200
     except Exception as e:
         return jsonify({'status': 'unhealthy', 'error': str(e)}), 500
 
+@app.route('/health/live', methods=['GET'])
+def liveness():
+    """Liveness: the process answers and its job runner still accepts work"""
+    if job_queue.closed:
+        return jsonify({'status': 'dead', 'reason': 'job queue shut down'}), 503
+    return jsonify({'status': 'alive', 'pid': os.getpid()}), 200
+
+@app.route('/health/ready', methods=['GET'])
+def readiness():
+    """Readiness: models loaded and no queue (jobs, memory, micro-batches) saturated"""
+    queue = job_queue.stats()
+    memory = admission.stats()
+    batcher = micro_batcher.stats()
+    reasons = []
+    if active_bundle is None: reasons.append('models not loaded')
+    if queue['queued'] >= MAX_PENDING_JOBS: reasons.append(f"{queue['queued']} jobs queued")
+    if memory['waiting'] >= memory['maxWaiting']: reasons.append(f"{memory['waiting']} requests waiting for memory")
+    if batcher['queuedRequests'] >= MICROBATCH_MAX_QUEUE: reasons.append(f"{batcher['queuedRequests']} requests waiting to be scored")
+    body = {'status': 'not ready' if reasons else 'ready', 'reasons': reasons,
+            'jobQueue': queue, 'admission': memory, 'microBatchQueuedRequests': batcher['queuedRequests']}
+    return jsonify(body), 503 if reasons else 200
+
+def parse_content(content, filename):
+    """Split uploaded content into texts; CSV / JSONL only parse the text column (see ingest.py)"""
+    return [text for chunk in iter_text_chunks(content, filename, BATCH_SIZE, INGEST_ENGINE) for text in chunk]
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Per-stage / per-mode metrics of the API process and its pool workers (Prometheus text format)"""
+    queue = job_queue.stats()
+    cache = prediction_cache.stats() if prediction_cache else {}
+    pool = worker_pool.health() if worker_pool else {}
+    gauges = {
+        'sentiment_jobs_running': ('Async jobs currently running', queue.get('running')),
+        'sentiment_jobs_queued': ('Async jobs waiting for a slot', queue.get('queued')),
+        'sentiment_cache_hits': ('Prediction cache hits since start', cache.get('hits')),
+        'sentiment_cache_misses': ('Prediction cache misses since start', cache.get('misses')),
+        'sentiment_cache_entries': ('Prediction cache entries in the API process', cache.get('entries')),
+        'sentiment_pool_workers_alive': ('Live pool worker processes', pool.get('alive')),
+        'sentiment_pool_restarts': ('Worker pool recycles since start', pool.get('restarts')),
+        'sentiment_microbatch_queued': ('Scoring requests waiting for a micro-batch', micro_batcher.stats()['queuedRequests'])
+    }
+    return Response(metrics.render(gauges), mimetype='text/plain; version=0.0.4')
+
+@app.route('/profile', methods=['GET', 'POST', 'DELETE'])
+def profile():
+    """POST arms the sampling profiler for the next job, GET returns its report, DELETE disarms."""
+    if not PROFILING_ENABLED:
+        return jsonify({'success': False, 'error': 'Profiling is disabled (set PROFILING_ENABLED=1)'}), 403
+    if request.method == 'POST':
+        interval_ms = float((request.get_json(silent=True) or {}).get('intervalMs', 5))
+        job_profiler.arm(max(1.0, interval_ms) / 1000)
+        return jsonify({'success': True, **job_profiler.status()}), 202
+    if request.method == 'DELETE':
+        job_profiler.disarm()
+    return jsonify({'success': True, **job_profiler.status()}), 200
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    if prediction_cache is None: return jsonify({'success': False, 'error': 'Prediction cache disabled'}), 404
+    return jsonify({'success': True, 'cache': prediction_cache.stats()}), 200
+
+@app.route('/model', methods=['GET'])
+def model_status():
+    """Active model version, versions loaded in this process, the registry and the last reload"""
+    try:
+        load_models()
+        versions = model_registry.list_versions(MODEL_REGISTRY_DIR)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+    current = model_registry.current_version(MODEL_REGISTRY_DIR)
+    return jsonify({
+        'success': True,
+        'active': active_bundle.to_dict(),
+        'loaded': list(_bundles),
+        'registry': {'path': MODEL_REGISTRY_DIR, 'current': current, 'watchSeconds': MODEL_WATCH_SECONDS,
+                     'versions': [{'version': m['version'], 'createdAt': m['createdAt'], 'notes': m.get('notes'),
+                                   'current': m['version'] == current} for m in versions]},
+        'lastReload': last_reload
+    }), 200
+
+@app.route('/model/reload', methods=['POST'])
+def model_reload():
+    """Swap in a model version without a restart: {"version": "<registry version>", "wait": true}
+
+    Without a version the registry's CURRENT is loaded. The reload runs in the
+    background (202; poll GET /model) unless wait is set.
+    """
+    data = request.get_json(silent=True) or {}
+    version = data.get('version')
+    if version is not None and not isinstance(version, str):
+        return jsonify({'success': False, 'error': 'version must be a string'}), 400
+    try:
+        status = reload_model(version, wait=bool(data.get('wait')))
+    except ReloadInProgress as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+    except RegistryError as e:
+        return jsonify({'success': False, 'error': str(e), 'reload': last_reload}), 422
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+    if status is None:
+        return jsonify({'success': True, 'reload': 'started', 'activeVersion': active_bundle.version}), 202
+    return jsonify({'success': True, 'reload': status, 'activeVersion': active_bundle.version}), 200
+
+@app.route('/analyze', methods=['POST'])
+def analyze():
+    """Score one text; concurrent calls are coalesced into one vectorized batch"""
+    start_time = time.perf_counter()
+    text = (request.get_json(silent=True) or {}).get('text')
+    if not isinstance(text, str) or not text.strip():
+        return jsonify({'success': False, 'error': 'text must be a non-empty string'}), 400
+    try:
+        load_models()
+        result = micro_batcher.score([text])[0]
+    except QueueFullError as e:
+        return jsonify({'success': False, 'error': str(e)}), 429
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+    metrics.request_seconds.observe(time.perf_counter() - start_time, endpoint='analyze')
+    return jsonify({'success': True, 'result': result}), 200
+
+@app.route('/analyze-batch', methods=['POST'])
+def analyze_batch_endpoint():
+    """Score a small list of texts ({"texts": [...]}), sharing micro-batches with /analyze"""
+    start_time = time.perf_counter()
+    texts = (request.get_json(silent=True) or {}).get('texts')
+    if not isinstance(texts, list) or not texts or not all(isinstance(t, str) for t in texts):
+        return jsonify({'success': False, 'error': 'texts must be a non-empty list of strings'}), 400
+    if len(texts) > ANALYZE_BATCH_MAX_TEXTS:
+        return jsonify({'success': False, 'error': f'At most {ANALYZE_BATCH_MAX_TEXTS} texts per call; use /process-content'}), 413
+    try:
+        load_models()
+        results = micro_batcher.score(texts)
+    except QueueFullError as e:
+        return jsonify({'success': False, 'error': str(e)}), 429
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+    metrics.request_seconds.observe(time.perf_counter() - start_time, endpoint='analyze_batch')
+    return jsonify({'success': True, 'count': len(results), 'results': results}), 200
+
+def completed_job_fields(result, result_index):
+    """$set for a finished sync job: its aggregates plus the chunk index of its stored lines"""
+    return {
+        'status': 'completed', 'progress': 100,
+        'resultChunks': result_index,
+        'sentimentDistribution': result['sentimentDistribution'],
+        'averageSentiment': result['averageSentiment'],
+        'totalLines': result['totalLines'],
+        'processingTimeMs': result['processingTimeMs'],
+        'workersUsed': result['workersUsed'],
+        'processingMode': result.get('processingMode'),
+        'topKeywords': result['topKeywords'],
+        'topNgrams': result['topNgrams'],
+        'analytics': result['analytics'],
+        'modelVersion': result.get('modelVersion'),
+        'completedAt': datetime.utcnow()
+    }
+
+def save_completed_job(job_id, result, result_chunks):
+    """Write result lines (an iterable of chunks) and the job's aggregates for a sync job."""
+    try:
+        with metrics.stage('mongo_write', result['totalLines']):
+            writer = result_store.writer(job_id)
+            for chunk in result_chunks:
+                writer.add(chunk)
+            mongo_client.text_processor.processingjobs.update_one(
+                {'_id': ObjectId(job_id)},
+                {'$set': completed_job_fields(result, writer.close()), '$unset': {'results': ''}}
+            )
+        print(f"✅ Job {job_id} updated in MongoDB")
+    except Exception as e:
+        print(f"⚠️ Mongo Update Failed: {e}")
+
+def stream_result_body(job_id, summary, spill):
+    """The usual {success, jobId, processingResult: {..., results: [...]}} JSON, written chunk by chunk"""
+    head = json.dumps({'success': True, 'jobId': job_id, 'processingResult': {**summary, 'results': None}},
+                      separators=(',', ':'), default=str)
+    yield head[:-len('null}}')] + '['
+    try:
+        separator = ''
+        for chunk in spill.chunks():
+            yield separator + ','.join(json.dumps(r, separators=(',', ':'), default=str) for r in chunk)
+            separator = ','
+        yield ']}}'
+    finally:
+        spill.close()
+
+def processing_response(job_id, result, columnar, fields, encoding):
+    if columnar:
+        result['results'] = response_format.to_columnar(result['results'], fields)
+    body, content_type, headers = response_format.encode(
+        {'success': True, 'jobId': job_id, 'processingResult': result},
+        encoding, accepts_gzip='gzip' in request.accept_encodings)
+    return Response(body, status=200, content_type=content_type, headers=headers)
+
 @app.route('/process-content', methods=['POST'])
 def process_content():
-    """Process text content directly (Smart CSV Support)"""
+    """Process text content directly (Smart CSV Support)
+
+    ?memoryBudgetMb=<n> (or JOB_MEMORY_BUDGET_MB) runs sync jobs in bounded
+    memory: results spill to disk and the response is streamed.
+    """
+    budget_mb = request.args.get('memoryBudgetMb', JOB_MEMORY_BUDGET_MB, type=float)
+    try:
+        # Reserved before the body is read; unbudgeted sync jobs keep every result in memory until the response
+        reservation = admission.acquire(budget_mb + 2 * (request.content_length or 0) / MB if budget_mb > 0 else
+                                        estimate_content_mb(request.content_length or 0, ADMISSION_CONTENT_FACTOR))
+    except AdmissionRejected as e:
+        return admission_error(e)
+    streaming = False
     try:
-        data = request.json
-        content = data.get('content', '')
-        filename = data.get('filename', 'unknown.txt').lower()
-        job_id = data.get('jobId')
-        user_id = data.get('userId')
+        with metrics.stage('request_parse'):
+            data = request.json
+            content = data.get('content', '')
+            filename = data.get('filename', 'unknown.txt').lower()
+            job_id = data.get('jobId')
+            user_id = data.get('userId')
+            # Optional compact response: {"responseFormat": "columnar", "fields": [...], "encoding": "gzip"|"msgpack"}
+            columnar = data.get('responseFormat') == 'columnar'
+            encoding = data.get('encoding', 'json')
         
         if not content: return jsonify({'success': False, 'error': 'No content'}), 400
+        if encoding not in response_format.ENCODINGS:
+            return jsonify({'success': False, 'error': f"encoding must be one of {', '.join(response_format.ENCODINGS)}"}), 400
+        if encoding == 'msgpack' and response_format.msgpack is None:
+            return jsonify({'success': False, 'error': 'msgpack is not installed on the Python API'}), 406
+        try:
+            fields = response_format.select_fields(data.get('fields')) if columnar else None
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         
         print(f"📊 Processing content from: {filename}")
-        texts = []
         
-        # SMART CSV PARSING
-        if filename.endswith('.csv'):
+        # BUDGETED MODE: bounded memory, results spilled to disk then streamed to Mongo and the response
+        if budget_mb > 0 and not data.get('async'):
+            if columnar or encoding != 'json':
+                return jsonify({'success': False, 'error': 'Budgeted jobs return JSON rows only (no responseFormat/encoding)'}), 400
             try:
-                csv_file = io.StringIO(content)
-                df = pd.read_csv(csv_file)
-                found = False
-                for col in ['text', 'content', 'message', 'review', 'comment']:
-                    if col in df.columns:
-                        texts = df[col].astype(str).tolist()
-                        found = True
-                        break
-                if not found and len(df.columns) > 0:
-                    texts = df.iloc[:, 0].astype(str).tolist() # Fallback
-            except:
-                texts = [line.strip() for line in content.split('\n') if line.strip()]
-        else:
-            texts = [line.strip() for line in content.split('\n') if line.strip()]
-            
+                with job_profiler.capture(job_id):
+                    summary, spill = budgeted_process_content(content, filename, budget_mb, job_id, user_id)
+            except IngestError as e:
+                return jsonify({'success': False, 'error': str(e)}), 400
+            if not summary['totalLines']:
+                spill.close()
+                return jsonify({'success': False, 'error': 'No text found'}), 400
+            if job_id and mongo_client: save_completed_job(job_id, summary, spill.chunks())
+            response = Response(stream_result_body(job_id, summary, spill), mimetype='application/json')
+            response.call_on_close(spill.close)
+            response.call_on_close(reservation.release)
+            streaming = True
+            return response
+        
+        # PIPELINED MODE: multi-chunk sync jobs parse, score and write to Mongo concurrently
+        if PIPELINE_ENABLED and not data.get('async'):
+            plan = init_scheduler().plan(content.count('\n') + 1, memory_mb=get_available_memory_mb(),
+                                         pool_warm=worker_pool is not None and worker_pool.is_warm)
+            if plan.mode != 'sequential':
+                print(f"🧭 pipelined {plan.mode} x{plan.workers} (chunk {plan.chunk_size}): {plan.reason}")
+                try:
+                    with job_profiler.capture(job_id):
+                        result = pipelined_process_content(content, filename, plan, job_id, user_id)
+                except IngestError as e:
+                    return jsonify({'success': False, 'error': str(e)}), 400
+                if not result['totalLines']: return jsonify({'success': False, 'error': 'No text found'}), 400
+                return processing_response(job_id, result, columnar, fields, encoding)
+        
+        try:
+            with metrics.stage('csv_parse'):
+                texts = parse_content(content, filename)
+        except IngestError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         if not texts: return jsonify({'success': False, 'error': 'No text found'}), 400
         
+        # ASYNC MODE: queue the job and return immediately; progress lands in Mongo
+        if data.get('async'):
+            if not job_id: return jsonify({'success': False, 'error': 'jobId is required for async jobs'}), 400
+            try:
+                handle = job_queue.submit(job_id, run_admitted_job, estimate_stream_mb(BATCH_SIZE, WORKER_COUNT, len(content)),
+                                          iter_chunks(texts, BATCH_SIZE), len(texts), job_id, user_id,
+                                          on_cancel=discard_cancelled_job)
+            except QueueFullError as e:
+                return jsonify({'success': False, 'error': str(e)}), 429
+            return jsonify({'success': True, 'jobId': job_id, 'job': handle.to_dict()}), 202
+        
         # SMART PROCESSING
-        result = smart_process_texts(texts, job_id, user_id)
+        with job_profiler.capture(job_id):
+            result = smart_process_texts(texts, job_id, user_id)
         
         # MONGO UPDATE
-        if job_id and mongo_client:
-            try:
-                mongo_client.text_processor.processingjobs.update_one(
-                    {'_id': ObjectId(job_id)},
-                    {'$set': {
-                        'status': 'completed', 'progress': 100,
-                        'results': result['results'],
-                        'sentimentDistribution': result['sentimentDistribution'],
-                        'averageSentiment': result['averageSentiment'],
-                        'totalLines': result['totalLines'],
-                        'processingTimeMs': result['processingTimeMs'],
-                        'workersUsed': result['workersUsed'],
-                        'processingMode': result.get('processingMode', 'sequential'),
-                        'completedAt': datetime.utcnow()
-                    }}
-                )
-                print(f"✅ Job {job_id} updated in MongoDB")
-            except Exception as e:
-                print(f"⚠️ Mongo Update Failed: {e}")
-                
-        return jsonify({'success': True, 'jobId': job_id, 'processingResult': result}), 200
+        if job_id and mongo_client: save_completed_job(job_id, result, [result['results']])
+        
+        return processing_response(job_id, result, columnar, fields, encoding)
         
     except Exception as e:
         print(f"❌ Error: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
+    finally:
+        if not streaming: reservation.release()
+
+def open_upload(fields):
+    """(binary file, filename) for /process-file: a multipart 'file', or a 'path' inside UPLOAD_DIR."""
+    if 'file' in request.files:
+        upload = request.files['file']
+        # Own copy on disk (anonymous, removed on close) so async jobs outlive the request
+        spool = tempfile.TemporaryFile()
+        shutil.copyfileobj(upload.stream, spool, 1 << 20)
+        spool.seek(0)
+        return spool, fields.get('filename') or upload.filename or 'upload.txt'
+    path = os.path.realpath(fields.get('path') or '')
+    if not path.startswith(UPLOAD_DIR + os.sep):
+        raise PermissionError(f"path must be inside the upload directory ({UPLOAD_DIR})")
+    # Opened now, so the job keeps reading even if the uploader deletes the file
+    return open(path, 'rb'), fields.get('filename') or os.path.basename(path)
+
+@app.route('/process-file', methods=['POST'])
+def process_file():
+    """Process a file without shipping it through JSON: {path} of a shared upload, or multipart 'file'.
+
+    Plain text is memory-mapped and decoded chunk by chunk; CSV/JSONL/Parquet
+    read only the text column. Results go to Mongo in chunks, so memory tracks
+    the chunk size rather than the file size.
+    """
+    upload = None
+    try:
+        with metrics.stage('request_parse'):
+            fields = request.form if request.files else (request.get_json(silent=True) or {})
+            job_id = fields.get('jobId')
+            user_id = fields.get('userId')
+            run_async = str(fields.get('async', '')).lower() in ('1', 'true')
+        if not job_id: return jsonify({'success': False, 'error': 'jobId is required'}), 400
+        
+        try:
+            upload, filename = open_upload(fields)
+        except PermissionError as e:
+            return jsonify({'success': False, 'error': str(e)}), 403
+        except OSError as e:
+            return jsonify({'success': False, 'error': f'Cannot open file: {e.strerror}'}), 404
+        
+        init_resources()
+        total_lines = count_lines(upload)
+        chunks = iter_file_chunks(upload, BATCH_SIZE, INGEST_ENGINE, filename)
+        print(f"📂 Processing file: {filename} (~{total_lines} lines)")
+        
+        estimate_mb = estimate_stream_mb(BATCH_SIZE, WORKER_COUNT)
+        if run_async:
+            try:
+                handle = job_queue.submit(job_id, run_admitted_job, estimate_mb, chunks, total_lines, job_id, user_id, 'file',
+                                          on_cancel=partial(discard_cancelled_job, upload=upload))
+            except QueueFullError as e:
+                upload.close()
+                return jsonify({'success': False, 'error': str(e)}), 429
+            upload = None  # Owned by the job now
+            return jsonify({'success': True, 'jobId': job_id, 'job': handle.to_dict()}), 202
+        
+        handle = JobHandle(job_id)
+        with admission.acquire(estimate_mb):
+            summary = run_async_job(handle, chunks, total_lines, job_id, user_id, mode='file')
+        if summary is None:
+            discard_cancelled_job(handle)
+            return jsonify({'success': False, 'jobId': job_id, 'error': 'Job was cancelled'}), 409
+        return jsonify({'success': True, 'jobId': job_id, 'processingResult': summary}), 200
+    except IngestError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except AdmissionRejected as e:
+        return admission_error(e)
+    except Exception as e:
+        print(f"❌ File Error: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+    finally:
+        if upload is not None: upload.close()
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    handle = job_queue.get(job_id)
+    if handle is None: return jsonify({'success': False, 'error': 'Job not found in queue'}), 404
+    return jsonify({'success': True, 'job': handle.to_dict()}), 200
+
+@app.route('/jobs/<job_id>/results', methods=['GET'])
+def job_results(job_id):
+    """Paginated result lines of a job: ?start=<lineNumber>&limit=<n>"""
+    try:
+        init_resources()
+        start = max(1, request.args.get('start', 1, type=int))
+        limit = min(max(1, request.args.get('limit', 100, type=int)), 5000)
+        lines = result_store.read(job_id, start, limit)
+        return jsonify({'success': True, 'jobId': job_id, 'start': start, 'limit': limit, 'results': lines}), 200
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/search/lines', methods=['GET'])
+def search_lines():
+    """Result lines across jobs containing terms: ?q=battery slow&match=all|any&label=negative,neutral
+    &minConfidence=&userId=&since=&until=&days=&jobId=&page=&limit= (newest job first)"""
+    start_time = time.perf_counter()
+    args = request.args
+    if not SEARCH_INDEX_ENABLED:
+        return jsonify({'success': False, 'error': 'Line search is disabled (SEARCH_INDEX_ENABLED=0)'}), 404
+    try:
+        terms = query_terms(args.get('q', ''))
+        labels = [label for label in args.get('label', '').split(',') if label]
+        if any(label not in response_format.LABELS for label in labels):
+            raise ValueError(f"label must be one of {', '.join(response_format.LABELS)}")
+        match = args.get('match', 'all')
+        if match not in ('all', 'any'): raise ValueError('match must be all or any')
+        page = max(1, args.get('page', 1, type=int))
+        limit = min(max(1, args.get('limit', 20, type=int)), 100)
+        jobs_filter = {'status': 'completed', 'resultChunks.collection': {'$exists': True}}
+        if args.get('userId'): jobs_filter['userId'] = ObjectId(args['userId'])
+        if args.get('jobId'): jobs_filter['_id'] = ObjectId(args['jobId'])
+        created = {}
+        if args.get('days'): created['$gte'] = datetime.utcnow() - timedelta(days=float(args['days']))
+        if args.get('since'): created['$gte'] = datetime.fromisoformat(args['since'])
+        if args.get('until'): created['$lt'] = datetime.fromisoformat(args['until'])
+        if created: jobs_filter['createdAt'] = created
+    except (ValueError, TypeError, InvalidId) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    if not terms:
+        return jsonify({'success': False, 'error': 'q must contain at least one searchable word'}), 400
+    try:
+        init_resources()
+        db = mongo_client.text_processor
+        jobs = {job['_id']: job for job in db.processingjobs.find(jobs_filter, {'originalFilename': 1, 'createdAt': 1})
+                .sort('createdAt', -1).limit(MAX_SEARCH_JOBS)}
+        total, hits = result_store.postings.search(terms, list(jobs), match, labels,
+                                                   args.get('minConfidence', type=float), (page - 1) * limit, limit)
+        # Original text of just this page's lines, filtered inside their chunk documents
+        texts = {}
+        if hits:
+            wanted = [hit['lineNumber'] for hit in hits]
+            cursor = result_store.collection.aggregate([
+                {'$match': {'$or': [{'jobId': ObjectId(hit['jobId']), 'startLine': {'$lte': hit['lineNumber']},
+                                     'endLine': {'$gte': hit['lineNumber']}} for hit in hits]}},
+                {'$project': {'_id': 0, 'jobId': 1, 'lines': {'$filter': {
+                    'input': '$lines', 'cond': {'$in': ['$$this.lineNumber', wanted]}}}}},
+                {'$project': {'jobId': 1, 'lines.lineNumber': 1, 'lines.originalText': 1, 'lines.sentimentScore': 1}}
+            ])
+            for chunk in cursor:
+                for line in chunk['lines']:
+                    texts[(str(chunk['jobId']), line['lineNumber'])] = line
+        for hit in hits:
+            job = jobs.get(ObjectId(hit['jobId'])) or {}
+            line = texts.get((hit['jobId'], hit['lineNumber']), {})
+            hit.update({'originalText': line.get('originalText'), 'sentimentScore': line.get('sentimentScore'),
+                        'filename': job.get('originalFilename'), 'jobCreatedAt': job.get('createdAt')})
+        return jsonify({
+            'success': True, 'terms': terms, 'match': match, 'results': hits,
+            'pagination': {'page': page, 'limit': limit, 'total': total, 'totalPages': -(-total // limit)},
+            'jobsSearched': len(jobs), 'tookMs': round((time.perf_counter() - start_time) * 1000, 1)
+        }), 200
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    handle = job_queue.cancel(job_id)
+    if handle is None: return jsonify({'success': False, 'error': 'Job not found in queue'}), 404
+    return jsonify({'success': True, 'job': handle.to_dict()}), 200
+
+@app.route('/process-stream', methods=['POST'])
+def process_stream():
+    """Stream a file in, stream NDJSON results out (one line per chunk).
+
+    ?filename=<name> picks the parser (.csv / .jsonl / .parquet, else one text per line).
+    """
+    try:
+        init_resources()  # Before `jobs` below: a cold worker has no Mongo client yet
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+    job_id = request.args.get('jobId')
+    user_id = request.args.get('userId')
+    chunk_size = max(1, request.args.get('chunkSize', BATCH_SIZE, type=int))
+    filename = request.args.get('filename', '')
+    window = worker_pool.processes if worker_pool is not None and worker_pool.is_warm else 1
+    parquet = detect_format(filename) == 'parquet'
+    try:
+        reservation = admission.acquire(estimate_stream_mb(chunk_size, window) + (64 if parquet else 0))
+    except AdmissionRejected as e:
+        return admission_error(e)
+    body = request.stream
+    if parquet:
+        # The footer is read first, so Parquet needs a seekable copy
+        spooled = tempfile.SpooledTemporaryFile(max_size=64 << 20)
+        try:
+            shutil.copyfileobj(body, spooled, 1 << 20)
+        except Exception:
+            reservation.release()
+            raise
+        spooled.seek(0)
+        body = spooled
+    jobs = mongo_client.text_processor.processingjobs if job_id and mongo_client else None
+
+    def generate():
+        start_time = time.time()
+        lines_done = 0
+        try:
+            with job_profiler.capture(job_id):
+                writer = result_store.writer(job_id) if jobs is not None else None
+                chunks = iter_text_chunks(body, filename, chunk_size, INGEST_ENGINE)
+                for event in stream_process_texts(chunks, job_id, user_id, chunk_size):
+                    if event['type'] == 'chunk':
+                        lines_done += len(event['results'])
+                    if jobs is not None:
+                        with metrics.stage('mongo_write', len(event.get('results', ()))):
+                            if event['type'] == 'chunk':
+                                writer.add(event['results'])
+                            else:
+                                jobs.update_one({'_id': ObjectId(job_id)}, {'$unset': {'results': ''}, '$set': {
+                                    'status': 'completed', 'progress': 100,
+                                    'sentimentDistribution': event['sentimentDistribution'],
+                                    'averageSentiment': event['averageSentiment'],
+                                    'totalLines': event['totalLines'],
+                                    'processingTimeMs': event['processingTimeMs'],
+                                    'workersUsed': event['workersUsed'],
+                                    'processingMode': event['processingMode'],
+                                    'topKeywords': event['topKeywords'],
+                                    'topNgrams': event['topNgrams'],
+                                    'analytics': event['analytics'],
+                                    'modelVersion': event['modelVersion'],
+                                    'resultChunks': writer.close(),
+                                    'completedAt': datetime.utcnow()
+                                }})
+                    yield json.dumps(event) + '\n'
+            metrics.record_job('stream', lines_done, time.time() - start_time)
+        except Exception as e:
+            print(f"❌ Stream Error: {e}")
+            metrics.record_job('stream', lines_done, time.time() - start_time, 'failed')
+            if jobs is not None:
+                try:
+                    discard_failed_job(job_id, e)
+                except Exception as cleanup_error:
+                    print(f"⚠️ Mongo Update Failed: {cleanup_error}")
+            yield json.dumps({'type': 'error', 'error': str(e)}) + '\n'
+
+    print(f"📡 Streaming job {job_id}")
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    response.call_on_close(reservation.release)  # Held until the last chunk is sent (or the client leaves)
+    return response
 
 if __name__ == '__main__':
+    # Development server; in production use `gunicorn -c gunicorn.conf.py wsgi:app`
     try:
+        init_worker_pool()  # Fork before Mongo so workers never inherit its sockets
+        init_scheduler()
         init_resources()
     except: pass
     app.run(host='0.0.0.0', port=8000)
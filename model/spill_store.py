@@ -0,0 +1,64 @@
+# spill_store.py
+import os
+import pickle
+import tempfile
+
+from admission import ROW_BYTES
+
+
+class SpillStore:
+    """Ordered result chunks: held in memory up to max_bytes, then appended to a temp file.
+
+    Once spilling starts every later chunk goes to disk too, so reading back
+    is the in-memory prefix followed by the file. The file is anonymous and
+    disappears on close (or when the process dies).
+    """
+
+    def __init__(self, max_bytes, directory=None):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.lines = 0
+        self.spilled_chunks = 0
+        self._memory = []
+        self._memory_bytes = 0
+        self._file = None
+
+    def add(self, chunk):
+        self.lines += len(chunk)
+        size = len(chunk) * ROW_BYTES
+        if self._file is None and self._memory_bytes + size <= self.max_bytes:
+            self._memory.append(chunk)
+            self._memory_bytes += size
+            return
+        if self._file is None:
+            self._file = tempfile.TemporaryFile(dir=self.directory)
+        pickle.dump(chunk, self._file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.spilled_chunks += 1
+
+    def chunks(self):
+        """Every chunk in the order added; may be iterated more than once."""
+        yield from self._memory
+        if self._file is None: return
+        self._file.flush()
+        self._file.seek(0)
+        while True:
+            try:
+                chunk = pickle.load(self._file)
+            except EOFError:
+                break
+            yield chunk
+        self._file.seek(0, os.SEEK_END)
+
+    def stats(self):
+        return {
+            'lines': self.lines,
+            'memoryChunks': len(self._memory),
+            'spilledChunks': self.spilled_chunks,
+            'spilledBytes': self._file.tell() if self._file else 0
+        }
+
+    def close(self):
+        self._memory = []
+        if self._file is not None:
+            self._file.close()
+            self._file = None
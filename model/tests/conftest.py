@@ -0,0 +1,6 @@
+# conftest.py
+import os
+import sys
+
+# The model/ modules import each other by bare name (they run from model/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,25 @@
+# test_ingest.py
+import io
+
+import pytest
+
+import ingest
+from ingest import iter_csv_chunks
+
+ROWS = ['great app,\nreally fast', 'plain line', 'awful\n\nsupport, "never" again', 'last'] * 50
+
+
+def _multiline_csv(texts):
+    quoted = ('"' + text.replace('"', '""') + '"' for text in texts)
+    return ('id,text\n' + ''.join(f'{i},{text}\n' for i, text in enumerate(quoted))).encode()
+
+
+@pytest.mark.parametrize('engine', ['pandas', 'pyarrow'])
+def test_csv_quoted_newlines_stay_in_one_row(engine, monkeypatch):
+    if engine == 'pyarrow':
+        pytest.importorskip('pyarrow')
+        # Small blocks so quoted newlines land on block boundaries, as they do in large uploads
+        monkeypatch.setattr(ingest, 'ARROW_BLOCK_BYTES', 256)
+    chunks = list(iter_csv_chunks(io.BytesIO(_multiline_csv(ROWS)), 64, engine=engine))
+    assert [len(chunk) for chunk in chunks] == [64, 64, 64, 8]
+    assert [text for chunk in chunks for text in chunk] == ROWS
@@ -0,0 +1,47 @@
+# test_text_normalizer.py
+import re
+
+import pandas as pd
+import pytest
+from nltk.corpus import stopwords
+
+from text_normalizer import NEGATIONS, _sample_corpus, load_stop_words, normalize, normalize_many
+
+
+def reference_clean_text(text):
+    """The original per-line clean_text / smart_clean_text that normalize() replaced."""
+    if pd.isna(text): return ""
+    text = str(text).lower()
+    text = re.sub(r'[^a-zA-Z0-9\s]', ' ', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    stop_words = set(stopwords.words('english'))
+    safe_stop_words = stop_words - set(NEGATIONS)
+    words = text.split()
+    words = [word for word in words if word not in safe_stop_words]
+    return ' '.join(words)
+
+
+EDGE_CASES = [
+    "The app is NOT great!!!", "Rated 7/10.", "I'm sure it won't work", "Neither good nor bad",
+    "l'écran naïve İstanbul ΣΊΣΥΦΟΣ K", "tab\there new\nline", "nbsp x", "x\x1cy", "ﬁne über 2nd",
+    "emoji 🙂 --", "", "   ", "!!!", None, float('nan'), 42, 3.5
+]
+
+
+@pytest.fixture(scope='module')
+def corpus():
+    load_stop_words()
+    return EDGE_CASES + _sample_corpus(5000)
+
+
+def test_normalize_matches_the_original_cleaner(corpus):
+    for text in corpus:
+        assert normalize(text) == reference_clean_text(text), repr(text)
+
+
+def test_normalize_many_matches_the_original_cleaner(corpus):
+    assert normalize_many(corpus) == [reference_clean_text(t) for t in corpus]
+
+
+def test_negations_are_kept():
+    assert normalize("This is not what I wanted, never again") == "not wanted never"
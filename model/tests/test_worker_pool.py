@@ -0,0 +1,58 @@
+# test_worker_pool.py
+import threading
+import time
+
+import pytest
+
+from worker_pool import WorkerCrashedError, WorkerPool
+
+
+def _slow_square(x):
+    time.sleep(2)
+    return x * x
+
+
+@pytest.fixture
+def pool():
+    # Polls slower than a recycle takes, so the waiter only ever sees the new, healthy pool
+    pool = WorkerPool(1, poll_interval=1.0).start()
+    yield pool
+    pool.shutdown()
+
+
+def _run_concurrently(call):
+    outcome = {}
+
+    def run():
+        try:
+            outcome['result'] = call()
+        except BaseException as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread, outcome
+
+
+def test_map_fails_fast_when_pool_is_recycled_meanwhile(pool):
+    thread, outcome = _run_concurrently(lambda: pool.map(_slow_square, [1, 2, 3]))
+    time.sleep(0.3)
+    pool.recycle()
+    thread.join(10)
+    assert not thread.is_alive(), 'map() hung after the pool was recycled'
+    assert isinstance(outcome.get('error'), WorkerCrashedError)
+
+
+def test_submit_fails_fast_when_pool_is_recycled_meanwhile(pool):
+    handle = pool.submit(_slow_square, 3)
+    thread, outcome = _run_concurrently(lambda: pool.wait(handle))
+    time.sleep(0.3)
+    pool.recycle()
+    thread.join(10)
+    assert not thread.is_alive(), 'wait() hung after the pool was recycled'
+    assert isinstance(outcome.get('error'), WorkerCrashedError)
+
+
+def test_map_after_recycle_uses_the_new_pool(pool):
+    pool.recycle()
+    assert pool.map(abs, [-1, -2]) == [1, 2]
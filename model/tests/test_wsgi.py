@@ -0,0 +1,34 @@
+# test_wsgi.py
+import json
+import os
+import subprocess
+import sys
+
+MODEL_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter: preload like the gunicorn master, then fork like a serving worker
+PRELOAD = '''
+import json, os, threading
+import wsgi, sentiment_api
+master = [t.name for t in threading.enumerate()]
+read, write = os.pipe()
+if os.fork() == 0:
+    sentiment_api.load_models()  # What every request path does first in a serving worker
+    os.write(write, json.dumps([t.name for t in threading.enumerate()]).encode())
+    os._exit(0)
+os.close(write)
+worker = json.loads(os.read(read, 65536))
+os.wait()
+print(json.dumps({'master': master, 'worker': worker}))
+'''
+
+
+def test_preload_starts_no_model_watcher_in_master(tmp_path):
+    env = dict(os.environ, MODEL_REGISTRY_DIR=str(tmp_path), MODEL_WATCH_SECONDS='30',
+               PREDICTION_CACHE_MB='0', WORKER_COUNT='1')
+    proc = subprocess.run([sys.executable, '-c', PRELOAD], cwd=MODEL_DIR, env=env,
+                          capture_output=True, text=True, timeout=180)
+    assert proc.returncode == 0, proc.stderr
+    threads = json.loads(proc.stdout.strip().splitlines()[-1])
+    assert 'model-watcher' not in threads['master']
+    assert 'model-watcher' in threads['worker']
@@ -0,0 +1,78 @@
+# text_normalizer.py
+"""Text cleaning shared by the API and the retraining script.
+
+normalize() is byte-for-byte identical to the original clean_text /
+smart_clean_text: lowercase, keep [a-z0-9] runs, drop English stopwords
+except negations. tests/test_text_normalizer.py checks that against the
+original implementation; `python text_normalizer.py` prints lines/sec.
+"""
+import re
+import sys
+import time
+
+import pandas as pd
+import nltk
+from nltk.corpus import stopwords
+
+NEGATIONS = frozenset({'no', 'not', 'nor', 'never', 'none', 'neither'})
+
+# After lower(), the original "[^a-zA-Z0-9\s] -> ' '" plus whitespace split
+# leaves exactly the maximal runs of ASCII letters/digits.
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+_stop_words = None
+
+
+def load_stop_words():
+    """Stopwords minus negations, computed once per process."""
+    global _stop_words
+    if _stop_words is None:
+        try:
+            nltk.data.find('corpora/stopwords')
+        except LookupError:
+            nltk.download('stopwords')
+        _stop_words = frozenset(stopwords.words('english')) - NEGATIONS
+    return _stop_words
+
+
+def _as_text(text):
+    if type(text) is str: return text
+    return "" if pd.isna(text) else str(text)
+
+
+def normalize(text):
+    stop = _stop_words or load_stop_words()
+    return ' '.join([w for w in _TOKEN.findall(_as_text(text).lower()) if w not in stop])
+
+
+def normalize_many(texts):
+    """Normalize a whole column in one pass with every lookup bound locally."""
+    stop = _stop_words or load_stop_words()
+    findall, as_text, join = _TOKEN.findall, _as_text, ' '.join
+    return [join([w for w in findall((t if type(t) is str else as_text(t)).lower()) if w not in stop])
+            for t in texts]
+
+
+def _sample_corpus(n_lines, seed=7):
+    import random
+    rng = random.Random(seed)
+    pieces = ["The app", "is", "NOT", "great!!!", "Rated 7/10.", "I'm", "can't", "won't", "Battery",
+              "l'écran", "naïve", "İstanbul", "ΣΊΣΥΦΟΣ", "K", "tab\there", "new line",
+              "nbsp x", "¡¿", "emoji 🙂", "  ", "x\x1cy", "über", "ﬁne", "2nd", "--", "Neither"]
+    lines = [' '.join(rng.choice(pieces) for _ in range(rng.randint(0, 14))) for _ in range(n_lines)]
+    return lines + [None, float('nan'), 42, '', '!!!']
+
+
+def _lines_per_sec(fn, lines):
+    start = time.perf_counter()
+    fn(lines)
+    return len(lines) / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    n_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    corpus = _sample_corpus(n_lines)
+    load_stop_words()
+
+    print(f"normalize:      {_lines_per_sec(lambda ls: [normalize(t) for t in ls], corpus):>12,.0f} lines/sec")
+    print(f"normalize_many: {_lines_per_sec(normalize_many, corpus):>12,.0f} lines/sec")
@@ -1,51 +1,329 @@
-# view_database.py
-import sqlite3
-import pandas as pd
+# view_db.py
+"""Explore and export processing results stored in MongoDB (text_processor).
+
+    python view_db.py jobs --limit 10
+    python view_db.py summary [--since 2026-01-01] [--until ...] [--user ID]
+    python view_db.py summary --job JOB_ID          # line-level, from the stored results
+    python view_db.py trend --unit day [--since ...]
+    python view_db.py export --job JOB_ID --out results.csv
+    python view_db.py export --since 2026-01-01 --until 2026-02-01 --out results.parquet
+
+Summaries and trends run as aggregation pipelines on the server; only the
+grouped rows come back. Exports read result chunks (processingresults, see
+result_store.py) through batched cursors that project just the requested
+fields, and write rows as they arrive, so memory stays flat no matter how
+many lines are exported. Parquet output needs pyarrow.
+"""
+import argparse
+import csv
+import os
+import sys
 import time
+from datetime import datetime
+
+import pymongo
+from bson import ObjectId
+from dotenv import load_dotenv
+
+from response_format import FIELDS, select_fields
+from result_store import RESULTS_COLLECTION
+
+load_dotenv()
+
+MONGO_URI = os.environ.get('MONGO_URI', 'mongodb://localhost:27017')
+DB_NAME = 'text_processor'
+JOBS_COLLECTION = 'processingjobs'
+EXPORT_BATCH_LINES = 10_000  # Lines per cursor batch / Parquet row group
+PROGRESS_SECONDS = 1.0
+TREND_FORMATS = {'hour': '%Y-%m-%dT%H:00', 'day': '%Y-%m-%d', 'week': '%G-W%V', 'month': '%Y-%m'}
+LABELS = ('positive', 'neutral', 'negative')
+
+
+def connect(uri=MONGO_URI):
+    client = pymongo.MongoClient(uri, serverSelectionTimeoutMS=5000)
+    return client[DB_NAME]
+
+
+def _date(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+def job_filter(args):
+    """processingjobs filter from --job / --user / --status / --since / --until."""
+    if getattr(args, 'job', None): return {'_id': ObjectId(args.job)}
+    match = {}
+    if args.user: match['userId'] = ObjectId(args.user)
+    if args.status: match['status'] = args.status
+    if args.since or args.until:
+        match['createdAt'] = {k: v for k, v in (('$gte', _date(args.since)), ('$lt', _date(args.until))) if v}
+    return match
+
+
+# ----- Job listing -----
+
+def list_jobs(db, args):
+    projection = {'originalFilename': 1, 'status': 1, 'totalLines': 1, 'averageSentiment': 1,
+                  'processingTimeMs': 1, 'processingMode.mode': 1, 'createdAt': 1}
+    cursor = db[JOBS_COLLECTION].find(job_filter(args), projection).sort('createdAt', -1).limit(args.limit)
+    print(f"{'jobId':<24}  {'created':<19}  {'status':<10} {'lines':>9} {'avgSent':>8} {'ms':>8}  mode  file")
+    for job in cursor:
+        created = job.get('createdAt')
+        print(f"{str(job['_id']):<24}  {created.strftime('%Y-%m-%d %H:%M:%S') if created else '-':<19}  "
+              f"{job.get('status', '-'):<10} {job.get('totalLines') or 0:>9} "
+              f"{job.get('averageSentiment') or 0:>8.3f} {job.get('processingTimeMs') or 0:>8.0f}  "
+              f"{(job.get('processingMode') or {}).get('mode', '-')}  {job.get('originalFilename', '')}")
+
+
+# ----- Server-side summaries -----
+
+def _weighted_sentiment():
+    return {'$sum': {'$multiply': [{'$ifNull': ['$averageSentiment', 0]}, {'$ifNull': ['$totalLines', 0]}]}}
+
+
+def _totals_group(key):
+    return {
+        '_id': key,
+        'jobs': {'$sum': 1},
+        'lines': {'$sum': {'$ifNull': ['$totalLines', 0]}},
+        'sentimentWeight': _weighted_sentiment(),
+        'processingMs': {'$sum': {'$ifNull': ['$processingTimeMs', 0]}},
+        **{label: {'$sum': {'$ifNull': [f'$sentimentDistribution.{label}', 0]}} for label in LABELS}
+    }
+
+
+def _finish(row):
+    """Turn the summed weight into a line-weighted average sentiment."""
+    row['averageSentiment'] = round(row.pop('sentimentWeight') / row['lines'], 4) if row['lines'] else None
+    return row
+
+
+def job_summary(db, args):
+    """Totals by status and by processing mode, one round trip."""
+    pipeline = [
+        {'$match': job_filter(args)},
+        {'$facet': {
+            'overall': [{'$group': _totals_group(None)}],
+            'byStatus': [{'$group': _totals_group('$status')}, {'$sort': {'jobs': -1}}],
+            'byMode': [{'$group': _totals_group('$processingMode.mode')}, {'$sort': {'jobs': -1}}]
+        }}
+    ]
+    facets = next(db[JOBS_COLLECTION].aggregate(pipeline, allowDiskUse=True))
+    if not facets['overall']:
+        print("No jobs match.")
+        return
+    overall = _finish(facets['overall'][0])
+    print("=== Jobs ===")
+    print(f"Jobs: {overall['jobs']} | Lines: {overall['lines']:,} | Avg sentiment: {overall['averageSentiment']} "
+          f"| Processing time: {overall['processingMs'] / 1000:,.1f}s")
+    scored = sum(overall[label] for label in LABELS)
+    print("\nSentiment Distribution:")
+    for label in LABELS:
+        print(f"  {label:<9} {overall[label]:>12,} {overall[label] * 100 / scored if scored else 0:6.2f}%")
+    for title, rows in (('By status', facets['byStatus']), ('By mode', facets['byMode'])):
+        print(f"\n{title}:")
+        for row in map(_finish, rows):
+            rate = row['lines'] * 1000 / row['processingMs'] if row['processingMs'] else 0
+            print(f"  {str(row['_id']):<12} jobs={row['jobs']:<6} lines={row['lines']:<11,} "
+                  f"avgSentiment={row['averageSentiment']} lines/s={rate:,.0f}")
+
+
+def _line_source(db, job):
+    """(collection, pipeline prefix, path prefix) for a job's result lines, chunked or embedded."""
+    if (job.get('resultChunks') or {}).get('collection'):
+        return db[RESULTS_COLLECTION], [{'$match': {'jobId': job['_id']}}, {'$unwind': '$lines'}], '$lines.'
+    return db[JOBS_COLLECTION], [{'$match': {'_id': job['_id']}}, {'$unwind': '$results'}], '$results.'
+
+
+def line_summary(db, args):
+    """Per-label counts, scores and a confidence histogram computed from a job's stored lines."""
+    job = db[JOBS_COLLECTION].find_one({'_id': ObjectId(args.job)}, {'resultChunks': 1, 'originalFilename': 1})
+    if job is None: raise SystemExit(f"❌ Job {args.job} not found")
+    collection, pipeline, path = _line_source(db, job)
+    pipeline = pipeline + [{'$facet': {
+        'byLabel': [{'$group': {
+            '_id': f'{path}sentimentLabel',
+            'lines': {'$sum': 1},
+            'averageScore': {'$avg': f'{path}sentimentScore'},
+            'averageConfidence': {'$avg': f'{path}metadata.confidence'}
+        }}, {'$sort': {'lines': -1}}],
+        'confidence': [{'$bucket': {
+            'groupBy': {'$ifNull': [f'{path}metadata.confidence', 0]},
+            'boundaries': [i / 10 for i in range(10)] + [1.000001],
+            'default': 'other'
+        }}]
+    }}]
+    facets = next(collection.aggregate(pipeline, allowDiskUse=True))
+    total = sum(row['lines'] for row in facets['byLabel'])
+    print(f"=== Job {args.job} ({job.get('originalFilename', '')}) — {total:,} lines ===")
+    for row in facets['byLabel']:
+        print(f"  {str(row['_id']):<9} {row['lines']:>10,} {row['lines'] * 100 / total:6.2f}%  "
+              f"avgScore={row['averageScore'] or 0:.4f} avgConfidence={row['averageConfidence'] or 0:.4f}")
+    print("\nConfidence histogram:")
+    for row in facets['confidence']:
+        low = row['_id']
+        label = f"{low:.1f}-{min(low + 0.1, 1.0):.1f}" if isinstance(low, float) else str(low)
+        print(f"  {label:<8} {row['count']:>10,} {'#' * round(row['count'] * 50 / total)}")
+
+
+def trend(db, args):
+    """Jobs, lines and line-weighted sentiment per hour / day / week / month of createdAt."""
+    pipeline = [
+        {'$match': {**job_filter(args), 'status': args.status or 'completed'}},
+        {'$group': _totals_group({'$dateToString': {'format': TREND_FORMATS[args.unit], 'date': '$createdAt'}})},
+        {'$sort': {'_id': 1}}
+    ]
+    print(f"{args.unit:<16} {'jobs':>6} {'lines':>12} {'avgSent':>8} {'pos%':>6} {'neu%':>6} {'neg%':>6}")
+    for row in map(_finish, db[JOBS_COLLECTION].aggregate(pipeline, allowDiskUse=True)):
+        scored = sum(row[label] for label in LABELS) or 1
+        print(f"{row['_id']:<16} {row['jobs']:>6} {row['lines']:>12,} {row['averageSentiment'] or 0:>8.3f} "
+              + ' '.join(f"{row[label] * 100 / scored:>6.1f}" for label in LABELS))
+
+
+# ----- Export -----
+
+def _projection(fields):
+    return ['lineNumber'] + ['.'.join(FIELDS[field]) for field in fields]
+
+
+def iter_job_lines(db, job, fields, batch_size=EXPORT_BATCH_LINES):
+    """Result lines of one job in lineNumber order, only the requested fields, batch by batch."""
+    paths = _projection(fields)
+    if (job.get('resultChunks') or {}).get('collection'):
+        chunk_lines = job['resultChunks'].get('chunkSize') or 1000
+        cursor = db[RESULTS_COLLECTION].find(
+            {'jobId': job['_id']}, {'_id': 0, **{f'lines.{p}': 1 for p in paths}}
+        ).sort('startLine', 1).batch_size(max(1, batch_size // chunk_lines))
+        for chunk in cursor:
+            yield from chunk['lines']
+    else:  # Older jobs with results embedded in the job document
+        cursor = db[JOBS_COLLECTION].aggregate([
+            {'$match': {'_id': job['_id']}},
+            {'$project': {'_id': 0, **{f'results.{p}': 1 for p in paths}}},
+            {'$unwind': '$results'},
+            {'$replaceRoot': {'newRoot': '$results'}}
+        ], batchSize=batch_size, allowDiskUse=True)
+        yield from cursor
+
+
+def _value(line, path):
+    for key in path:
+        line = line.get(key) if isinstance(line, dict) else None
+    return ';'.join(line) if isinstance(line, list) else line
+
+
+def iter_rows(db, jobs, fields, batch_size=EXPORT_BATCH_LINES):
+    """(jobId, lineNumber, *fields) tuples across jobs."""
+    paths = [FIELDS[field] for field in fields]
+    for job in jobs:
+        job_id = str(job['_id'])
+        for line in iter_job_lines(db, job, fields, batch_size):
+            yield (job_id, line.get('lineNumber')) + tuple(_value(line, path) for path in paths)
+
+
+class CsvSink:
+    def __init__(self, path, columns):
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetSink:
+    NUMERIC = {'lineNumber': 'int64', 'sentimentScore': 'float64', 'confidence': 'float64'}
+
+    def __init__(self, path, columns):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pa_parquet
+        except ImportError:
+            raise SystemExit('❌ Parquet export requires pyarrow (pip install pyarrow)')
+        self.pa = pa
+        self.columns = columns
+        self.schema = pa.schema([(c, getattr(pa, self.NUMERIC.get(c, 'string'))()) for c in columns])
+        self.writer = pa_parquet.ParquetWriter(path, self.schema)
+
+    def write(self, rows):
+        values = list(zip(*rows))
+        self.writer.write_table(self.pa.table(
+            {c: self.pa.array(v, type=t) for c, v, t in zip(self.columns, values, self.schema.types)},
+            schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+def export(db, args):
+    fields = select_fields(args.fields)
+    fmt = args.format or ('parquet' if args.out.endswith('.parquet') else 'csv')
+    match = job_filter(args)
+    if not args.job: match.setdefault('status', 'completed')
+    jobs = list(db[JOBS_COLLECTION].find(match, {'resultChunks': 1, 'totalLines': 1}).sort('createdAt', 1))
+    if not jobs: raise SystemExit("❌ No jobs match")
+    expected = sum((job.get('resultChunks') or {}).get('storedLines') or job.get('totalLines') or 0 for job in jobs)
+    print(f"📤 Exporting {len(jobs)} job(s), ~{expected:,} lines -> {args.out} ({fmt})")
+
+    sink = (ParquetSink if fmt == 'parquet' else CsvSink)(args.out, ['jobId', 'lineNumber'] + fields)
+    started = last_report = time.perf_counter()
+    written, batch = 0, []
+    try:
+        for row in iter_rows(db, jobs, fields, args.batch_size):
+            batch.append(row)
+            if len(batch) < args.batch_size: continue
+            sink.write(batch)
+            written += len(batch)
+            batch = []
+            if time.perf_counter() - last_report >= PROGRESS_SECONDS:
+                last_report = time.perf_counter()
+                percent = f" ({written * 100 / expected:.1f}%)" if expected else ''
+                print(f"\r   {written:,} lines{percent}, {written / (last_report - started):,.0f} lines/s",
+                      end='', file=sys.stderr, flush=True)
+        if batch:
+            sink.write(batch)
+            written += len(batch)
+    finally:
+        sink.close()
+    seconds = time.perf_counter() - started
+    print(f"\r✅ Exported {written:,} lines to {args.out} in {seconds:.1f}s "
+          f"({written / seconds if seconds else 0:,.0f} lines/s)", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Explore and export processing results in MongoDB')
+    parser.add_argument('--uri', default=MONGO_URI, help='MongoDB URI (default: MONGO_URI)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def command(name, help_text, job_help=None):
+        sub = commands.add_parser(name, help=help_text)
+        if job_help: sub.add_argument('--job', help=job_help)
+        sub.add_argument('--user', help='Only jobs of this user id')
+        sub.add_argument('--status', choices=['pending', 'processing', 'completed', 'failed', 'cancelled'])
+        sub.add_argument('--since', help='createdAt >= this ISO date/time')
+        sub.add_argument('--until', help='createdAt < this ISO date/time')
+        return sub
+
+    command('jobs', 'List recent jobs').add_argument('--limit', type=int, default=10)
+    command('summary', 'Totals and sentiment distribution', 'Line-level summary of one job')
+    command('trend', 'Jobs, lines and sentiment over time').add_argument(
+        '--unit', choices=list(TREND_FORMATS), default='day')
+    export_cmd = command('export', 'Export result lines to CSV or Parquet', 'Export one job')
+    export_cmd.add_argument('--out', required=True, help='.csv or .parquet')
+    export_cmd.add_argument('--format', choices=['csv', 'parquet'])
+    export_cmd.add_argument('--fields', default=None,
+                            help=f"Comma-separated, from {', '.join(FIELDS)} (default: response defaults)")
+    export_cmd.add_argument('--batch-size', type=int, default=EXPORT_BATCH_LINES)
+    args = parser.parse_args(argv)
+
+    db = connect(args.uri)
+    if args.command == 'jobs': list_jobs(db, args)
+    elif args.command == 'summary': (line_summary if args.job else job_summary)(db, args)
+    elif args.command == 'trend': trend(db, args)
+    else: export(db, args)
+
 
-DATABASE_FILE = 'project_results.db'
-
-# Connect to database
-conn = sqlite3.connect(DATABASE_FILE)
-
-# Method 1: View as pandas DataFrame (easiest)
-print("=== Viewing with Pandas ===")
-df = pd.read_sql_query("SELECT * FROM sentiment_scores", conn)
-print(f"Total records: {len(df)}")
-print("\nFirst 10 records:")
-print(df.head(10))
-print("\n" + "="*50)
-
-# Method 2: View statistics
-print("\n=== Statistics ===")
-# Count by sentiment
-sentiment_counts = pd.read_sql_query("""
-    SELECT sentiment_label, COUNT(*) as count, 
-           COUNT(*)*100.0/(SELECT COUNT(*) FROM sentiment_scores) as percentage
-    FROM sentiment_scores 
-    GROUP BY sentiment_label
-""", conn)
-print("Sentiment Distribution:")
-print(sentiment_counts.to_string(index=False))
-
-# Method 3: View all data with better formatting
-print("\n=== Full Results (formatted) ===")
-cursor = conn.cursor()
-cursor.execute("SELECT * FROM sentiment_scores")
-rows = cursor.fetchall()
-
-# Get column names
-column_names = [description[0] for description in cursor.description]
-print(f"Columns: {', '.join(column_names)}")
-print("-"*80)
-
-for row in rows:
-    # Truncate long text for display
-    text_preview = row[1][:50] + "..." if len(str(row[1])) > 50 else row[1]
-    print(f"ID: {row[0]}")
-    print(f"Text: {text_preview}")
-    print(f"Label: {row[2]} | Score: {row[3]} | Process ID: {row[4]}")
-    print(f"Time: {time.ctime(row[5])}" if len(row) > 5 else "")
-    print("-"*80)
-
-conn.close()
\ No newline at end of file
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+# worker_pool.py
+import gc
+import multiprocessing as mp
+import threading
+import time
+from datetime import datetime
+
+
+class WorkerCrashedError(RuntimeError):
+    pass
+
+
+class WorkerPool:
+    """Long-lived process pool that is forked once and reused across requests.
+
+    Anything the parent loads before start() (e.g. the ML models) is inherited
+    by the workers copy-on-write when the platform supports fork.
+    """
+
+    def __init__(self, processes, initializer=None, poll_interval=0.5):
+        self.processes = max(1, int(processes))
+        self.initializer = initializer
+        self.poll_interval = poll_interval
+        self.restarts = 0
+        self.started_at = None
+        self.startup_ms = None
+        self._pool = None
+        self._pids = set()
+        self._lock = threading.Lock()
+        methods = mp.get_all_start_methods()
+        self._ctx = mp.get_context('fork') if 'fork' in methods else mp.get_context()
+
+    @property
+    def is_warm(self):
+        return self._pool is not None
+
+    def start(self):
+        with self._lock:
+            if self._pool is None:
+                self._start_locked()
+        return self
+
+    def _start_locked(self):
+        # Keep already-loaded objects out of the GC generations so the
+        # collector in each worker doesn't touch (and un-share) their pages.
+        gc.freeze()
+        start = time.perf_counter()
+        self._pool = self._ctx.Pool(processes=self.processes, initializer=self.initializer)
+        self._pids = self._worker_pids()
+        self.startup_ms = (time.perf_counter() - start) * 1000
+        self.started_at = datetime.utcnow()
+
+    def _worker_pids(self):
+        # Pool keeps its live Process objects in _pool; dead ones are replaced silently.
+        return {p.pid for p in getattr(self._pool, '_pool', [])}
+
+    def _alive_count(self):
+        return sum(1 for p in getattr(self._pool, '_pool', []) if p.is_alive())
+
+    def _has_crashed(self):
+        return self._alive_count() < self.processes or self._worker_pids() != self._pids
+
+    def recycle(self):
+        """Tear the pool down and fork a fresh set of workers."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.terminate()
+                self._pool.join()
+                self._pool = None
+            self._start_locked()
+            self.restarts += 1
+
+    def ensure_healthy(self):
+        if self._pool is None:
+            self.start()
+        elif self._has_crashed():
+            print("⚠️ Worker pool lost a process -> recycling")
+            self.recycle()
+
+    def map(self, func, iterable, timeout=None):
+        """pool.map that fails fast (and recycles) if a worker dies mid-task.
+
+        A plain Pool.map never returns when a worker is killed, because the
+        task it held is lost while the pool quietly replaces the process.
+        """
+        self.ensure_healthy()
+        return self.wait(self._dispatch(lambda pool: pool.map_async(func, iterable)), timeout)
+
+    def submit(self, func, *args):
+        """Start func(*args) on a worker; pass the handle to wait() for the result."""
+        self.ensure_healthy()
+        return self._dispatch(lambda pool: pool.apply_async(func, args))
+
+    def _dispatch(self, start):
+        # Tagged under the lock, so a concurrent recycle() cannot slip between
+        # queueing the task and reading the generation it was queued on
+        with self._lock:
+            if self._pool is None:
+                self._start_locked()
+            handle = start(self._pool)
+            handle.generation = self.restarts  # A recycle drops queued tasks; wait() must not hang on them
+        return handle
+
+    def wait(self, async_result, timeout=None):
+        """Result of a map_async / submit handle, failing fast if a worker dies meanwhile."""
+        deadline = time.time() + timeout if timeout else None
+        while not async_result.ready():
+            async_result.wait(self.poll_interval)
+            if async_result.ready():
+                break
+            if getattr(async_result, 'generation', self.restarts) != self.restarts:
+                raise WorkerCrashedError("The pool was recycled while this task was pending")
+            if self._has_crashed():
+                self.recycle()
+                raise WorkerCrashedError("A pool worker died while processing")
+            if deadline and time.time() > deadline:
+                self.recycle()
+                raise TimeoutError(f"Worker pool did not finish within {timeout}s")
+        return async_result.get()
+
+    def health(self):
+        if self._pool is None:
+            return {'status': 'cold', 'workers': self.processes, 'alive': 0, 'restarts': self.restarts}
+        alive = self._alive_count()
+        return {
+            'status': 'warm' if alive == self.processes else 'degraded',
+            'workers': self.processes,
+            'alive': alive,
+            'restarts': self.restarts,
+            'startedAt': self.started_at.isoformat()
+        }
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is None:
+                return
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
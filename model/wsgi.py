@@ -0,0 +1,21 @@
+# wsgi.py
+"""Production entry point (run from model/):
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+With preload_app the models load once here, in the gunicorn master, and the
+serving workers fork from it sharing those pages copy-on-write. Each serving
+worker forks its own scoring pool on first use and connects to Mongo lazily,
+so no sockets or threads cross the fork. Each serving worker also starts its
+own model watcher, so publishing a new version (model_registry.py) reaches
+every worker without a restart.
+"""
+import gc
+
+import sentiment_api
+
+sentiment_api.load_models(watch=False)  # Watchers start per serving worker, never in the master
+sentiment_api.init_scheduler(watch=False)
+gc.freeze()  # Preloaded objects skip GC passes, which would otherwise write to (and copy) their pages
+
+app = sentiment_api.app